@@ -1,4 +1,18 @@
-from .app import main
+import sys
+
+from .cli import COMMANDS
+
+
+def _main() -> int:
+    # Headless subcommands never import the Qt stack
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        from .cli import main as cli_main
+
+        return cli_main(sys.argv[1:])
+    from .app import main
+
+    return main()
+
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(_main())
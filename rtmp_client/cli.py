@@ -0,0 +1,693 @@
+from __future__ import annotations
+
+import argparse
+import signal
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+# Headless entry points: nothing here (or in rtmp_client.core) may import PySide6
+from rtmp_client.core.async_runner import AsyncFFMpegRunner
+from rtmp_client.core.calibration import (
+    CALIBRATION_FPS,
+    CALIBRATION_HEIGHTS,
+    CALIBRATION_PRESETS,
+    DEFAULT_SOURCE,
+    DEFAULT_TRIAL_S,
+    CalibrationTrial,
+    EncodeCalibrator,
+)
+from rtmp_client.core.capabilities import default_capability_cache
+from rtmp_client.core.channels import ChannelStatus, ChannelSupervisor, default_channels_path, load_channels
+from rtmp_client.core.encode_cache import EncodeCache
+from rtmp_client.core.encoding import EncodeSettings
+from rtmp_client.core.ffmpeg_resolver import find_ffmpeg
+from rtmp_client.core.ffmpeg_runner import FFMpegRunner
+from rtmp_client.core.host_profile import host_id, load_host_profile, save_host_profile
+from rtmp_client.core.instrumentation import (
+    PROFILE_SAMPLE,
+    Instrumentation,
+    ProfileCapture,
+    instrumentation_enabled,
+    profile_request_from_env,
+)
+from rtmp_client.core.ingest_server import IngestImpairments, IngestSession, RtmpIngestServer
+from rtmp_client.core.lifecycle import LifecyclePolicy
+from rtmp_client.core.media_cache import MediaCache, default_media_cache_path
+from rtmp_client.core.metrics import DEFAULT_METRICS_HOST, MetricsRegistry, MetricsServer
+from rtmp_client.core.progress import DEFAULT_STATS_PERIOD, ProgressSample
+from rtmp_client.core.reconnect import ReconnectEvent, ReconnectPolicy
+from rtmp_client.core.settings import AppSettings, load_playlist
+from rtmp_client.core.standby import StandbyPolicy
+from rtmp_client.core.validators import is_file_readable, is_valid_rtmp_url
+from rtmp_client.core.watch_folders import FolderIndex, FolderWatcher, ScanResult, default_watch_index_path
+
+
+COMMANDS = ("run", "supervise", "info", "ingest", "calibrate", "scan")
+ENGINES = {"thread": FFMpegRunner, "asyncio": AsyncFFMpegRunner}
+
+
+def _out(text: str) -> None:
+    print(text, flush=True)
+
+
+def _err(text: str) -> None:
+    print(text, file=sys.stderr, flush=True)
+
+
+def _expand_playlist(items: List[str]) -> List[str]:
+    # Accepts media files and/or playlist .json files saved by the GUI
+    files: List[str] = []
+    for item in items:
+        if item.lower().endswith(".json"):
+            files.extend(load_playlist(Path(item)))
+        else:
+            files.append(item)
+    return files
+
+
+def _format_progress(sample: ProgressSample) -> str:
+    parts = [f"t={sample.out_time:.1f}s", f"fps={sample.fps:g}"]
+    if sample.bitrate_kbps is not None:
+        parts.append(f"bitrate={int(sample.bitrate_kbps)}k")
+    if sample.speed is not None:
+        parts.append(f"speed={sample.speed:.2f}x")
+    parts.append(f"drop={sample.drop_frames} dup={sample.dup_frames}")
+    return "[progress] " + " ".join(parts)
+
+
+def _format_reconnect(event: ReconnectEvent) -> str:
+    cause = "output macet" if event.stalled else f"exit {event.exit_code}"
+    return (
+        f"[run] Reconnect #{event.total} (percobaan {event.attempt}, {cause}): "
+        f"{Path(event.file_path).name} dari {event.resume_at:.1f}s dalam {event.delay_s:.1f}s"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m rtmp_client", description="RTMP Client (headless)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Stream a playlist to one or more RTMP/RTMPS destinations")
+    run.add_argument("--playlist", nargs="+", default=[], help="Media files and/or playlist .json files")
+    run.add_argument(
+        "--watch", action="append", default=[], help="Folder whose media joins the playlist as it appears (repeatable)"
+    )
+    run.add_argument("--watch-interval", type=float, help="Seconds between folder rescans (default: 30)")
+    run.add_argument(
+        "--url", action="append", required=True, help="RTMP/RTMPS destination (repeat for simulcast)"
+    )
+    run.add_argument("--loop", action="store_true", help="Loop the playlist")
+    run.add_argument("--gapless", action="store_true", help="Single FFmpeg session for the whole playlist")
+    run.add_argument("--passthrough", action="store_true", help="Stream copy files that already fit the target")
+    run.add_argument("--cache", action="store_true", help="Cache encoded items so loops are encoded once")
+    run.add_argument("--precache", action="store_true", help="Pre-encode cache entries in the background")
+    run.add_argument(
+        "--adaptive", action="store_true", help="Step the x264 preset/resolution down when encoding falls behind"
+    )
+    run.add_argument(
+        "--congestion", action="store_true", help="Step the video bitrate down while the uplink is congested"
+    )
+    run.add_argument("--bitrate-ladder", help="Comma-separated video bitrates in kbps for --congestion")
+    run.add_argument(
+        "--engine", choices=sorted(ENGINES), default="thread", help="Runner engine (asyncio: one thread for all pipes)"
+    )
+    run.add_argument("--ffmpeg", help="Path to the ffmpeg binary (default: vendor dir, then PATH)")
+    run.add_argument("--video-bitrate", type=int, help="Target video bitrate in kbps")
+    run.add_argument("--preset", help="x264 preset (default: veryfast)")
+    run.add_argument("--stats-period", type=float, default=DEFAULT_STATS_PERIOD, help="Progress interval (s)")
+    run.add_argument("--progress", action="store_true", help="Print progress samples")
+    run.add_argument("--quiet", action="store_true", help="Do not print FFmpeg log output")
+    run.add_argument("--no-probe-cache", action="store_true", help="Do not use the persistent media-probe cache")
+    run.add_argument("--no-prefetch", action="store_true", help="Do not prepare the next item while one streams")
+    run.add_argument(
+        "--max-reconnects", type=int, help="Reconnect attempts per drop before skipping the item (-1 = unlimited)"
+    )
+    run.add_argument(
+        "--stall-timeout", type=float, help="Restart FFmpeg when its output stands still this long (s, 0 = off)"
+    )
+    run.add_argument(
+        "--start-at",
+        help="Scheduled go-live, HH:MM[:SS] (next occurrence) or ISO date-time; "
+        "a slate holds the connection until then",
+    )
+    run.add_argument("--standby-warmup", type=float, help="Seconds before --start-at the slate goes out (default: 60)")
+    run.add_argument(
+        "--preroll", type=float, help="Seconds before --start-at the first item's FFmpeg starts (default: 2)"
+    )
+    run.add_argument(
+        "--instrument",
+        action="store_true",
+        help="Print event rates, log-flush time and main-loop lag periodically (also RTMP_CLIENT_INSTRUMENT=1)",
+    )
+    _add_metrics_arguments(run)
+    _add_profile_argument(run)
+
+    sup = sub.add_parser("supervise", help="Run the channels defined in channels.json")
+    sup.add_argument("--channels", help="Channel definitions (default: channels.json next to profiles.json)")
+    sup.add_argument("--only", action="append", help="Run only this channel (repeatable)")
+    sup.add_argument("--max-concurrent", type=int, help="Maximum number of encoders running at once")
+    sup.add_argument("--stagger", type=float, help="Seconds between consecutive channel starts")
+    sup.add_argument("--ffmpeg", help="Path to the ffmpeg binary (default: vendor dir, then PATH)")
+    sup.add_argument("--status-interval", type=float, default=10.0, help="Summary interval in seconds (0 = off)")
+    sup.add_argument("--quiet", action="store_true", help="Do not print FFmpeg log output")
+    _add_metrics_arguments(sup)
+    _add_profile_argument(sup)
+
+    info = sub.add_parser("info", help="Show what the FFmpeg build supports (cached per binary)")
+    info.add_argument("--ffmpeg", help="Path to the ffmpeg binary (default: vendor dir, then PATH)")
+    info.add_argument("--refresh", action="store_true", help="Probe again even if the cached entry is fresh")
+
+    ingest = sub.add_parser("ingest", help="Run a local RTMP ingest stand-in and report what arrives")
+    ingest.add_argument("--host", default="localhost", help="Listen address (default: localhost)")
+    ingest.add_argument("--port", type=int, default=1935)
+    ingest.add_argument("--throttle-kbps", type=float, help="Cap the ingest read rate")
+    ingest.add_argument("--latency-ms", type=float, default=0.0, help="Delay every server reply")
+    ingest.add_argument("--drop-after", type=float, help="Disconnect publishers after this many seconds of media")
+    ingest.add_argument("--max-drops", type=int, default=1, help="Forced disconnects in total (-1 = every session)")
+    ingest.add_argument("--refuse-first", type=int, default=0, help="Refuse this many connections first")
+    ingest.add_argument("--stall-threshold", type=float, default=1.0, help="Arrival gap counted as a stall (s)")
+    ingest.add_argument("--report-interval", type=float, default=5.0, help="Report interval in seconds (0 = off)")
+
+    scan = sub.add_parser("scan", help="Rescan watched folders into the index and report what changed")
+    scan.add_argument("folders", nargs="*", help="Folders to scan (default: every folder already in the index)")
+    scan.add_argument("--list", action="store_true", help="Print the playable files")
+
+    cal = sub.add_parser("calibrate", help="Benchmark encode profiles and save the best one this host sustains")
+    cal.add_argument("--ffmpeg", help="Path to the ffmpeg binary (default: vendor dir, then PATH)")
+    cal.add_argument("--channels", type=int, default=1, help="Encoders that must run at once (default: 1)")
+    cal.add_argument("--headroom", type=float, default=0.2, help="Required margin above realtime (0.2 = 1.2x)")
+    cal.add_argument("--source", default=DEFAULT_SOURCE, help=f"Synthetic source WxH@fps (default: {DEFAULT_SOURCE})")
+    cal.add_argument("--duration", type=float, default=DEFAULT_TRIAL_S, help="Seconds of source per trial")
+    cal.add_argument("--presets", help=f"x264 presets, best first (default: {','.join(CALIBRATION_PRESETS)})")
+    cal.add_argument("--heights", help=f"Height caps (default: {','.join(map(str, CALIBRATION_HEIGHTS))})")
+    cal.add_argument("--fps", help=f"Frame-rate caps (default: {','.join(f'{f:g}' for f in CALIBRATION_FPS)})")
+    cal.add_argument("--video-bitrate", type=int, help="Target video bitrate in kbps")
+    cal.add_argument("--dry-run", action="store_true", help="Measure only, do not save to profiles.json")
+    return parser
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    if not args.playlist and not args.watch:
+        _err("[run] Butuh --playlist dan/atau --watch.")
+        return 2
+    files = _expand_playlist(args.playlist)
+    missing = [f for f in files if not is_file_readable(f)]
+    for f in missing:
+        _err(f"[run] File tidak ditemukan / tidak bisa dibaca: {f}")
+    files = [f for f in files if f not in missing]
+    settings = AppSettings()
+    watcher: Optional[FolderWatcher] = None
+    if args.watch:
+        index = FolderIndex(default_watch_index_path(settings), settle_s=settings.watch_settle_s)
+        watcher = FolderWatcher(index, args.watch, args.watch_interval or settings.watch_interval_s)
+        for scanned in watcher.scan_now():
+            _out(f"[run] Folder {scanned.describe()}")
+        files = list(dict.fromkeys(files + watcher.files()))
+    if not files:
+        _err("[run] Playlist kosong.")
+        return 2
+    bad_urls = [u for u in args.url if not is_valid_rtmp_url(u)]
+    if bad_urls:
+        _err("[run] RTMP URL harus diawali rtmp:// atau rtmps://: " + ", ".join(bad_urls))
+        return 2
+
+    encode = EncodeSettings.from_app_settings(settings)
+    profile = load_host_profile(settings.profiles_file) if settings.use_host_profile else None
+    if profile is not None:
+        _out(f"[run] Profil host: {profile.describe()}")
+    if args.video_bitrate:
+        encode.video_bitrate_kbps = args.video_bitrate
+    if args.preset:
+        encode.preset = args.preset
+    policy = ReconnectPolicy.from_app_settings(settings)
+    if args.max_reconnects is not None:
+        policy.max_retries = args.max_reconnects
+    lifecycle = LifecyclePolicy.from_app_settings(settings)
+    if args.stall_timeout is not None:
+        lifecycle.stall_timeout_s = max(0.0, args.stall_timeout)
+    ladder: List[int] = []
+    if args.bitrate_ladder:
+        try:
+            ladder = [int(k) for k in args.bitrate_ladder.split(",") if k.strip()]
+        except ValueError:
+            _err(f"[run] --bitrate-ladder harus berupa angka kbps dipisah koma: {args.bitrate_ladder}")
+            return 2
+
+    go_live_at: Optional[float] = None
+    if args.start_at:
+        go_live_at = _parse_start_at(args.start_at)
+        if go_live_at is None:
+            _err(f"[run] --start-at harus HH:MM[:SS] atau tanggal-waktu ISO: {args.start_at}")
+            return 2
+        _out(f"[run] Mulai terjadwal: {datetime.fromtimestamp(go_live_at).isoformat(sep=' ', timespec='seconds')}")
+    standby = StandbyPolicy.from_app_settings(settings)
+    if args.standby_warmup is not None:
+        standby.warmup_s = max(0.0, args.standby_warmup)
+    if args.preroll is not None:
+        standby.preroll_s = max(0.0, args.preroll)
+
+    runner = ENGINES[args.engine](
+        ffmpeg_path=args.ffmpeg,
+        encode=encode,
+        encode_cache=EncodeCache.from_app_settings(settings) if args.cache else None,
+        media_cache=None if args.no_probe_cache else MediaCache(default_media_cache_path(settings)),
+        stats_period=args.stats_period,
+        log_max_lines=settings.log_max_lines,
+        reconnect=policy,
+        lifecycle=lifecycle,
+        standby=standby,
+        prefetch=not args.no_prefetch,
+        bitrate_ladder=ladder or settings.bitrate_ladder_kbps or None,
+    )
+
+    done = threading.Event()
+    result = {"exit_code": 0, "error": False, "interrupted": False}
+
+    def on_stopped(exit_code: int) -> None:
+        result["exit_code"] = exit_code
+        done.set()
+
+    def on_error(message: str) -> None:
+        result["error"] = True
+        _err(f"[error] {message}")
+
+    registry = MetricsRegistry()
+    registry.track("main", runner)
+    try:
+        metrics = _start_metrics(args, registry, "run")
+    except OSError as exc:
+        _err(f"[run] Port metrics {args.metrics_port} tidak bisa dipakai: {exc}")
+        return 2
+    instrumentation: Optional[Instrumentation] = None
+    if args.instrument or instrumentation_enabled(settings):
+        instrumentation = Instrumentation()
+        instrumentation.watch_runner(runner)
+    profile = _start_profile(args, settings, "run", instrumentation)
+    runner.on_stopped.connect(on_stopped)
+    runner.on_error.connect(on_error)
+    runner.on_file_started.connect(lambda path: _out(f"[run] Streaming: {path}"))
+    runner.on_file_mode.connect(lambda path, mode: _out(f"[run] Mode {mode}: {path}"))
+    runner.on_destination_status.connect(lambda url, status: _out(f"[run] Tujuan {url}: {status}"))
+    runner.on_reconnect.connect(lambda event: _out(_format_reconnect(event)))
+    runner.on_go_live.connect(lambda report: _out(f"[run] {report.describe()}"))
+    if args.progress:
+        runner.on_progress.connect(lambda sample: _out(_format_progress(sample)))
+
+    def request_stop(signum, frame) -> None:
+        result["interrupted"] = True
+        runner.stop_stream()
+
+    signal.signal(signal.SIGINT, request_stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, request_stop)
+
+    runner.start_playlist(
+        video_files=files,
+        rtmp_url=args.url[0],
+        destinations=args.url[1:],
+        loop=args.loop,
+        gapless=args.gapless,
+        passthrough=args.passthrough,
+        use_cache=args.cache,
+        precache=args.precache,
+        adaptive=args.adaptive,
+        congestion=args.congestion,
+        go_live_at=go_live_at,
+    )
+    if not runner.is_running and not done.is_set():
+        if metrics is not None:
+            metrics.stop()
+        if profile is not None:
+            profile.stop()
+        return 1
+    if watcher is not None:
+        watcher.on_added.connect(lambda added: _out(f"[run] {len(added)} file baru di folder pantauan"))
+        watcher.on_added.connect(runner.extend_playlist)
+        watcher.start(scan_first=False)
+
+    # Logs are drained from the runner's ring buffer on this (main) thread
+    report_every = max(1.0, settings.instrument_report_interval_s)
+    next_report = time.monotonic() + report_every
+    ticked = time.monotonic()
+    while not done.wait(0.5):
+        if instrumentation is None:
+            _flush_logs(runner, args.quiet)
+            continue
+        # How late the wait returned is time this thread spent waiting for the GIL
+        instrumentation.record_lag(time.monotonic() - ticked - 0.5)
+        with instrumentation.timed("cli.flush_logs"):
+            _flush_logs(runner, args.quiet)
+        if time.monotonic() >= next_report:
+            next_report += report_every
+            _out(instrumentation.report().describe())
+        ticked = time.monotonic()
+    runner.wait(5.0)
+    if watcher is not None:
+        watcher.stop()
+        watcher.index.close()
+    _flush_logs(runner, args.quiet)
+    stats = runner.lifecycle_stats
+    if stats.stops or stats.stall_restarts:
+        _out(f"[run] Lifecycle: {stats.describe()}")
+    if instrumentation is not None:
+        _out(instrumentation.report().describe())
+        instrumentation.detach()
+    if profile is not None:
+        profile.stop()
+    if metrics is not None:
+        metrics.stop()
+
+    if result["interrupted"]:
+        return 0
+    if result["error"]:
+        return 1
+    code = result["exit_code"]
+    return code if 0 <= code <= 255 else 1
+
+
+def _parse_start_at(text: str, now: Optional[datetime] = None) -> Optional[float]:
+    # "HH:MM[:SS]" is its next occurrence (today, or tomorrow once it has passed); anything else ISO 8601
+    now = now or datetime.now()
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try:
+            clock = datetime.strptime(text, fmt).time()
+        except ValueError:
+            continue
+        at = datetime.combine(now.date(), clock)
+        if at <= now:
+            at += timedelta(days=1)
+        return at.timestamp()
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        return None
+
+
+def _add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics at http://HOST:PORT/metrics")
+    parser.add_argument(
+        "--metrics-host", default=DEFAULT_METRICS_HOST, help="Metrics listen address (default: 127.0.0.1)"
+    )
+
+
+def _start_metrics(args: argparse.Namespace, registry: MetricsRegistry, tag: str) -> Optional[MetricsServer]:
+    # Raises OSError when the port cannot be bound, before anything starts streaming
+    if args.metrics_port is None:
+        return None
+    server = MetricsServer(registry, args.metrics_host, args.metrics_port)
+    server.start()
+    _out(f"[{tag}] Metrics: {server.address}")
+    return server
+
+
+def _add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        type=float,
+        metavar="SECONDS",
+        help="Sample every thread's stack for SECONDS and write a report to the diagnostics folder "
+        "(also RTMP_CLIENT_PROFILE)",
+    )
+
+
+def _start_profile(
+    args: argparse.Namespace,
+    settings: AppSettings,
+    tag: str,
+    instrumentation: Optional[Instrumentation] = None,
+) -> Optional[ProfileCapture]:
+    # Headless runs always sample: the main thread only waits, so cProfile there would show nothing
+    duration = args.profile
+    if duration is None:
+        request = profile_request_from_env()
+        duration = request[0] if request is not None else None
+    if not duration or duration <= 0:
+        return None
+    capture = ProfileCapture(settings.diagnostics_dir, duration, PROFILE_SAMPLE, instrumentation=instrumentation)
+    capture.on_finished.connect(lambda path: _out(f"[{tag}] Laporan profil: {path}"))
+    try:
+        capture.start()
+    except OSError as exc:
+        _err(f"[{tag}] Profil tidak bisa dimulai: {exc}")
+        return None
+    _out(f"[{tag}] Profil {capture.duration_s:g} detik dimulai")
+    return capture
+
+
+def _flush_logs(runner: FFMpegRunner, quiet: bool, prefix: str = "") -> None:
+    lines = runner.log_buffer.drain()
+    if lines and not quiet:
+        _out("\n".join(prefix + line for line in lines))
+
+
+def _format_channel(status: ChannelStatus) -> str:
+    parts = [f"[{status.name}] {status.state}"]
+    if status.mode:
+        parts.append(status.mode)
+    if status.current_file:
+        parts.append(Path(status.current_file).name)
+    if status.reconnects:
+        parts.append(f"reconnect={status.reconnects}")
+    if status.stall_restarts:
+        parts.append(f"macet={status.stall_restarts}")
+    if status.error:
+        parts.append(f"({status.error})")
+    return " ".join(parts)
+
+
+def cmd_supervise(args: argparse.Namespace) -> int:
+    settings = AppSettings()
+    path = Path(args.channels) if args.channels else default_channels_path(settings)
+    configs = load_channels(path)
+    if args.only:
+        configs = [c for c in configs if c.name in args.only]
+    if not configs:
+        _err(f"[supervise] Tidak ada channel di {path}")
+        return 2
+    registry = MetricsRegistry()
+    try:
+        metrics = _start_metrics(args, registry, "supervise")
+    except OSError as exc:
+        _err(f"[supervise] Port metrics {args.metrics_port} tidak bisa dipakai: {exc}")
+        return 2
+    profile = _start_profile(args, settings, "supervise")
+
+    supervisor = ChannelSupervisor(
+        settings,
+        ffmpeg_path=args.ffmpeg,
+        max_concurrent=args.max_concurrent,
+        stagger_s=args.stagger,
+        encode_cache=EncodeCache.from_app_settings(settings),
+        media_cache=MediaCache(default_media_cache_path(settings)),
+        metrics=registry,
+    )
+    supervisor.set_channels(configs)
+    supervisor.on_channel_status.connect(lambda name, status: _out(_format_channel(status)))
+    supervisor.on_log.connect(lambda name, text: _err(text))
+    interrupted = threading.Event()
+
+    def request_stop(signum, frame) -> None:
+        interrupted.set()
+        supervisor.stop_all()
+
+    signal.signal(signal.SIGINT, request_stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, request_stop)
+
+    _out(
+        f"[supervise] {len(configs)} channel, maks {supervisor.max_concurrent} bersamaan, "
+        f"jeda start {supervisor.stagger_s:g} detik"
+    )
+    # Disabled channels only run when named explicitly with --only
+    supervisor.start([c.name for c in configs] if args.only else None)
+    next_summary = time.monotonic() + args.status_interval
+    while not supervisor.wait(0.5):
+        for name in supervisor.names():
+            runner = supervisor.runner(name)
+            if runner is not None:
+                _flush_logs(runner, args.quiet, f"[{name}] ")
+        if args.status_interval > 0 and time.monotonic() >= next_summary:
+            next_summary += args.status_interval
+            s = supervisor.summary()
+            _out(
+                f"[supervise] jalan={s.running} antre={s.queued} berhenti={s.stopped} gagal={s.failed} "
+                f"fps={s.fps:.0f} bitrate={s.bitrate_kbps:.0f}k drop={s.drop_frames} reconnect={s.reconnects}"
+            )
+    for name in supervisor.names():
+        runner = supervisor.runner(name)
+        if runner is not None:
+            _flush_logs(runner, args.quiet, f"[{name}] ")
+    supervisor.close()
+    if profile is not None:
+        profile.stop()
+    if metrics is not None:
+        metrics.stop()
+
+    if interrupted.is_set():
+        return 0
+    return 1 if supervisor.summary().failed else 0
+
+
+def cmd_info(args: argparse.Namespace) -> int:
+    ffmpeg = args.ffmpeg or find_ffmpeg()
+    if not ffmpeg:
+        _err("[info] FFmpeg tidak ditemukan di PATH.")
+        return 2
+    cache = default_capability_cache()
+    if args.refresh:
+        cache.invalidate()
+    fresh = cache.cached(ffmpeg) is not None
+    caps = cache.get(ffmpeg)
+    if caps is None:
+        _err(f"[info] Gagal membaca kemampuan FFmpeg: {ffmpeg}")
+        return 1
+    _out(f"[info] {caps.path} ({'cache' if fresh else 'probe baru'})")
+    _out(f"[info] Versi: {caps.version or '?'}")
+    protocols = [p for p in ("rtmp", "rtmps", "srt", "file") if p in caps.output_protocols]
+    _out(f"[info] Protokol output: {', '.join(protocols) or '-'}")
+    _out(f"[info] Muxer: {', '.join(m for m in ('flv', 'tee', 'mpegts') if caps.has_muxer(m))}")
+    _out(f"[info] Encoder: {', '.join(e for e in ('libx264', 'aac') if caps.has_encoder(e))}")
+    _out(f"[info] Hardware encoder: {', '.join(caps.hardware_encoders) or '-'}")
+    _out(f"[info] {len(caps.encoders)} encoder, {len(caps.muxers)} muxer, {len(caps.output_protocols)} protokol output")
+    profile = load_host_profile(AppSettings().profiles_file)
+    _out(f"[info] Profil host ({host_id()}): {profile.describe() if profile else 'belum dikalibrasi'}")
+    return 0
+
+
+def cmd_scan(args: argparse.Namespace) -> int:
+    index = FolderIndex(default_watch_index_path(AppSettings()))
+    try:
+        folders = args.folders or index.roots()
+        if not folders:
+            _err("[scan] Belum ada folder pantauan; sebutkan folder yang akan di-scan.")
+            return 2
+        watcher = FolderWatcher(index, folders)
+        results: List[ScanResult] = watcher.scan_now()
+        for result in results:
+            _out(f"[scan] {result.describe()}")
+            if args.list:
+                for path in index.files(result.root):
+                    _out(path)
+        return 1 if any(r.missing for r in results) else 0
+    finally:
+        index.close()
+
+
+def _csv(text: Optional[str], cast, default):
+    if not text:
+        return list(default)
+    return [cast(v) for v in text.split(",") if v.strip()]
+
+
+def _format_trial(trial: CalibrationTrial, required: float) -> str:
+    speeds = "/".join(f"{s:.2f}" for s in trial.speeds) or "-"
+    verdict = "OK" if trial.ok else (trial.error or f"< {required:.2f}x")
+    return f"[calibrate] {trial.label():<24} {speeds}x  {verdict}"
+
+
+def cmd_calibrate(args: argparse.Namespace) -> int:
+    ffmpeg = args.ffmpeg or find_ffmpeg()
+    if not ffmpeg:
+        _err("[calibrate] FFmpeg tidak ditemukan di PATH.")
+        return 2
+    settings = AppSettings()
+    encode = EncodeSettings.from_app_settings(settings)
+    if args.video_bitrate:
+        encode.video_bitrate_kbps = args.video_bitrate
+    try:
+        calibrator = EncodeCalibrator(
+            ffmpeg,
+            channels=args.channels,
+            headroom=args.headroom,
+            source=args.source,
+            trial_s=args.duration,
+            encode=encode,
+            presets=_csv(args.presets, str.strip, CALIBRATION_PRESETS),
+            heights=_csv(args.heights, int, CALIBRATION_HEIGHTS),
+            fps_values=_csv(args.fps, float, CALIBRATION_FPS),
+        )
+    except ValueError as exc:
+        _err(f"[calibrate] {exc}")
+        return 2
+    caps = default_capability_cache().get(ffmpeg)
+    if caps is not None and not caps.has_encoder("libx264"):
+        _err("[calibrate] FFmpeg ini tidak punya encoder libx264.")
+        return 1
+    required = calibrator.required_speed
+    calibrator.on_trial = lambda trial: _out(_format_trial(trial, required))
+    _out(
+        f"[calibrate] Sumber {args.source}, {calibrator.channels} channel bersamaan, "
+        f"target >= {required:.2f}x, {encode.video_bitrate_kbps}k"
+    )
+    profile = calibrator.run(caps.version if caps is not None else "")
+    if profile is None:
+        _err("[calibrate] Tidak ada profil yang bertahan realtime; kurangi --channels atau --headroom.")
+        return 1
+    _out(f"[calibrate] Terpilih: {profile.describe()}")
+    if args.dry_run:
+        return 0
+    if not save_host_profile(settings.profiles_file, profile):
+        _err(f"[calibrate] Gagal menyimpan ke {settings.profiles_file}")
+        return 1
+    _out(f"[calibrate] Disimpan di {settings.profiles_file} untuk host {host_id()}")
+    return 0
+
+
+def _format_session(session: IngestSession) -> str:
+    return f"[ingest] #{session.index} {session.app}/{session.stream_key} ({session.peer})"
+
+
+def cmd_ingest(args: argparse.Namespace) -> int:
+    impairments = IngestImpairments(
+        throttle_kbps=args.throttle_kbps,
+        latency_ms=args.latency_ms,
+        drop_after_s=args.drop_after,
+        max_drops=args.max_drops,
+        refuse_first=args.refuse_first,
+    )
+    server = RtmpIngestServer(args.host, args.port, impairments, args.stall_threshold)
+    server.on_session_started.connect(lambda session: _out(f"{_format_session(session)} mulai publish"))
+    server.on_session_ended.connect(
+        lambda session: _out(
+            f"{_format_session(session)} berakhir: {session.close_reason} | {session.report().describe()}"
+        )
+    )
+    try:
+        server.start_background()
+    except OSError as exc:
+        _err(f"[ingest] Gagal listen di {args.host}:{args.port}: {exc}")
+        return 2
+    interrupted = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: interrupted.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda signum, frame: interrupted.set())
+
+    _out(f"[ingest] Siap di {server.url('<key>')}")
+    interval = args.report_interval if args.report_interval > 0 else None
+    while not interrupted.wait(interval):
+        for session in list(server.sessions):
+            if session.ended is None and session.publish_started is not None:
+                _out(f"{_format_session(session)} {session.report().describe()}")
+    server.stop_background()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "run":
+        return cmd_run(args)
+    if args.command == "supervise":
+        return cmd_supervise(args)
+    if args.command == "info":
+        return cmd_info(args)
+    if args.command == "ingest":
+        return cmd_ingest(args)
+    if args.command == "calibrate":
+        return cmd_calibrate(args)
+    if args.command == "scan":
+        return cmd_scan(args)
+    return 2
@@ -4,4 +4,29 @@ __all__ = [
     "settings",
     "ffmpeg_resolver",
     "ffprobe_resolver",
+    "capabilities",
+    "media_probe",
+    "media_cache",
+    "encoding",
+    "encode_cache",
+    "fanout",
+    "progress",
+    "log_buffer",
+    "events",
+    "async_runner",
+    "channels",
+    "reconnect",
+    "adaptive",
+    "ingest_server",
+    "prefetch",
+    "congestion",
+    "host_profile",
+    "calibration",
+    "playlist_store",
+    "watch_folders",
+    "preview",
+    "lifecycle",
+    "metrics",
+    "instrumentation",
+    "standby",
 ]
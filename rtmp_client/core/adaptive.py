@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional, Sequence
+
+from .encoding import EncodeSettings, lowest_cap
+from .progress import ProgressSample
+
+
+@dataclass(frozen=True)
+class LadderStep:
+    preset: str
+    height: Optional[int] = None  # None = keep source resolution
+    fps: Optional[float] = None  # None = keep source frame rate
+
+    def describe(self) -> str:
+        parts = [self.preset]
+        if self.height:
+            parts.append(f"{self.height}p")
+        if self.fps:
+            parts.append(f"{self.fps:g}fps")
+        return "/".join(parts)
+
+
+# Cheapest last: presets first, then resolution, then frame rate
+DEFAULT_LADDER = (
+    LadderStep("medium"),
+    LadderStep("fast"),
+    LadderStep("faster"),
+    LadderStep("veryfast"),
+    LadderStep("superfast"),
+    LadderStep("ultrafast"),
+    LadderStep("ultrafast", height=720),
+    LadderStep("ultrafast", height=720, fps=30),
+    LadderStep("ultrafast", height=480, fps=30),
+)
+
+
+@dataclass
+class AdaptiveDecision:
+    direction: int  # -1 = cheaper, +1 = better quality
+    from_step: LadderStep
+    to_step: LadderStep
+    reason: str
+
+
+def host_load_per_cpu() -> Optional[float]:
+    # 1-minute load average per core; None where the OS does not report it (Windows)
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class AdaptivePresetController:
+    # Watches live progress of transcoded items and walks a ladder of encoder settings.
+    # With -re the reported speed is capped at ~1.0x, so falling behind shows up as speed < 1
+    # but headroom cannot: stepping up needs a long stretch at realtime and an idle host.
+    # Decisions only become pending here; the runner applies them at item boundaries.
+
+    def __init__(
+        self,
+        encode: EncodeSettings,
+        ladder: Sequence[LadderStep] = DEFAULT_LADDER,
+        *,
+        down_speed: float = 0.95,
+        up_speed: float = 0.99,
+        down_window: int = 10,
+        up_window: int = 60,
+        up_max_load: float = 0.6,
+        warmup_s: float = 5.0,
+        cooldown_s: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
+        load: Callable[[], Optional[float]] = host_load_per_cpu,
+    ) -> None:
+        self.ladder: List[LadderStep] = list(ladder)
+        self.down_speed = down_speed
+        self.up_speed = up_speed
+        self.up_max_load = up_max_load
+        self.warmup_s = warmup_s
+        self.cooldown_s = cooldown_s
+        self._clock = clock
+        self._load = load
+        self.base = encode  # settings the session started with; restored when it ends
+        self._down: Deque[float] = deque(maxlen=max(1, down_window))
+        self._up: Deque[float] = deque(maxlen=max(1, up_window))
+        self._last_change = -cooldown_s
+        self.pending: Optional[AdaptiveDecision] = None
+        self.decisions: List[AdaptiveDecision] = []
+        self.index = self._initial_index(encode)
+
+    @property
+    def step(self) -> LadderStep:
+        return self.ladder[self.index]
+
+    def settings(self) -> EncodeSettings:
+        # A step never raises the session's own resolution / frame-rate target
+        step = self.step
+        return dataclasses.replace(
+            self.base,
+            preset=step.preset,
+            height=lowest_cap(step.height, self.base.height),
+            fps=lowest_cap(step.fps, self.base.fps),
+        )
+
+    def observe(self, sample: ProgressSample) -> Optional[AdaptiveDecision]:
+        # Feeds one progress sample; returns a decision when one becomes pending
+        if sample.speed is None or sample.out_time < self.warmup_s or self.pending is not None:
+            return None
+        self._down.append(sample.speed)
+        self._up.append(sample.speed)
+        if self._clock() - self._last_change < self.cooldown_s:
+            return None
+        if len(self._down) == self._down.maxlen and self.index < len(self.ladder) - 1:
+            mean = sum(self._down) / len(self._down)
+            if mean < self.down_speed:
+                reason = f"speed rata-rata {mean:.2f}x < {self.down_speed:.2f}x"
+                if sample.fps:
+                    reason += f", fps {sample.fps:g}"
+                return self._propose(+1, -1, reason)
+        if len(self._up) == self._up.maxlen and self.index > 0 and min(self._up) >= self.up_speed:
+            load = self._load()
+            if load is not None and load <= self.up_max_load:
+                return self._propose(-1, +1, f"realtime stabil {len(self._up)} sampel, load/CPU {load:.2f}")
+        return None
+
+    def apply_pending(self) -> Optional[AdaptiveDecision]:
+        # Called by the runner at an item boundary; moves to the pending step
+        decision = self.pending
+        if decision is None:
+            return None
+        self.pending = None
+        self.index = self.ladder.index(decision.to_step)
+        self._last_change = self._clock()
+        self.reset_window()
+        self.decisions.append(decision)
+        return decision
+
+    def reset_window(self) -> None:
+        # A new encoder process starts with a fresh measurement window
+        self._down.clear()
+        self._up.clear()
+
+    def _propose(self, delta: int, direction: int, reason: str) -> AdaptiveDecision:
+        self.pending = AdaptiveDecision(direction, self.step, self.ladder[self.index + delta], reason)
+        return self.pending
+
+    def _initial_index(self, encode: EncodeSettings) -> int:
+        for i, step in enumerate(self.ladder):
+            if step.preset == encode.preset and step.height == encode.height and step.fps == encode.fps:
+                return i
+        for i, step in enumerate(self.ladder):
+            if step.preset == encode.preset:
+                return i
+        # Unknown preset: insert it at the top so the first move is always a real change
+        self.ladder.insert(0, LadderStep(encode.preset, encode.height, encode.fps))
+        return 0
@@ -0,0 +1,464 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .ffmpeg_runner import FFMpegRunner
+from .lifecycle import (
+    STAGE_KILL,
+    STAGE_LOST,
+    STAGE_QUIT,
+    STAGE_TERMINATE,
+    StallWatchdog,
+    StopOutcome,
+    group_popen_kwargs,
+    signal_group,
+)
+from .log_buffer import split_lines
+from .prefetch import ItemPrefetcher
+from .progress import ProgressParser
+from .reconnect import ResumeTracker
+
+
+class AsyncEngine:
+    # One event loop on one thread supervising every FFmpeg child and its pipes
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._prefetch_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    @property
+    def prefetch_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        # Next-item preparation for every runner on this engine (mostly waiting on disk)
+        with self._lock:
+            if self._prefetch_executor is None:
+                self._prefetch_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=4, thread_name_prefix="ffmpeg-prefetch"
+                )
+            return self._prefetch_executor
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(ready,), name="ffmpeg-asyncio", daemon=True)
+                self._thread.start()
+                ready.wait()
+            assert self._loop is not None
+            return self._loop
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback, *args) -> None:
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def close(self) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            executor, self._prefetch_executor = self._prefetch_executor, None
+            self._loop = None
+            self._thread = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _install_child_watcher(loop)
+        self._loop = loop
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+
+def _install_child_watcher(loop: asyncio.AbstractEventLoop) -> None:
+    # Before 3.12 the default watcher spends one thread per child; pidfd needs none
+    if sys.platform == "win32" or sys.version_info >= (3, 12) or not hasattr(asyncio, "PidfdChildWatcher"):
+        return
+    try:
+        watcher = asyncio.PidfdChildWatcher()
+        watcher.attach_loop(loop)
+        asyncio.set_child_watcher(watcher)
+    except Exception:
+        pass
+
+
+_default_engine: Optional[AsyncEngine] = None
+_default_engine_lock = threading.Lock()
+
+
+def default_engine() -> AsyncEngine:
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = AsyncEngine()
+        return _default_engine
+
+
+class AsyncFFMpegRunner(FFMpegRunner):
+    # Same start/stop/playlist semantics and events as FFMpegRunner, but no threads per
+    # stream: the playlist loop, the child process and both of its pipes live on the engine loop.
+    # Progress uses the child's stdout, so multi-destination fan-out and the encode cache
+    # (which need stdout or tee) stay with the threaded runner.
+
+    def __init__(self, *args, engine: Optional[AsyncEngine] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._engine = engine or default_engine()
+        self._future: Optional[concurrent.futures.Future] = None
+        self._transport: Optional[asyncio.SubprocessTransport] = None
+        self._stop_waiter: Optional[asyncio.Event] = None
+        # Exit future of the current process and its stop escalation, if one is running
+        self._process_done: Optional[asyncio.Future] = None
+        self._stopping: Optional[asyncio.Future] = None
+
+    @property
+    def is_running(self) -> bool:
+        future = self._future
+        return future is not None and not future.done()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        future = self._future
+        if future is None:
+            return True
+        try:
+            future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            return False
+        except Exception:
+            pass
+        return True
+
+    def start_playlist(
+        self,
+        *,
+        video_files: List[str],
+        rtmp_url: str,
+        loop: bool,
+        gapless: bool = False,
+        passthrough: bool = False,
+        use_cache: bool = False,
+        precache: bool = False,
+        destinations: Optional[List[str]] = None,
+        adaptive: bool = False,
+        congestion: bool = False,
+        go_live_at: Optional[float] = None,
+    ) -> None:
+        if not self._ffmpeg_path:
+            self.on_error.emit("FFmpeg tidak ditemukan di PATH. Install FFmpeg terlebih dahulu.")
+            return
+        if self.is_running:
+            self.on_error.emit("Proses FFmpeg masih berjalan.")
+            return
+        if use_cache or precache or any(u and u != rtmp_url for u in destinations or []):
+            self.on_error.emit("Engine asyncio belum mendukung cache encode atau multi-tujuan.")
+            return
+        if go_live_at is not None:
+            # A scheduled start switches feeds in front of the fan-out relays, which this engine does not run
+            self.on_error.emit("Engine asyncio belum mendukung mulai terjadwal.")
+            return
+        valid_files = [p for p in video_files if p and os.path.isfile(p)]
+        if not valid_files:
+            self.on_error.emit("Playlist kosong atau file tidak ditemukan.")
+            return
+        if not rtmp_url:
+            self.on_error.emit("Tidak ada tujuan RTMP.")
+            return
+        if self._check_capabilities([rtmp_url], passthrough, False) is None:
+            return
+
+        if self._preview is not None:
+            # The preview output needs an extra pipe per process, which this engine does not read yet
+            self._log("[runner] Preview belum didukung engine asyncio, dilewati\n")
+        self._stop_event.clear()
+        self._last_progress = None
+        self._reconnect_count = 0
+        self._appended = []
+        self._last_output_at = None
+        self._begin_adaptive(adaptive, gapless)
+        self._begin_congestion(congestion, gapless, False)
+        self._future = self._engine.submit(self._run_playlist_async(valid_files, rtmp_url, loop, gapless, passthrough))
+
+    def stop_stream(self) -> None:
+        self._stop_event.set()
+        self._engine.call_soon(self._terminate_current)
+
+    # Internal (engine loop)
+    def _terminate_current(self) -> None:
+        if self._stop_waiter is not None:
+            self._stop_waiter.set()
+        self._request_stop("stop")
+
+    def _current_pid(self) -> Optional[int]:
+        transport = self._transport
+        return transport.get_pid() if transport is not None else None
+
+    def _interrupt_for_switch(self) -> None:
+        # Ends the current FFmpeg process only; the playlist loop decides what runs next
+        self._request_stop("switch")
+
+    def _request_stop(self, reason: str) -> None:
+        # The quit/terminate/kill escalation runs as a task, so the loop never waits on it
+        transport, done = self._transport, self._process_done
+        if transport is None or done is None or done.done() or self._stopping is not None:
+            return
+        self._stopping = asyncio.ensure_future(self._stop_async(transport, done, reason))
+
+    async def _stop_async(self, transport: asyncio.SubprocessTransport, done: asyncio.Future, reason: str) -> None:
+        started = time.monotonic()
+        policy = self._lifecycle
+        outcome = StopOutcome(STAGE_LOST, 0.0, reason)
+        stages = (
+            (STAGE_QUIT, policy.quit_timeout_s),
+            (STAGE_TERMINATE, policy.terminate_timeout_s),
+            (STAGE_KILL, policy.kill_timeout_s),
+        )
+        for stage, timeout in stages:
+            if stage == STAGE_QUIT:
+                pipe = transport.get_pipe_transport(0)
+                if pipe is None or pipe.is_closing():
+                    continue
+                pipe.write(b"q")
+            elif transport.get_returncode() is None and not signal_group(transport.get_pid(), stage):
+                try:
+                    if stage == STAGE_KILL:
+                        transport.kill()
+                    else:
+                        transport.terminate()
+                except ProcessLookupError:
+                    pass
+            await asyncio.wait([done], timeout=max(0.0, timeout))
+            if done.done():
+                outcome.stage = stage
+                break
+        outcome.elapsed_s = time.monotonic() - started
+        self._record_stop(outcome)
+
+    async def _watch_stall(self, watchdog: StallWatchdog, done: asyncio.Future) -> None:
+        interval = max(0.05, self._lifecycle.check_interval_s)
+        while not done.done():
+            await asyncio.wait([done], timeout=interval)
+            idle = watchdog.stalled_for()
+            if idle is not None and not done.done() and self._stopping is None:
+                self._attempt_stalled = True
+                self._on_stall(idle)
+                self._request_stop("stall")
+                return
+
+    async def _blocking(self, func, *args):
+        # Probing and filesystem work go to the loop's executor, never onto the loop itself
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _wait_stop(self, delay: float) -> bool:
+        # Reconnect backoff that stop_stream() can cut short; True when stopping
+        waiter = self._stop_waiter
+        if waiter is None:
+            return self._stop_event.is_set()
+        try:
+            await asyncio.wait_for(waiter.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        return self._stop_event.is_set()
+
+    async def _run_playlist_async(
+        self, files: List[str], rtmp_url: str, loop: bool, gapless: bool, passthrough: bool
+    ) -> None:
+        self._stop_waiter = asyncio.Event()
+        self.on_started.emit()
+        exit_code = 0
+        try:
+            if self._media_cache is not None:
+                files = await self._blocking(self._filter_decodable, files)
+                if not files:
+                    exit_code = -1
+                    self.on_error.emit("Tidak ada file di playlist yang bisa di-decode.")
+                    return
+            self._prefetcher = ItemPrefetcher(self._engine.prefetch_executor) if self._prefetch else None
+            if gapless:
+                prepared = await self._blocking(self._prepare_gapless, files, loop, passthrough)
+                if prepared is not None:
+                    list_path, mode = prepared
+                    try:
+                        exit_code = await self._run_gapless_async(list_path, rtmp_url, loop, mode)
+                    finally:
+                        self._resume_offset = 0.0
+                        self._finish_gapless(list_path)
+                    return
+            modes: Dict[str, str] = {}
+            skipped = 0
+            index: Optional[int] = 0
+            while index is not None and not self._stop_event.is_set():
+                current = files[index]
+                # The prefetch thread's result is awaited off-loop; a miss is prepared inline
+                prepared = None
+                if self._prefetcher is not None:
+                    prepared = await self._blocking(self._prefetcher.take, current)
+                if prepared is None:
+                    prepared = await self._blocking(
+                        self._prepare_item, current, rtmp_url, passthrough, modes.get(current), False
+                    )
+                following = self._following(files, index, loop)
+                if not self._admit_item(prepared, modes, passthrough):
+                    skipped += 1
+                    if skipped >= len(files):
+                        exit_code = -1
+                        self.on_error.emit("Tidak ada file di playlist yang bisa diputar.")
+                        break
+                    index = self._join_appended(files, index, loop, following)
+                    continue
+                skipped = 0
+                self._current_index = index
+                self.on_file_started.emit(current)
+                self._schedule_prefetch(files, following, loop, current, rtmp_url, passthrough, modes)
+                self._prepared = prepared
+                exit_code = await self._play_item_async(current, rtmp_url, modes[current])
+                self._prepared = None
+                if self._stop_event.is_set():
+                    break
+                index = self._join_appended(files, index, loop, following)
+        except Exception as exc:
+            exit_code = -1
+            self._log(f"[runner] Engine asyncio error: {exc}\n")
+        finally:
+            self._close_prefetcher()
+            self._transport = None
+            self._stop_waiter = None
+            self._end_adaptive()
+            self._end_congestion()
+            self._current_index = -1
+            self.on_stopped.emit(exit_code)
+
+    async def _play_item_async(self, file_path: str, rtmp_url: str, mode: str) -> int:
+        tracker = ResumeTracker(self._reconnect)
+        self._item_switch = True
+        while True:
+            self._apply_adaptive()
+            self._apply_congestion()
+            self._announce_mode(file_path, mode)
+            started = time.monotonic()
+            self._attempt_progress = None
+            exit_code = await self._run_process_async(self._file_command(file_path, rtmp_url, mode, tracker.offset))
+            if await self._blocking(self._resume_after_switch, file_path, tracker):
+                continue
+            # Probing the resume keyframe blocks, so planning runs on the executor
+            delay = await self._blocking(
+                self._plan_reconnect, file_path, tracker, exit_code, time.monotonic() - started
+            )
+            if delay is None or await self._wait_stop(delay):
+                return exit_code
+
+    async def _run_gapless_async(self, list_path: str, rtmp_url: str, loop: bool, mode: str) -> int:
+        tracker = ResumeTracker(self._reconnect)
+        while True:
+            started = time.monotonic()
+            self._attempt_progress = None
+            self._resume_offset = tracker.offset
+            exit_code = await self._run_process_async(
+                self._build_concat_command(list_path, rtmp_url, loop, mode, tracker.offset)
+            )
+            delay = self._plan_gapless_reconnect(tracker, exit_code, time.monotonic() - started, loop)
+            if delay is None or await self._wait_stop(delay):
+                return exit_code
+
+    async def _run_process_async(self, cmd: List[str]) -> int:
+        cmd = cmd[:1] + ["-nostats", "-progress", "pipe:1", "-stats_period", f"{self._stats_period:g}"] + cmd[1:]
+        kwargs = group_popen_kwargs()
+        if os.name == "nt":
+            kwargs["creationflags"] |= subprocess.CREATE_NO_WINDOW  # type: ignore[attr-defined]
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        try:
+            transport, _ = await loop.subprocess_exec(
+                lambda: _ProcessProtocol(self, done),
+                *cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                **kwargs,
+            )
+        except Exception as exc:
+            self._log(f"[runner] Gagal menjalankan FFmpeg: {exc}\n")
+            return -1
+        self._transport = transport
+        self._process_done = done
+        self._mark_spawned()
+        self._attempt_stalled = False
+        watchdog = self._watchdog = StallWatchdog(self._lifecycle)
+        watch = asyncio.ensure_future(self._watch_stall(watchdog, done)) if watchdog.enabled else None
+        try:
+            if self._stop_event.is_set():
+                self._terminate_current()
+            return await done
+        finally:
+            if watch is not None:
+                watch.cancel()
+            stopping, self._stopping = self._stopping, None
+            if stopping is not None:
+                # Finishes as soon as it sees the exit; it records the stop latency
+                await asyncio.wait([stopping], timeout=1.0)
+            self._watchdog = None
+            self._process_done = None
+            self._transport = None
+            transport.close()
+
+
+class _ProcessProtocol(asyncio.SubprocessProtocol):
+    # Pipe data lands here straight from the selector: no StreamReader, no per-read future
+
+    def __init__(self, runner: AsyncFFMpegRunner, done: asyncio.Future) -> None:
+        self._runner = runner
+        self._done = done
+        self._transport: Optional[asyncio.SubprocessTransport] = None
+        self._parser = ProgressParser()
+        self._carry: Dict[int, bytes] = {1: b"", 2: b""}
+        self._open_pipes = 2
+        self._exit_code: Optional[int] = None
+
+    def connection_made(self, transport) -> None:
+        self._transport = transport
+
+    def pipe_data_received(self, fd: int, data: bytes) -> None:
+        lines, self._carry[fd] = split_lines(self._carry[fd], data)
+        if not lines:
+            return
+        if fd == 2:
+            self._runner._log_buffer.extend(lines)
+            return
+        for raw in lines:
+            sample = self._parser.feed_line(raw.decode("utf-8", errors="replace"))
+            if sample is not None:
+                self._runner._handle_progress(sample)
+
+    def pipe_connection_lost(self, fd: int, exc: Optional[Exception]) -> None:
+        if fd not in self._carry:
+            return
+        if fd == 2 and self._carry[2]:
+            self._runner._log_buffer.append(self._carry[2])
+        self._carry[fd] = b""
+        self._open_pipes -= 1
+        self._maybe_done()
+
+    def process_exited(self) -> None:
+        assert self._transport is not None
+        self._exit_code = self._transport.get_returncode()
+        self._maybe_done()
+
+    def _maybe_done(self) -> None:
+        # Report only once both pipes are drained so no trailing log line is lost
+        if self._exit_code is not None and self._open_pipes <= 0 and not self._done.done():
+            self._done.set_result(self._exit_code)
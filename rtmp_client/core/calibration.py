@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .encoding import EncodeSettings, transcode_args
+from .host_profile import HostProfile
+from .progress import ProgressParser
+
+
+# Best picture first, cheapest last
+CALIBRATION_PRESETS = ("medium", "fast", "faster", "veryfast", "superfast", "ultrafast")
+CALIBRATION_HEIGHTS = (1080, 720, 480)
+CALIBRATION_FPS = (60.0, 30.0)
+DEFAULT_SOURCE = "1920x1080@30"
+DEFAULT_TRIAL_S = 10.0
+# Startup allowance before a trial that has not finished is cut short as too slow
+_TRIAL_GRACE_S = 2.0
+
+
+def parse_source(text: str) -> Tuple[int, int, float]:
+    # "1920x1080@30" -> (1920, 1080, 30.0)
+    size, _, rate = text.partition("@")
+    width, _, height = size.lower().partition("x")
+    try:
+        return int(width), int(height), float(rate or 30)
+    except ValueError:
+        raise ValueError(f"format sumber harus WxH@fps, bukan {text!r}") from None
+
+
+@dataclass
+class CalibrationTrial:
+    preset: str
+    height: Optional[int]
+    fps: Optional[float]
+    speeds: List[float] = field(default_factory=list)  # one per concurrent encoder
+    ok: bool = False
+    error: str = ""
+
+    @property
+    def min_speed(self) -> float:
+        return min(self.speeds) if self.speeds else 0.0
+
+    def label(self) -> str:
+        parts = [self.preset]
+        if self.height:
+            parts.append(f"{self.height}p")
+        if self.fps:
+            parts.append(f"{self.fps:g}fps")
+        return "/".join(parts)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "preset": self.preset,
+            "height": self.height,
+            "fps": self.fps,
+            "speeds": [round(s, 3) for s in self.speeds],
+            "ok": self.ok,
+            "error": self.error,
+        }
+
+
+def profile_groups(
+    source: Tuple[int, int, float], heights: Sequence[int], fps_values: Sequence[float]
+) -> List[Tuple[Optional[int], Optional[float]]]:
+    # (height, fps) caps from best to cheapest. None = keep the source's own; values at or above the
+    # source are the same as None and left out
+    _, src_height, src_fps = source
+    group_heights: List[Optional[int]] = [None] + sorted({h for h in heights if h < src_height}, reverse=True)
+    group_fps: List[Optional[float]] = [None] + sorted({f for f in fps_values if f < src_fps}, reverse=True)
+    return [(h, f) for h in group_heights for f in group_fps]
+
+
+class EncodeCalibrator:
+    # Finds the best profile this host sustains: N encoders of the synthetic source run at once, and
+    # every one of them must reach (1 + headroom)x realtime. Resolution outranks frame rate, which
+    # outranks the x264 preset. Cost rises monotonically along the preset list, so each
+    # (resolution, fps) group costs one trial to rule out and a binary search to settle.
+
+    def __init__(
+        self,
+        ffmpeg_path: str,
+        *,
+        channels: int = 1,
+        headroom: float = 0.2,
+        source: str = DEFAULT_SOURCE,
+        trial_s: float = DEFAULT_TRIAL_S,
+        encode: Optional[EncodeSettings] = None,
+        presets: Sequence[str] = CALIBRATION_PRESETS,
+        heights: Sequence[int] = CALIBRATION_HEIGHTS,
+        fps_values: Sequence[float] = CALIBRATION_FPS,
+        on_trial: Optional[Callable[[CalibrationTrial], None]] = None,
+    ) -> None:
+        self.ffmpeg_path = ffmpeg_path
+        self.channels = max(1, channels)
+        self.headroom = max(0.0, headroom)
+        self.source = source
+        self.source_dims = parse_source(source)
+        self.trial_s = trial_s
+        self.encode = encode or EncodeSettings()
+        self.presets = list(presets)
+        self.groups = profile_groups(self.source_dims, heights, fps_values)
+        self.on_trial = on_trial
+        self.trials: List[CalibrationTrial] = []
+
+    @property
+    def required_speed(self) -> float:
+        return 1.0 + self.headroom
+
+    def run(self, ffmpeg_version: str = "") -> Optional[HostProfile]:
+        # None when not even the cheapest profile holds
+        for height, fps in self.groups:
+            cheapest = self._trial(self.presets[-1], height, fps)
+            if not cheapest.ok:
+                continue
+            best, lo, hi = cheapest, 0, len(self.presets) - 1
+            while lo < hi:
+                mid = (lo + hi) // 2
+                trial = self._trial(self.presets[mid], height, fps)
+                if trial.ok:
+                    best, hi = trial, mid
+                else:
+                    lo = mid + 1
+            return HostProfile(
+                preset=best.preset,
+                height=height,
+                fps=fps,
+                channels=self.channels,
+                headroom=self.headroom,
+                speed=round(best.min_speed, 3),
+                video_bitrate_kbps=self.encode.video_bitrate_kbps,
+                source=self.source,
+                cpu_count=os.cpu_count() or 0,
+                ffmpeg_version=ffmpeg_version,
+                calibrated_at=time.time(),
+                results=[t.to_dict() for t in self.trials],
+            )
+        return None
+
+    def trial_command(self, encode: EncodeSettings) -> List[str]:
+        width, height, rate = self.source_dims
+        duration = f"{self.trial_s:g}"
+        return [
+            self.ffmpeg_path,
+            "-hide_banner",
+            "-loglevel", "error",
+            "-nostats",
+            "-progress", "pipe:1",
+            "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={rate:g}:duration={duration}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        ] + transcode_args(encode) + ["-f", "null", "-"]
+
+    def _trial(self, preset: str, height: Optional[int], fps: Optional[float]) -> CalibrationTrial:
+        trial = CalibrationTrial(preset, height, fps)
+        encode = EncodeSettings(
+            video_bitrate_kbps=self.encode.video_bitrate_kbps,
+            audio_bitrate_kbps=self.encode.audio_bitrate_kbps,
+            audio_sample_rate=self.encode.audio_sample_rate,
+            preset=preset,
+            height=height,
+            fps=fps,
+        )
+        cmd = self.trial_command(encode)
+        creationflags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0  # type: ignore[attr-defined]
+        started = time.monotonic()
+        procs: List[subprocess.Popen] = []
+        try:
+            for _ in range(self.channels):
+                procs.append(
+                    subprocess.Popen(
+                        cmd,
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        creationflags=creationflags,
+                    )
+                )
+            # Past this point the required speed cannot be reached any more; the rest is not awaited
+            deadline = started + self.trial_s / self.required_speed + _TRIAL_GRACE_S
+            for proc in procs:
+                speed, error = self._collect(proc, started, deadline)
+                trial.speeds.append(speed)
+                if error and not trial.error:
+                    trial.error = error
+        except OSError as exc:
+            trial.error = str(exc)
+        finally:
+            for proc in procs:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+        trial.ok = not trial.error and len(trial.speeds) == self.channels and trial.min_speed >= self.required_speed
+        self.trials.append(trial)
+        if self.on_trial is not None:
+            self.on_trial(trial)
+        return trial
+
+    def _collect(self, proc: subprocess.Popen, started: float, deadline: float) -> Tuple[float, str]:
+        # Speed over the whole run, startup included: out_time reached / wall clock until exit
+        cut_short = False
+        try:
+            out, err = proc.communicate(timeout=max(0.1, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            out, err = proc.communicate()
+            cut_short = True
+        elapsed = max(1e-6, time.monotonic() - started)
+        parser = ProgressParser()
+        out_time = 0.0
+        for line in out.decode("utf-8", "replace").splitlines():
+            sample = parser.feed_line(line)
+            if sample is not None:
+                out_time = max(out_time, sample.out_time)
+        if proc.returncode != 0 and not cut_short:
+            lines = err.decode("utf-8", "replace").strip().splitlines()
+            return 0.0, lines[-1] if lines else f"exit {proc.returncode}"
+        return out_time / elapsed, ""
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import subprocess
+import threading
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .settings import default_config_dir
+
+
+CACHE_VERSION = 1
+PROBE_TIMEOUT_S = 10.0
+
+# Encoder name suffixes of the hardware APIs FFmpeg wraps
+HARDWARE_SUFFIXES = ("_nvenc", "_qsv", "_vaapi", "_videotoolbox", "_amf", "_v4l2m2m", "_mf")
+
+
+def default_capabilities_path() -> Path:
+    return default_config_dir() / "ffmpeg-capabilities.json"
+
+
+def _binary_identity(path: str) -> Optional[Tuple[str, int, int]]:
+    # (real path, size, mtime) - an upgraded or replaced binary gets a new fingerprint
+    try:
+        real = os.path.realpath(path)
+        st = os.stat(real)
+    except OSError:
+        return None
+    return real, st.st_size, st.st_mtime_ns
+
+
+def url_protocol(url: str) -> str:
+    scheme, sep, _ = url.partition("://")
+    return scheme.lower() if sep else "file"
+
+
+@dataclass
+class FFmpegCapabilities:
+    path: str
+    size: int
+    mtime_ns: int
+    version: str = ""
+    configuration: str = ""
+    encoders: List[str] = field(default_factory=list)
+    muxers: List[str] = field(default_factory=list)
+    input_protocols: List[str] = field(default_factory=list)
+    output_protocols: List[str] = field(default_factory=list)
+
+    @property
+    def hardware_encoders(self) -> List[str]:
+        return [e for e in self.encoders if e.endswith(HARDWARE_SUFFIXES)]
+
+    def has_encoder(self, name: str) -> bool:
+        return name in self.encoders
+
+    def has_muxer(self, name: str) -> bool:
+        return name in self.muxers
+
+    def can_output(self, url: str) -> bool:
+        return url_protocol(url) in self.output_protocols
+
+    def unsupported_outputs(self, urls: List[str]) -> List[str]:
+        return [u for u in urls if not self.can_output(u)]
+
+    def describe(self) -> str:
+        hw = ", ".join(self.hardware_encoders) or "-"
+        return f"FFmpeg {self.version or '?'} | hardware encoder: {hw}"
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FFmpegCapabilities":
+        return cls(**{k: v for k, v in data.items() if k in _CAPABILITY_FIELDS})
+
+
+_CAPABILITY_FIELDS = {f.name for f in fields(FFmpegCapabilities)}
+
+
+def parse_version(text: str) -> Tuple[str, str]:
+    # "ffmpeg version 6.1.1-3ubuntu5 Copyright ..." and the "configuration:" line
+    version = ""
+    configuration = ""
+    for line in text.splitlines():
+        m = re.match(r"\s*ffmpeg version (\S+)", line)
+        if m and not version:
+            version = m.group(1)
+        elif line.strip().startswith("configuration:"):
+            configuration = line.split(":", 1)[1].strip()
+    return version, configuration
+
+
+def _is_separator(stripped: str) -> bool:
+    # The dash line between legend and rows: "--", " ---" or "------" depending on the FFmpeg release
+    return bool(stripped) and set(stripped) == {"-"}
+
+
+def parse_encoders(text: str) -> List[str]:
+    # Rows after the "------" separator: " V....D libx264  description"
+    names: List[str] = []
+    started = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not started:
+            started = _is_separator(stripped)
+            continue
+        parts = stripped.split()
+        if len(parts) >= 2 and len(parts[0]) == 6:
+            names.append(parts[1])
+    return names
+
+
+def parse_muxers(text: str) -> List[str]:
+    # Rows after the dash separator: "  E flv  FLV (Flash Video)"; some rows list aliases "a,b"
+    names: List[str] = []
+    started = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not started:
+            started = _is_separator(stripped)
+            continue
+        parts = stripped.split()
+        if len(parts) >= 2 and "E" in parts[0] and set(parts[0]) <= set("DEd."):
+            names.extend(n for n in parts[1].split(",") if n)
+    return names
+
+
+def parse_protocols(text: str) -> Tuple[List[str], List[str]]:
+    inputs: List[str] = []
+    outputs: List[str] = []
+    current: Optional[List[str]] = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped == "Input:":
+            current = inputs
+        elif stripped == "Output:":
+            current = outputs
+        elif current is not None and stripped and " " not in stripped:
+            current.append(stripped)
+    return inputs, outputs
+
+
+def _query(ffmpeg_path: str, flag: str, timeout: float) -> str:
+    proc = subprocess.run(
+        [ffmpeg_path, "-hide_banner", flag] if flag != "-version" else [ffmpeg_path, flag],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        timeout=timeout,
+    )
+    return proc.stdout or ""
+
+
+def probe_capabilities(ffmpeg_path: str, timeout: float = PROBE_TIMEOUT_S) -> Optional[FFmpegCapabilities]:
+    identity = _binary_identity(ffmpeg_path)
+    if identity is None:
+        return None
+    try:
+        version, configuration = parse_version(_query(ffmpeg_path, "-version", timeout))
+        encoders = parse_encoders(_query(ffmpeg_path, "-encoders", timeout))
+        muxers = parse_muxers(_query(ffmpeg_path, "-muxers", timeout))
+        inputs, outputs = parse_protocols(_query(ffmpeg_path, "-protocols", timeout))
+    except Exception:
+        return None
+    if not version and not encoders:
+        # Not an FFmpeg we can read; do not pin an empty result to this fingerprint
+        return None
+    real, size, mtime_ns = identity
+    return FFmpegCapabilities(
+        path=real,
+        size=size,
+        mtime_ns=mtime_ns,
+        version=version,
+        configuration=configuration,
+        encoders=encoders,
+        muxers=muxers,
+        input_protocols=inputs,
+        output_protocols=outputs,
+    )
+
+
+class CapabilityCache:
+    # Probe results per FFmpeg binary, persisted in the config dir and shared by every runner.
+    # A fresh entry (same real path, size and mtime) skips the four FFmpeg invocations entirely.
+
+    def __init__(self, path: Optional[Path] = None, timeout: float = PROBE_TIMEOUT_S) -> None:
+        self.path = Path(path) if path is not None else default_capabilities_path()
+        self.timeout = timeout
+        # Guards the maps only; probes run outside it so a slow binary does not hold up the others
+        self._lock = threading.Lock()
+        self._entries: Dict[str, FFmpegCapabilities] = {}
+        # Binaries whose probe failed, by (size, mtime): not probed again until they change
+        self._failed: Dict[str, Tuple[int, int]] = {}
+        # One probe per binary at a time; concurrent callers wait for its result
+        self._probing: Dict[str, threading.Event] = {}
+        self._loaded = False
+
+    def get(self, ffmpeg_path: Optional[str]) -> Optional[FFmpegCapabilities]:
+        if not ffmpeg_path:
+            return None
+        identity = _binary_identity(ffmpeg_path)
+        if identity is None:
+            return None
+        real, size, mtime_ns = identity
+        while True:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                entry = self._entries.get(real)
+                if entry is not None and (entry.size, entry.mtime_ns) == (size, mtime_ns):
+                    return entry
+                if self._failed.get(real) == (size, mtime_ns):
+                    return None
+                pending = self._probing.get(real)
+                if pending is None:
+                    done = threading.Event()
+                    self._probing[real] = done
+                    break
+            pending.wait()
+        caps: Optional[FFmpegCapabilities] = None
+        try:
+            caps = probe_capabilities(ffmpeg_path, self.timeout)
+        finally:
+            with self._lock:
+                del self._probing[real]
+                if caps is None:
+                    self._failed[real] = (size, mtime_ns)
+                else:
+                    self._failed.pop(real, None)
+                    self._entries[real] = caps
+                    self._save()
+            done.set()
+        return caps
+
+    def cached(self, ffmpeg_path: str) -> Optional[FFmpegCapabilities]:
+        # Fresh entry without probing
+        identity = _binary_identity(ffmpeg_path)
+        if identity is None:
+            return None
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(identity[0])
+        if entry is None or (entry.size, entry.mtime_ns) != identity[1:]:
+            return None
+        return entry
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._failed.clear()
+            self._loaded = True
+            self._save()
+
+    def _load(self) -> None:
+        self._loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return
+        binaries = data.get("binaries")
+        if not isinstance(binaries, dict):
+            return
+        for key, entry in binaries.items():
+            try:
+                self._entries[key] = FFmpegCapabilities.from_dict(entry)
+            except Exception:
+                continue
+
+    def _save(self) -> None:
+        payload = {"version": CACHE_VERSION, "binaries": {k: v.to_dict() for k, v in self._entries.items()}}
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except Exception:
+            pass
+
+
+_default_cache: Optional[CapabilityCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def default_capability_cache() -> CapabilityCache:
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = CapabilityCache()
+        return _default_cache
@@ -0,0 +1,486 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional
+
+from .async_runner import AsyncFFMpegRunner
+from .encode_cache import EncodeCache
+from .encoding import EncodeSettings
+from .events import Event
+from .ffmpeg_runner import FFMpegRunner
+from .lifecycle import LifecyclePolicy
+from .media_cache import MediaCache
+from .metrics import MetricsRegistry
+from .progress import DEFAULT_STATS_PERIOD, ProgressSample
+from .reconnect import ReconnectEvent, ReconnectPolicy
+from .settings import AppSettings, ensure_config_dir, load_playlist
+from .standby import StandbyPolicy
+
+
+CHANNELS_VERSION = 1
+
+ENGINE_THREAD = "thread"
+ENGINE_ASYNCIO = "asyncio"
+
+STATE_IDLE = "idle"
+STATE_QUEUED = "queued"
+STATE_STARTING = "starting"
+STATE_RUNNING = "running"
+STATE_STOPPING = "stopping"
+STATE_STOPPED = "stopped"
+STATE_FAILED = "failed"
+
+_ACTIVE_STATES = (STATE_STARTING, STATE_RUNNING, STATE_STOPPING)
+
+
+def default_channels_path(settings: AppSettings) -> Path:
+    # Lives next to the profiles file
+    return settings.profiles_file.with_name("channels.json")
+
+
+@dataclass
+class ChannelConfig:
+    name: str
+    url: str
+    playlist: List[str] = field(default_factory=list)
+    playlist_file: Optional[str] = None  # playlist .json saved by the GUI, appended to `playlist`
+    destinations: List[str] = field(default_factory=list)  # extra simulcast URLs
+    loop: bool = True
+    gapless: bool = False
+    passthrough: bool = False
+    use_cache: bool = False
+    adaptive: bool = False
+    congestion: bool = False
+    engine: str = ENGINE_THREAD
+    # Same defaults as `run` (--stats-period, --no-prefetch)
+    stats_period: float = DEFAULT_STATS_PERIOD
+    prefetch: bool = True
+    encode: Dict[str, object] = field(default_factory=dict)  # EncodeSettings overrides
+    enabled: bool = True
+
+    def files(self) -> List[str]:
+        files = list(self.playlist)
+        if self.playlist_file:
+            files.extend(load_playlist(Path(self.playlist_file)))
+        return files
+
+    def encode_settings(self, base: EncodeSettings) -> EncodeSettings:
+        known = {f.name for f in dataclasses.fields(EncodeSettings)}
+        return dataclasses.replace(base, **{k: v for k, v in self.encode.items() if k in known})
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChannelConfig":
+        known = {f.name for f in dataclasses.fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+def load_channels(path: Path) -> List[ChannelConfig]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return []
+    if not isinstance(data, dict) or data.get("version") != CHANNELS_VERSION:
+        return []
+    channels: List[ChannelConfig] = []
+    seen = set()
+    for item in data.get("channels") or []:
+        try:
+            channel = ChannelConfig.from_dict(item)
+        except TypeError:
+            continue
+        if channel.name and channel.name not in seen:
+            seen.add(channel.name)
+            channels.append(channel)
+    return channels
+
+
+def save_channels(path: Path, channels: List[ChannelConfig]) -> None:
+    ensure_config_dir()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": CHANNELS_VERSION, "channels": [dataclasses.asdict(c) for c in channels]}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+    except Exception:
+        pass
+
+
+@dataclass
+class ChannelStatus:
+    name: str
+    state: str = STATE_IDLE
+    current_file: str = ""
+    mode: str = ""
+    exit_code: Optional[int] = None
+    error: str = ""
+    started_at: Optional[float] = None
+    progress: Optional[ProgressSample] = None
+    reconnects: int = 0
+    stall_restarts: int = 0  # of the reconnects, those the watchdog started on a frozen process
+    destinations: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def uptime(self) -> float:
+        if self.started_at is None or self.state not in _ACTIVE_STATES:
+            return 0.0
+        return time.monotonic() - self.started_at
+
+
+@dataclass
+class SupervisorSummary:
+    total: int = 0
+    queued: int = 0
+    running: int = 0
+    stopped: int = 0
+    failed: int = 0
+    reconnects: int = 0
+    stall_restarts: int = 0
+    fps: float = 0.0
+    bitrate_kbps: float = 0.0
+    drop_frames: int = 0
+
+
+class _Channel:
+    def __init__(self, config: ChannelConfig) -> None:
+        self.config = config
+        self.status = ChannelStatus(name=config.name)
+        self.runner: Optional[FFMpegRunner] = None
+        self.stop_requested = False
+
+
+class ChannelSupervisor:
+    # Runs N named channels, each with its own runner. At most `max_concurrent` encoders
+    # run at once and consecutive starts are spaced by `stagger_s`, so a large channel set
+    # ramps up instead of spawning every encoder in the same instant.
+
+    def __init__(
+        self,
+        settings: Optional[AppSettings] = None,
+        *,
+        ffmpeg_path: Optional[str] = None,
+        max_concurrent: Optional[int] = None,
+        stagger_s: Optional[float] = None,
+        encode_cache: Optional[EncodeCache] = None,
+        media_cache: Optional[MediaCache] = None,
+        runner_factory: Optional[Callable[[ChannelConfig, EncodeSettings], FFMpegRunner]] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> None:
+        self._settings = settings or AppSettings()
+        self._ffmpeg_path = ffmpeg_path or self._settings.ffmpeg_path
+        self.max_concurrent = max(1, max_concurrent or self._settings.max_concurrent_channels)
+        self.stagger_s = max(0.0, self._settings.channel_start_stagger_s if stagger_s is None else stagger_s)
+        self._encode_cache = encode_cache
+        self._media_cache = media_cache
+        self._runner_factory = runner_factory or self._default_runner
+        # Every launched channel's runner is reported under its channel name
+        self._metrics = metrics
+
+        # (name, ChannelStatus) whenever a channel's state, file or destinations change
+        self.on_channel_status = Event()
+        # (name, text) for supervisor messages that are not part of a runner log
+        self.on_log = Event()
+
+        self._channels: Dict[str, _Channel] = {}
+        self._queue: Deque[str] = deque()
+        self._cond = threading.Condition()
+        self._pending: List[tuple] = []
+        self._emit_lock = threading.RLock()
+        self._last_start = 0.0
+        self._closed = False
+        self._scheduler: Optional[threading.Thread] = None
+
+    # Configuration
+    def load(self, path: Optional[Path] = None) -> List[str]:
+        return self.set_channels(load_channels(path or default_channels_path(self._settings)))
+
+    def set_channels(self, configs: List[ChannelConfig]) -> List[str]:
+        # Replaces idle definitions; channels that are running keep their current config
+        with self._cond:
+            for config in configs:
+                existing = self._channels.get(config.name)
+                if existing is not None and existing.status.state in _ACTIVE_STATES + (STATE_QUEUED,):
+                    continue
+                self._channels[config.name] = _Channel(config)
+            return list(self._channels)
+
+    def names(self) -> List[str]:
+        with self._cond:
+            return list(self._channels)
+
+    def config(self, name: str) -> Optional[ChannelConfig]:
+        with self._cond:
+            channel = self._channels.get(name)
+            return channel.config if channel else None
+
+    def runner(self, name: str) -> Optional[FFMpegRunner]:
+        with self._cond:
+            channel = self._channels.get(name)
+            return channel.runner if channel else None
+
+    # Status
+    def status(self, name: str) -> Optional[ChannelStatus]:
+        with self._cond:
+            channel = self._channels.get(name)
+            return dataclasses.replace(channel.status) if channel else None
+
+    def statuses(self) -> List[ChannelStatus]:
+        with self._cond:
+            return [dataclasses.replace(c.status) for c in self._channels.values()]
+
+    def summary(self) -> SupervisorSummary:
+        summary = SupervisorSummary()
+        for status in self.statuses():
+            summary.total += 1
+            if status.state == STATE_QUEUED:
+                summary.queued += 1
+            elif status.state in _ACTIVE_STATES:
+                summary.running += 1
+            elif status.state == STATE_FAILED:
+                summary.failed += 1
+            elif status.state == STATE_STOPPED:
+                summary.stopped += 1
+            summary.reconnects += status.reconnects
+            summary.stall_restarts += status.stall_restarts
+            sample = status.progress
+            if sample is not None and status.state == STATE_RUNNING:
+                summary.fps += sample.fps
+                summary.bitrate_kbps += sample.bitrate_kbps or 0.0
+                summary.drop_frames += sample.drop_frames
+        return summary
+
+    @property
+    def is_active(self) -> bool:
+        with self._cond:
+            return bool(self._queue) or any(c.status.state in _ACTIVE_STATES for c in self._channels.values())
+
+    # Control
+    def start(self, names: Optional[List[str]] = None) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            targets = names if names is not None else [n for n, c in self._channels.items() if c.config.enabled]
+            for name in targets:
+                channel = self._channels.get(name)
+                if channel is None or name in self._queue or channel.status.state in _ACTIVE_STATES:
+                    continue
+                channel.stop_requested = False
+                self._queue.append(name)
+                self._set_state_locked(channel, STATE_QUEUED)
+            self._ensure_scheduler_locked()
+            self._cond.notify_all()
+        self._flush_events()
+
+    def stop(self, name: str) -> None:
+        with self._cond:
+            channel = self._channels.get(name)
+            if channel is None:
+                return
+            channel.stop_requested = True
+            runner = None
+            if name in self._queue:
+                self._queue.remove(name)
+                self._set_state_locked(channel, STATE_STOPPED)
+            elif channel.status.state in _ACTIVE_STATES:
+                runner = channel.runner
+                self._set_state_locked(channel, STATE_STOPPING)
+        self._flush_events()
+        if runner is not None:
+            runner.stop_stream()
+
+    def stop_all(self) -> None:
+        for name in self.names():
+            self.stop(name)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while bool(self._queue) or any(c.status.state in _ACTIVE_STATES for c in self._channels.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        self.stop_all()
+        self.wait(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._scheduler is not None:
+            self._scheduler.join(timeout=2)
+
+    # Internal
+    def _default_runner(self, config: ChannelConfig, encode: EncodeSettings) -> FFMpegRunner:
+        # Built like `run` builds its runner. No preview: like every headless run, channels never add one.
+        cls = AsyncFFMpegRunner if config.engine == ENGINE_ASYNCIO else FFMpegRunner
+        return cls(
+            ffmpeg_path=self._ffmpeg_path,
+            encode=encode,
+            encode_cache=self._encode_cache if config.use_cache else None,
+            media_cache=self._media_cache,
+            stats_period=config.stats_period,
+            log_max_lines=self._settings.log_max_lines,
+            reconnect=ReconnectPolicy.from_app_settings(self._settings),
+            lifecycle=LifecyclePolicy.from_app_settings(self._settings),
+            standby=StandbyPolicy.from_app_settings(self._settings),
+            prefetch=config.prefetch,
+            bitrate_ladder=self._settings.bitrate_ladder_kbps or None,
+        )
+
+    def _ensure_scheduler_locked(self) -> None:
+        if self._scheduler is None or not self._scheduler.is_alive():
+            self._scheduler = threading.Thread(target=self._schedule, name="channel-supervisor", daemon=True)
+            self._scheduler.start()
+
+    def _running_locked(self) -> int:
+        return sum(1 for c in self._channels.values() if c.status.state in _ACTIVE_STATES)
+
+    def _schedule(self) -> None:
+        while True:
+            with self._cond:
+                channel = None
+                while channel is None:
+                    if self._closed:
+                        return
+                    if not self._queue:
+                        self._cond.wait(1.0)
+                        continue
+                    if self._running_locked() >= self.max_concurrent:
+                        self._cond.wait()
+                        continue
+                    delay = self._last_start + self.stagger_s - time.monotonic()
+                    if delay > 0:
+                        self._cond.wait(delay)
+                        continue
+                    channel = self._channels[self._queue.popleft()]
+                    self._last_start = time.monotonic()
+                    self._set_state_locked(channel, STATE_STARTING)
+            self._flush_events()
+            # start_playlist may emit synchronously; never hold the lock across it
+            self._launch(channel)
+
+    def _launch(self, channel: _Channel) -> None:
+        config = channel.config
+        base = EncodeSettings.from_app_settings(self._settings)
+        try:
+            runner = self._runner_factory(config, config.encode_settings(base))
+        except Exception as exc:
+            self._finish(channel, -1, f"Gagal membuat runner: {exc}")
+            return
+        errors: List[str] = []
+        name = config.name
+        runner.on_started.connect(lambda: self._on_started(channel))
+        runner.on_stopped.connect(lambda code: self._finish(channel, code, errors[-1] if errors else ""))
+        runner.on_error.connect(errors.append)
+        runner.on_error.connect(lambda message: self.on_log.emit(name, f"[{name}] {message}"))
+        runner.on_file_started.connect(lambda path: self._update(channel, current_file=path))
+        runner.on_file_mode.connect(lambda path, mode: self._update(channel, mode=mode))
+        runner.on_destination_status.connect(lambda url, status: self._destination(channel, url, status))
+        runner.on_progress.connect(lambda sample: self._progress(channel, sample))
+        runner.on_reconnect.connect(lambda event: self._reconnected(channel, event))
+        if self._metrics is not None:
+            self._metrics.track(name, runner)
+        with self._cond:
+            channel.runner = runner
+        runner.start_playlist(
+            video_files=config.files(),
+            rtmp_url=config.url,
+            destinations=config.destinations,
+            loop=config.loop,
+            gapless=config.gapless,
+            passthrough=config.passthrough,
+            use_cache=config.use_cache,
+            adaptive=config.adaptive,
+            congestion=config.congestion,
+        )
+        if not runner.is_running:
+            with self._cond:
+                failed_to_start = channel.status.state == STATE_STARTING
+            if failed_to_start:
+                self._finish(channel, -1, errors[-1] if errors else "Gagal memulai channel.")
+
+    def _on_started(self, channel: _Channel) -> None:
+        with self._cond:
+            if channel.status.state == STATE_STARTING:
+                channel.status.started_at = time.monotonic()
+                channel.status.exit_code = None
+                channel.status.error = ""
+                channel.status.reconnects = 0
+                channel.status.stall_restarts = 0
+                self._set_state_locked(channel, STATE_RUNNING)
+        self._flush_events()
+
+    def _finish(self, channel: _Channel, exit_code: int, error: str) -> None:
+        with self._cond:
+            channel.status.exit_code = exit_code
+            if channel.stop_requested or (exit_code == 0 and not error):
+                state = STATE_STOPPED
+            else:
+                state = STATE_FAILED
+                channel.status.error = error or f"FFmpeg keluar dengan kode {exit_code}"
+            channel.status.progress = None
+            self._set_state_locked(channel, state)
+            self._cond.notify_all()
+        self._flush_events()
+
+    def _update(self, channel: _Channel, **changes) -> None:
+        with self._cond:
+            changed = False
+            for key, value in changes.items():
+                if getattr(channel.status, key) != value:
+                    setattr(channel.status, key, value)
+                    changed = True
+            if changed:
+                self._notify_locked(channel)
+        self._flush_events()
+
+    def _destination(self, channel: _Channel, url: str, status: str) -> None:
+        with self._cond:
+            if channel.status.destinations.get(url) == status:
+                return
+            channel.status.destinations[url] = status
+            self._notify_locked(channel)
+        self._flush_events()
+
+    def _reconnected(self, channel: _Channel, event: ReconnectEvent) -> None:
+        with self._cond:
+            channel.status.reconnects += 1
+            if event.stalled:
+                channel.status.stall_restarts += 1
+            self._notify_locked(channel)
+        self._flush_events()
+        self.on_log.emit(
+            channel.config.name,
+            f"[{channel.config.name}] {'restart (output macet)' if event.stalled else 'reconnect'} "
+            f"#{event.total} dalam {event.delay_s:.1f} detik (lanjut dari {event.resume_at:.1f}s)",
+        )
+
+    def _progress(self, channel: _Channel, sample: ProgressSample) -> None:
+        # Progress is polled through status()/summary(); no event per sample
+        with self._cond:
+            channel.status.progress = sample
+
+    def _set_state_locked(self, channel: _Channel, state: str) -> None:
+        if channel.status.state != state:
+            channel.status.state = state
+            self._notify_locked(channel)
+
+    def _notify_locked(self, channel: _Channel) -> None:
+        status = dataclasses.replace(channel.status, destinations=dict(channel.status.destinations))
+        self._pending.append((channel.config.name, status))
+
+    def _flush_events(self) -> None:
+        # Emitted in order, outside the state lock, so listeners may call back into the supervisor
+        with self._emit_lock:
+            with self._cond:
+                pending, self._pending = self._pending, []
+            for name, status in pending:
+                self.on_channel_status.emit(name, status)
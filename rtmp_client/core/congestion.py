@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional, Sequence, Set
+
+from .encoding import EncodeSettings
+from .progress import ProgressSample
+
+
+# Lower rungs as fractions of the session's target video bitrate
+DEFAULT_LADDER_FRACTIONS = (0.8, 0.64, 0.5, 0.4, 0.3)
+MIN_VIDEO_KBPS = 300
+
+
+def bitrate_ladder(
+    target_kbps: int, fractions: Sequence[float] = DEFAULT_LADDER_FRACTIONS, floor_kbps: int = MIN_VIDEO_KBPS
+) -> List[int]:
+    # Highest first, always starting at the target itself; lower rungs are rounded to 50k
+    steps = [target_kbps]
+    for fraction in fractions:
+        kbps = max(floor_kbps, int(round(target_kbps * fraction / 50.0)) * 50)
+        if kbps < steps[-1]:
+            steps.append(kbps)
+    return steps
+
+
+class SendBacklogProbe:
+    # Bytes a process has written to its TCP connections that the peer has not acknowledged yet
+    # (tx_queue in /proc/<pid>/net/tcp). This grows as soon as the uplink cannot keep up, well
+    # before FFmpeg's speed drops below realtime. Linux only; read() returns None elsewhere.
+
+    def __init__(self, pid: int) -> None:
+        self.pid = pid
+        self._inodes: Set[str] = set()
+        self.available = os.path.isdir(f"/proc/{pid}/net")
+
+    def read(self) -> Optional[int]:
+        if not self.available:
+            return None
+        if not self._inodes:
+            self._inodes = self._socket_inodes()
+            if not self._inodes:
+                return None
+        total = 0
+        found = False
+        for table in ("tcp", "tcp6"):
+            try:
+                with open(f"/proc/{self.pid}/net/{table}", "r", encoding="ascii", errors="replace") as f:
+                    next(f, None)
+                    for line in f:
+                        fields = line.split()
+                        if len(fields) > 9 and fields[9] in self._inodes:
+                            found = True
+                            total += int(fields[4].partition(":")[0], 16)
+            except (OSError, ValueError):
+                return None
+        if not found:
+            # Connection replaced or not open yet; look the sockets up again next time
+            self._inodes = set()
+            return None
+        return total
+
+    def _socket_inodes(self) -> Set[str]:
+        inodes: Set[str] = set()
+        fd_dir = f"/proc/{self.pid}/fd"
+        try:
+            names = os.listdir(fd_dir)
+        except OSError:
+            return inodes
+        for name in names:
+            try:
+                target = os.readlink(os.path.join(fd_dir, name))
+            except OSError:
+                continue
+            if target.startswith("socket:["):
+                inodes.add(target[len("socket:["):-1])
+        return inodes
+
+
+@dataclass
+class CongestionSignal:
+    speed: Optional[float]
+    achieved_kbps: Optional[float]  # output bytes per wall-clock second since the previous sample
+    target_kbps: float  # video + audio
+    backlog_bytes: Optional[int]  # None when the OS does not expose it
+
+    @property
+    def backlog_s(self) -> Optional[float]:
+        # Unsent data expressed as seconds of stream at the current target
+        if self.backlog_bytes is None or self.target_kbps <= 0:
+            return None
+        return self.backlog_bytes * 8 / (self.target_kbps * 1000)
+
+
+@dataclass
+class CongestionVerdict:
+    direction: int  # -1 = lower bitrate, +1 = probe higher
+    reason: str
+    urgent: bool = False  # worth restarting the encoder mid-item instead of waiting for the next item
+
+
+class CongestionPolicy:
+    # Judges the recent signals. Plug in a different rule by subclassing (or any object with an
+    # evaluate() of the same shape) and passing it to the runner as congestion_policy.
+
+    def evaluate(self, signals: Sequence[CongestionSignal]) -> Optional[CongestionVerdict]:
+        raise NotImplementedError
+
+
+class ThresholdCongestionPolicy(CongestionPolicy):
+    # Congested: the send backlog is high and still growing, or (without backlog data) output runs
+    # below realtime while the bytes leaving fall short of the target. Speed below realtime with an
+    # empty backlog is the encoder, not the network, and is left to the adaptive preset ladder.
+
+    def __init__(
+        self,
+        *,
+        down_window: int = 5,
+        up_window: int = 30,
+        down_speed: float = 0.97,
+        up_speed: float = 0.99,
+        shortfall: float = 0.85,
+        backlog_high_s: float = 1.0,
+        backlog_low_s: float = 0.25,
+        urgent_backlog_s: float = 4.0,
+        urgent_speed: float = 0.85,
+    ) -> None:
+        self.down_window = max(2, down_window)
+        self.up_window = max(2, up_window)
+        self.down_speed = down_speed
+        self.up_speed = up_speed
+        self.shortfall = shortfall
+        self.backlog_high_s = backlog_high_s
+        self.backlog_low_s = backlog_low_s
+        self.urgent_backlog_s = urgent_backlog_s
+        self.urgent_speed = urgent_speed
+
+    @property
+    def history(self) -> int:
+        return max(self.down_window, self.up_window)
+
+    def evaluate(self, signals: Sequence[CongestionSignal]) -> Optional[CongestionVerdict]:
+        if len(signals) < self.down_window:
+            return None
+        recent = list(signals)[-self.down_window:]
+        speeds = [s.speed for s in recent if s.speed is not None]
+        speed = sum(speeds) / len(speeds) if speeds else None
+        backlogs = [s.backlog_s for s in recent if s.backlog_s is not None]
+        if len(backlogs) == len(recent):
+            first, last = backlogs[0], backlogs[-1]
+            # A saturated socket buffer stays flat, so "high the whole window" counts as well as "rising"
+            if last >= self.backlog_high_s and (last > first or min(backlogs) >= self.backlog_high_s):
+                trend = "naik" if last > first else "tetap tinggi"
+                return CongestionVerdict(
+                    -1, f"antrian kirim {last:.1f}s ({trend})", urgent=last >= self.urgent_backlog_s
+                )
+            if last < self.backlog_low_s and speed is not None and speed < self.down_speed:
+                return None  # encoder-bound, the uplink is idle
+        else:
+            achieved = [s.achieved_kbps for s in recent if s.achieved_kbps is not None]
+            if speed is not None and speed < self.down_speed and achieved:
+                ratio = sum(achieved) / len(achieved) / recent[-1].target_kbps
+                if ratio < self.shortfall:
+                    return CongestionVerdict(
+                        -1,
+                        f"speed {speed:.2f}x, terkirim {ratio:.0%} dari target",
+                        urgent=speed < self.urgent_speed,
+                    )
+        if len(signals) < self.up_window:
+            return None
+        calm = list(signals)[-self.up_window:]
+        if all(s.speed is not None and s.speed >= self.up_speed for s in calm) and all(
+            s.backlog_s is None or s.backlog_s <= self.backlog_low_s for s in calm
+        ):
+            return CongestionVerdict(+1, f"lancar {len(calm)} sampel")
+        return None
+
+
+@dataclass
+class BitrateDecision:
+    direction: int
+    from_kbps: int
+    to_kbps: int
+    reason: str
+    urgent: bool = False
+
+
+class BitrateController:
+    # Walks a ladder of video bitrates for one session. Like the adaptive preset controller, a
+    # decision first becomes pending and the runner applies it at the next item; an urgent one
+    # (or a step down left pending for max_defer_s while congestion persists) restarts the
+    # encoder where the output has got to. Steps up wait out an up cooldown that doubles after
+    # every probe that had to be taken back, so a capped link is not probed over and over.
+
+    def __init__(
+        self,
+        encode: EncodeSettings,
+        ladder: Optional[Sequence[int]] = None,
+        policy: Optional[CongestionPolicy] = None,
+        *,
+        warmup_s: float = 5.0,
+        down_cooldown_s: float = 10.0,
+        up_cooldown_s: float = 60.0,
+        max_up_cooldown_s: float = 600.0,
+        max_defer_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        # Never above the session's own target: probing up only wins back what congestion took
+        target = encode.video_bitrate_kbps
+        steps = {int(k) for k in (ladder or bitrate_ladder(target)) if 0 < int(k) <= target}
+        self.ladder: List[int] = sorted(steps | {target}, reverse=True)
+        self.policy = policy or ThresholdCongestionPolicy()
+        self.warmup_s = warmup_s
+        self.down_cooldown_s = down_cooldown_s
+        self.base_up_cooldown_s = up_cooldown_s
+        self.up_cooldown_s = up_cooldown_s
+        self.max_up_cooldown_s = max_up_cooldown_s
+        self.max_defer_s = max_defer_s
+        self._clock = clock
+        self.base = encode  # settings the session started with; restored when it ends
+        self._signals: Deque[CongestionSignal] = deque(maxlen=max(2, getattr(self.policy, "history", 60)))
+        self._previous: Optional[tuple] = None  # (wall clock, total_size) of the last sample
+        self._last_change = -max(down_cooldown_s, up_cooldown_s)
+        self._last_up = -max_up_cooldown_s
+        self._pending_since = 0.0
+        self.pending: Optional[BitrateDecision] = None
+        self.decisions: List[BitrateDecision] = []
+        self.index = 0
+
+    @property
+    def kbps(self) -> int:
+        return self.ladder[self.index]
+
+    def target_kbps(self) -> float:
+        return self.kbps + self.base.audio_bitrate_kbps
+
+    def observe(self, sample: ProgressSample, backlog_bytes: Optional[int] = None) -> Optional[BitrateDecision]:
+        # Feeds one progress sample of a transcoded item; returns a decision when one becomes
+        # pending, or when a pending step down turns urgent
+        now = self._clock()
+        achieved = None
+        if self._previous is not None:
+            then, size = self._previous
+            if sample.total_size >= size and now > then:
+                achieved = (sample.total_size - size) * 8 / (now - then) / 1000
+        self._previous = (now, sample.total_size)
+        if sample.out_time < self.warmup_s:
+            return None
+        self._signals.append(CongestionSignal(sample.speed, achieved, self.target_kbps(), backlog_bytes))
+        verdict = self.policy.evaluate(self._signals)
+        if self.pending is not None:
+            return self._escalate(verdict, now)
+        if verdict is None:
+            return None
+        if verdict.direction < 0 and self.index < len(self.ladder) - 1:
+            if now - self._last_change < self.down_cooldown_s:
+                return None
+            return self._propose(+1, verdict, now)
+        if verdict.direction > 0 and self.index > 0 and now - self._last_change >= self.up_cooldown_s:
+            return self._propose(-1, verdict, now)
+        return None
+
+    def apply_pending(self) -> Optional[BitrateDecision]:
+        decision = self.pending
+        if decision is None:
+            return None
+        now = self._clock()
+        self.pending = None
+        self.index = self.ladder.index(decision.to_kbps)
+        if decision.direction > 0:
+            self._last_up = now
+        elif now - self._last_up < self.up_cooldown_s * 2:
+            # The last probe up did not hold
+            self.up_cooldown_s = min(self.max_up_cooldown_s, self.up_cooldown_s * 2)
+        else:
+            self.up_cooldown_s = self.base_up_cooldown_s
+        self._last_change = now
+        self.reset_window()
+        self.decisions.append(decision)
+        return decision
+
+    def reset_window(self) -> None:
+        # A new encoder process (and connection) starts with a fresh measurement window
+        self._signals.clear()
+        self._previous = None
+
+    def settings(self, encode: EncodeSettings) -> EncodeSettings:
+        # Only the video bitrate belongs to this controller; VBV follows it in transcode_args
+        if encode.video_bitrate_kbps == self.kbps:
+            return encode
+        return dataclasses.replace(encode, video_bitrate_kbps=self.kbps)
+
+    def _escalate(self, verdict: Optional[CongestionVerdict], now: float) -> Optional[BitrateDecision]:
+        decision = self.pending
+        if decision is None or verdict is None:
+            return None
+        if decision.direction > 0:
+            if verdict.direction < 0:
+                # Congestion came back before the probe was applied
+                self.pending = None
+                return self._propose(+1, verdict, now) if self.index < len(self.ladder) - 1 else None
+            return None
+        if decision.urgent or verdict.direction > 0:
+            return None
+        if verdict.urgent or now - self._pending_since >= self.max_defer_s:
+            decision.urgent = True
+            decision.reason = verdict.reason
+            return decision
+        return None
+
+    def _propose(self, delta: int, verdict: CongestionVerdict, now: float) -> BitrateDecision:
+        self.pending = BitrateDecision(
+            -delta, self.kbps, self.ladder[self.index + delta], verdict.reason, urgent=verdict.urgent and delta > 0
+        )
+        self._pending_since = now
+        return self.pending
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Set
+
+from .encoding import EncodeSettings, transcode_args
+from .settings import AppSettings, default_config_dir
+
+
+CACHE_SUFFIX = ".flv"
+PARTIAL_SUFFIX = ".partial.flv"
+
+
+def default_cache_dir() -> Path:
+    return default_config_dir() / "encode-cache"
+
+
+class EncodeCache:
+    # Disk cache of FLV-ready encoded playlist items. Entries are keyed by the
+    # source identity plus the encode parameters; file mtime doubles as the LRU clock.
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = 20 * 1024 * 1024 * 1024) -> None:
+        self.root = Path(root) if root is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._in_progress: Set[str] = set()
+
+    @classmethod
+    def from_app_settings(cls, settings: AppSettings) -> "EncodeCache":
+        return cls(max_bytes=settings.encode_cache_max_mb * 1024 * 1024)
+
+    def key_for(self, file_path: str, encode: EncodeSettings) -> Optional[str]:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        identity = {
+            "path": os.path.abspath(file_path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "encode": transcode_args(encode),
+        }
+        raw = json.dumps(identity, sort_keys=True).encode("utf-8")
+        return hashlib.sha1(raw).hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.root / f"{key}{CACHE_SUFFIX}"
+
+    def lookup(self, key: str) -> Optional[Path]:
+        path = self.entry_path(key)
+        try:
+            if path.stat().st_size <= 0:
+                return None
+            # Touch on hit so eviction keeps recently streamed entries
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+
+    def begin(self, key: str) -> Optional[Path]:
+        # Reserve a partial file for writing; None if another writer already owns the key
+        with self._lock:
+            if key in self._in_progress:
+                return None
+            self._in_progress.add(key)
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            with self._lock:
+                self._in_progress.discard(key)
+            return None
+        return self.root / f"{key}{PARTIAL_SUFFIX}"
+
+    def commit(self, key: str, partial: Path) -> Optional[Path]:
+        target = self.entry_path(key)
+        try:
+            if partial.stat().st_size <= 0:
+                raise OSError("empty cache entry")
+            os.replace(partial, target)
+        except OSError:
+            self.abort(key, partial)
+            return None
+        with self._lock:
+            self._in_progress.discard(key)
+        self.evict(keep=target)
+        return target
+
+    def abort(self, key: str, partial: Path) -> None:
+        with self._lock:
+            self._in_progress.discard(key)
+        try:
+            partial.unlink()
+        except OSError:
+            pass
+
+    def is_busy(self, key: str) -> bool:
+        with self._lock:
+            return key in self._in_progress
+
+    def purge_partials(self) -> None:
+        # Leftovers from a crashed or killed writer
+        try:
+            partials = list(self.root.glob(f"*{PARTIAL_SUFFIX}"))
+        except OSError:
+            return
+        with self._lock:
+            busy = set(self._in_progress)
+        for path in partials:
+            if path.name[: -len(PARTIAL_SUFFIX)] in busy:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep: Optional[Path] = None) -> List[Path]:
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        removed: List[Path] = []
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and path == keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                # Still open for streaming on Windows; try again on the next commit
+                continue
+            total -= size
+            removed.append(path)
+        return removed
+
+    def _entries(self) -> List[tuple]:
+        result = []
+        try:
+            candidates = list(self.root.glob(f"*{CACHE_SUFFIX}"))
+        except OSError:
+            return result
+        for path in candidates:
+            if path.name.endswith(PARTIAL_SUFFIX):
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            result.append((path, st.st_size, st.st_mtime))
+        return result
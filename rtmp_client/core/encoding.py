@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import dataclasses
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .host_profile import HostProfile, load_host_profile
+from .media_probe import MediaInfo
+from .settings import AppSettings
+
+
+MODE_COPY = "copy"
+MODE_TRANSCODE = "transcode"
+MODE_CACHED = "cache"  # stream copy from a previously encoded cache entry
+
+# H.264 profiles every RTMP ingest we target accepts as-is
+FLV_H264_PROFILES = {"Baseline", "Constrained Baseline", "Main", "High"}
+FLV_AAC_SAMPLE_RATES = {44100, 48000}
+# Encoders transcode_args relies on; checked against the FFmpeg build before a session starts
+TRANSCODE_ENCODERS = ("libx264", "aac")
+
+
+@dataclass
+class EncodeSettings:
+    video_bitrate_kbps: int = 2500
+    audio_bitrate_kbps: int = 128
+    audio_sample_rate: int = 44100
+    preset: str = "veryfast"
+    # Output size caps (aspect kept, never scaled up); None = source size
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None  # None = source frame rate
+    # What this host's encoder sustains (calibrated host profile); stream copy is not limited by it
+    transcode_max_height: Optional[int] = None
+    transcode_max_fps: Optional[float] = None
+
+    # Stream-copy acceptance limits
+    max_keyframe_interval_s: float = 4.0
+    bitrate_tolerance: float = 0.2
+
+    @classmethod
+    def from_app_settings(cls, settings: AppSettings) -> "EncodeSettings":
+        encode = cls(
+            video_bitrate_kbps=settings.video_bitrate_kbps,
+            audio_bitrate_kbps=settings.audio_bitrate_kbps,
+            audio_sample_rate=settings.audio_sample_rate,
+            width=settings.target_width,
+            height=settings.target_height,
+            fps=settings.target_fps,
+        )
+        if settings.use_host_profile:
+            profile = load_host_profile(settings.profiles_file)
+            if profile is not None:
+                encode = apply_host_profile(encode, profile)
+        return encode
+
+
+def lowest_cap(a, b):
+    # The tighter of two optional limits
+    values = [v for v in (a, b) if v]
+    return min(values) if values else None
+
+
+def apply_host_profile(encode: EncodeSettings, profile: HostProfile) -> EncodeSettings:
+    # The calibrated preset replaces the default; its size and frame rate only ever lower what is encoded
+    return dataclasses.replace(
+        encode, preset=profile.preset, transcode_max_height=profile.height, transcode_max_fps=profile.fps
+    )
+
+
+def copy_compatibility(info: Optional[MediaInfo], encode: EncodeSettings) -> Tuple[bool, str]:
+    # Returns (copy_ok, reason); the reason is shown in the runner log
+    if info is None:
+        return False, "probe gagal"
+    if not info.has_video:
+        return False, "tidak ada stream video"
+    if info.video_codec != "h264":
+        return False, f"codec video {info.video_codec}"
+    if info.video_profile not in FLV_H264_PROFILES:
+        return False, f"profile H.264 {info.video_profile}"
+    if info.pix_fmt and info.pix_fmt != "yuv420p":
+        return False, f"pix_fmt {info.pix_fmt}"
+    if encode.width and info.width and info.width > encode.width:
+        return False, f"lebar {info.width} > target {encode.width}"
+    if encode.height and info.height and info.height > encode.height:
+        return False, f"resolusi {info.height}p > target {encode.height}p"
+    if encode.fps and info.fps and info.fps > encode.fps + 0.01:
+        return False, f"fps {info.fps:g} > target {encode.fps:g}"
+    if info.max_keyframe_interval is None:
+        return False, "GOP tidak diketahui"
+    if info.max_keyframe_interval > encode.max_keyframe_interval_s:
+        return False, f"GOP {info.max_keyframe_interval:.1f}s > {encode.max_keyframe_interval_s:.1f}s"
+    limit = encode.video_bitrate_kbps * 1000 * (1.0 + encode.bitrate_tolerance)
+    if not info.video_bit_rate:
+        return False, "bitrate video tidak diketahui"
+    if info.video_bit_rate > limit:
+        return False, f"bitrate video {info.video_bit_rate // 1000}k > target {encode.video_bitrate_kbps}k"
+    if info.has_audio:
+        if info.audio_codec != "aac":
+            return False, f"codec audio {info.audio_codec}"
+        if info.audio_sample_rate not in FLV_AAC_SAMPLE_RATES:
+            return False, f"sample rate audio {info.audio_sample_rate}"
+        audio_limit = encode.audio_bitrate_kbps * 1000 * (1.0 + encode.bitrate_tolerance)
+        if info.audio_bit_rate and info.audio_bit_rate > audio_limit:
+            return False, f"bitrate audio {info.audio_bit_rate // 1000}k > target {encode.audio_bitrate_kbps}k"
+    return True, f"H.264 {info.video_profile}/AAC, GOP {info.max_keyframe_interval:.1f}s"
+
+
+def copy_signature(info: MediaInfo) -> Tuple:
+    # Files streamed back-to-back with -c copy in one session must agree on these
+    return (
+        info.video_codec,
+        info.video_profile,
+        info.pix_fmt,
+        info.width,
+        info.height,
+        info.audio_codec,
+        info.audio_sample_rate,
+        info.audio_channels,
+    )
+
+
+def video_filters(encode: EncodeSettings) -> List[str]:
+    filters: List[str] = []
+    height = lowest_cap(encode.height, encode.transcode_max_height)
+    fps = lowest_cap(encode.fps, encode.transcode_max_fps)
+    # Caps, not targets: smaller sources keep their size
+    if encode.width and height:
+        filters.append(
+            f"scale='min(iw,{encode.width})':'min(ih,{height})'"
+            ":force_original_aspect_ratio=decrease:force_divisible_by=2"
+        )
+    elif height:
+        filters.append(f"scale=-2:'min(ih,{height})'")
+    elif encode.width:
+        filters.append(f"scale='min(iw,{encode.width})':-2")
+    if fps:
+        filters.append(f"fps={fps:g}")
+    return filters
+
+
+def transcode_args(encode: EncodeSettings) -> List[str]:
+    kbps = encode.video_bitrate_kbps
+    # VBV keeps x264 from bursting above the target, which an uplink near its limit cannot absorb
+    args = ["-c:v", "libx264", "-preset", encode.preset, "-b:v", f"{kbps}k", "-maxrate", f"{kbps}k"]
+    args += ["-bufsize", f"{kbps * 2}k"]
+    filters = video_filters(encode)
+    if filters:
+        args += ["-vf", ",".join(filters)]
+    return args + ["-c:a", "aac", "-ar", str(encode.audio_sample_rate), "-b:a", f"{encode.audio_bitrate_kbps}k"]
+
+
+def copy_args() -> List[str]:
+    return ["-c", "copy"]
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import threading
+import traceback
+from typing import Callable, List
+
+
+class Event:
+    # Minimal Qt-free stand-in for a signal. Callbacks run synchronously on the
+    # emitting thread (usually a runner thread); GUIs must marshal to their own thread.
+
+    def __init__(self) -> None:
+        self._callbacks: List[Callable] = []
+        self._lock = threading.Lock()
+
+    def connect(self, callback: Callable) -> None:
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def disconnect(self, callback: Callable) -> None:
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def emit(self, *args) -> None:
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(*args)
+            except Exception:
+                # A broken listener must not take down the runner thread
+                traceback.print_exc()
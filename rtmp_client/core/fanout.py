@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import io
+import os
+import queue
+import subprocess
+import threading
+import time
+from typing import Callable, IO, Iterator, List, Optional
+
+from .lifecycle import STAGE_KILL, group_popen_kwargs, signal_group
+
+
+# Encoder side of a fan-out session: MPEG-TS on stdout survives arbitrary chunk
+# boundaries, dropped chunks and per-file timestamp resets on the relay side.
+FANOUT_FORMAT = "mpegts"
+FANOUT_TARGET = "pipe:1"
+
+CHUNK_SIZE = 64 * 1024
+QUEUE_CHUNKS = 256  # ~16 MB of backlog per destination before data is dropped
+LIVE_AFTER_S = 3.0
+
+STATUS_CONNECTING = "connecting"
+STATUS_LIVE = "live"
+STATUS_RECONNECTING = "reconnecting"
+STATUS_FAILED = "failed"
+STATUS_STOPPED = "stopped"
+
+
+def _popen_kwargs() -> dict:
+    kwargs = group_popen_kwargs()
+    if os.name == "nt":
+        kwargs["creationflags"] |= subprocess.CREATE_NO_WINDOW  # type: ignore[attr-defined]
+    return kwargs
+
+
+def read_chunks(stream: IO[bytes]) -> Iterator[bytes]:
+    # Whatever the encoder has written so far, up to CHUNK_SIZE; stops at EOF or a closed pipe
+    read = stream.read1 if hasattr(stream, "read1") else stream.read
+    try:
+        while True:
+            chunk = read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+    except (OSError, ValueError):
+        return
+
+
+def _kill(proc: subprocess.Popen) -> None:
+    if proc.poll() is not None or signal_group(proc.pid, STAGE_KILL):
+        return
+    try:
+        proc.kill()
+    except Exception:
+        pass
+
+
+class _Relay:
+    # One `ffmpeg -c copy` process per destination, fed through a bounded queue so a
+    # slow or dead endpoint never blocks the encoder or the other destinations.
+
+    def __init__(self, fanout: "FanOut", index: int, url: str) -> None:
+        self.fanout = fanout
+        self.index = index
+        self.url = url
+        self.status = ""
+        self.reconnects = 0
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=QUEUE_CHUNKS)
+        self._proc: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        self._dropping = False
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=f"fanout-{self.index}", daemon=True)
+        self._thread.start()
+
+    def offer(self, chunk: bytes) -> None:
+        try:
+            self._queue.put_nowait(chunk)
+            self._dropping = False
+        except queue.Full:
+            if not self._dropping:
+                self._dropping = True
+                self.fanout._log(self.index, "tujuan tertinggal, data dibuang sampai antrean kosong\n")
+
+    def stop(self) -> None:
+        # The writer closes stdin on the sentinel so the relay can finish the FLV stream cleanly
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def join(self, timeout: float) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        if self._thread is not None and self._thread.is_alive():
+            proc = self._proc
+            if proc is not None:
+                _kill(proc)
+
+    def _set_status(self, status: str) -> None:
+        if status != self.status:
+            self.status = status
+            self.fanout._status(self.url, status)
+
+    def _spawn(self) -> Optional[subprocess.Popen]:
+        cmd = [
+            self.fanout.ffmpeg_path,
+            "-hide_banner",
+            "-loglevel",
+            "warning",
+            "-f",
+            FANOUT_FORMAT,
+            "-i",
+            "pipe:0",
+            "-c",
+            "copy",
+            "-f",
+            "flv",
+            self.url,
+        ]
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                **_popen_kwargs(),
+            )
+        except Exception as exc:
+            self.fanout._log(self.index, f"gagal menjalankan relay: {exc}\n")
+            return None
+        threading.Thread(target=self._read_stderr, args=(proc.stderr,), daemon=True).start()
+        return proc
+
+    def _read_stderr(self, stream: IO[bytes]) -> None:
+        for line in io.TextIOWrapper(stream, encoding="utf-8", errors="replace"):
+            self.fanout._log(self.index, line)
+
+    def _drain(self) -> None:
+        # Data queued while the endpoint was down is stale by the time we reconnect
+        try:
+            while True:
+                if self._queue.get_nowait() is None:
+                    self._queue.put_nowait(None)
+                    return
+        except queue.Empty:
+            pass
+
+    def _run(self) -> None:
+        delay = self.fanout.reconnect_delay
+        attempts = 0
+        while not self.fanout.stopped:
+            self._set_status(STATUS_CONNECTING if attempts == 0 else STATUS_RECONNECTING)
+            proc = self._spawn()
+            self._proc = proc
+            started = time.monotonic()
+            if proc is not None:
+                while True:
+                    chunk = self._queue.get()
+                    if chunk is None or self.fanout.stopped:
+                        break
+                    if proc.poll() is not None:
+                        break
+                    try:
+                        proc.stdin.write(chunk)  # type: ignore[union-attr]
+                    except (BrokenPipeError, OSError, ValueError):
+                        break
+                    if self.status != STATUS_LIVE and time.monotonic() - started >= LIVE_AFTER_S:
+                        self._set_status(STATUS_LIVE)
+                        delay = self.fanout.reconnect_delay
+                        attempts = 0
+                self._close(proc)
+            if self.fanout.stopped:
+                break
+            attempts += 1
+            if self.fanout.max_retries >= 0 and attempts > self.fanout.max_retries:
+                self._set_status(STATUS_FAILED)
+                self.fanout._log(self.index, "batas reconnect tercapai, tujuan dinonaktifkan\n")
+                return
+            self._set_status(STATUS_RECONNECTING)
+            self.reconnects += 1
+            self.fanout._log(self.index, f"koneksi terputus, reconnect dalam {delay:.0f} detik\n")
+            if self.fanout._stop_event.wait(delay):
+                break
+            delay = min(delay * 2, self.fanout.max_reconnect_delay)
+            self._drain()
+        self._set_status(STATUS_STOPPED)
+
+    @staticmethod
+    def _close(proc: subprocess.Popen) -> None:
+        try:
+            if proc.stdin:
+                proc.stdin.close()
+        except Exception:
+            pass
+        try:
+            proc.wait(timeout=5)
+        except Exception:
+            _kill(proc)
+
+
+class FanOut:
+    # Distributes one encoder's output to several RTMP/RTMPS destinations
+
+    def __init__(
+        self,
+        ffmpeg_path: str,
+        urls: List[str],
+        on_status: Callable[[str, str], None],
+        on_log: Callable[[str], None],
+        reconnect_delay: float = 2.0,
+        max_reconnect_delay: float = 30.0,
+        max_retries: int = -1,
+    ) -> None:
+        self.ffmpeg_path = ffmpeg_path
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_retries = max_retries  # -1 = retry forever
+        self._on_status = on_status
+        self._on_log = on_log
+        self._stop_event = threading.Event()
+        self.relays = [_Relay(self, i, url) for i, url in enumerate(urls)]
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def start(self) -> None:
+        for relay in self.relays:
+            relay.start()
+
+    def feed(self, stream: IO[bytes]) -> None:
+        # Runs on the encoder's stdout reader thread until the encoder exits
+        for chunk in read_chunks(stream):
+            if self.stopped or self.all_failed():
+                break
+            self.distribute(chunk)
+
+    def distribute(self, chunk: bytes) -> None:
+        # Never blocks: a relay that cannot keep up drops the chunk
+        for relay in self.relays:
+            if relay.status != STATUS_FAILED:
+                relay.offer(chunk)
+
+    def all_failed(self) -> bool:
+        return all(relay.status == STATUS_FAILED for relay in self.relays)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop_event.set()
+        for relay in self.relays:
+            relay.stop()
+        for relay in self.relays:
+            relay.join(timeout)
+
+    def _status(self, url: str, status: str) -> None:
+        self._on_status(url, status)
+
+    def _log(self, index: int, text: str) -> None:
+        self._on_log(f"[dest {index + 1}] {text}")
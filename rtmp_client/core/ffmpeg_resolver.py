@@ -4,8 +4,17 @@ import os
 import platform
 import shutil
 import sys
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
+
+
+FFMPEG = "ffmpeg"
+FFPROBE = "ffprobe"
+
+# Found binaries per tool name; the filesystem walk runs once per process (misses are retried)
+_resolved: Dict[str, str] = {}
+_resolved_lock = threading.Lock()
 
 
 def _platform_dir_name() -> str:
@@ -17,12 +26,12 @@ def _platform_dir_name() -> str:
     return "linux"
 
 
-def _ffmpeg_filename() -> str:
-    return "ffmpeg.exe" if _platform_dir_name() == "windows" else "ffmpeg"
+def _tool_filename(tool: str) -> str:
+    return f"{tool}.exe" if _platform_dir_name() == "windows" else tool
 
 
-def _candidate_vendor_paths() -> list[Path]:
-    fname = _ffmpeg_filename()
+def _candidate_vendor_paths(tool: str = FFMPEG) -> list[Path]:
+    fname = _tool_filename(tool)
     platdir = _platform_dir_name()
     candidates: list[Path] = []
 
@@ -51,10 +60,37 @@ def _candidate_vendor_paths() -> list[Path]:
     return unique
 
 
-def find_ffmpeg() -> Optional[str]:
-    for path in _candidate_vendor_paths():
+def _search(tool: str) -> Optional[str]:
+    for path in _candidate_vendor_paths(tool):
         if path.exists() and os.access(path, os.X_OK):
             return str(path)
     # Fallback to PATH
-    which = shutil.which("ffmpeg")
-    return which
+    return shutil.which(tool)
+
+
+def find_tool(tool: str) -> Optional[str]:
+    with _resolved_lock:
+        cached = _resolved.get(tool)
+        # Cheap revalidation: a binary removed since the last call triggers a new search
+        if cached is not None and os.access(cached, os.X_OK):
+            return cached
+        found = _search(tool)
+        if found is not None:
+            _resolved[tool] = found
+        else:
+            _resolved.pop(tool, None)
+        return found
+
+
+def clear_resolved() -> None:
+    # Forget memoized paths (e.g. after the user installs FFmpeg while the app runs)
+    with _resolved_lock:
+        _resolved.clear()
+
+
+def find_ffmpeg() -> Optional[str]:
+    return find_tool(FFMPEG)
+
+
+def find_ffprobe() -> Optional[str]:
+    return find_tool(FFPROBE)
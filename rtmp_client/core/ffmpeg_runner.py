@@ -1,32 +1,238 @@
 from __future__ import annotations
 
+import bisect
+import dataclasses
 import os
 import shutil
 import subprocess
+import tempfile
 import threading
-from typing import Optional, List
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, List, Tuple
 
-from PySide6.QtCore import QObject, Signal
+from .encode_cache import EncodeCache
+from .encoding import (
+    MODE_CACHED,
+    MODE_COPY,
+    MODE_TRANSCODE,
+    TRANSCODE_ENCODERS,
+    EncodeSettings,
+    copy_args,
+    copy_compatibility,
+    copy_signature,
+    transcode_args,
+)
+from .adaptive import AdaptivePresetController
+from .congestion import BitrateController, CongestionPolicy, SendBacklogProbe
+from .capabilities import CapabilityCache, FFmpegCapabilities, default_capability_cache, url_protocol
+from .events import Event
+from .fanout import FANOUT_FORMAT, FANOUT_TARGET, FanOut
+from .ffmpeg_resolver import find_ffmpeg, find_ffprobe
+from .lifecycle import (
+    LifecyclePolicy,
+    LifecycleStats,
+    ProcessSupervisor,
+    StallWatchdog,
+    StopOutcome,
+    group_popen_kwargs,
+    reap_group,
+)
+from .log_buffer import DEFAULT_MAX_LINES, LogBuffer, pump_lines
+from .media_cache import MediaCache, format_duration, is_decodable, total_duration
+from .media_probe import MediaInfo, probe_duration, probe_keyframe_before, probe_media
+from .prefetch import ItemPrefetcher, PreparedItem, warm_file
+from .preview import PreviewChannel, PreviewSettings
+from .progress import DEFAULT_STATS_PERIOD, OutputStart, ProgressChannel, ProgressSample
+from .reconnect import END_SLACK_S, ReconnectEvent, ReconnectPolicy, ResumeTracker
+from .settings import AppSettings
+from .standby import Cutover, GoLiveReport, SlateSource, StandbyPolicy, build_slate_command, slate_geometry
+from .validators import is_file_readable
 
-from .ffmpeg_resolver import find_ffmpeg
 
+# Pipe readers get this long to reach EOF after FFmpeg exits before its group is cleaned up
+READER_JOIN_S = 2.0
 
-class FFMpegRunner(QObject):
-    on_log = Signal(str)
-    on_started = Signal()
-    on_stopped = Signal(int)
-    on_error = Signal(str)
-    on_file_started = Signal(str)  # emits current file path when a file starts
 
-    def __init__(self, ffmpeg_path: Optional[str] = None) -> None:
-        super().__init__()
+def _tee_escape(target: str) -> str:
+    # Slave targets in a tee spec are split on "|" and unescaped like av_get_token
+    return target.replace("\\", "\\\\").replace("'", "\\'").replace("|", "\\|")
+
+
+def _low_priority_popen_kwargs() -> dict:
+    if os.name == "nt":
+        return {
+            "creationflags": subprocess.CREATE_NO_WINDOW  # type: ignore[attr-defined]
+            | subprocess.BELOW_NORMAL_PRIORITY_CLASS  # type: ignore[attr-defined]
+        }
+    if hasattr(os, "nice"):
+        return {"preexec_fn": lambda: os.nice(10)}
+    return {}
+
+
+def _concat_quote(path: str) -> str:
+    # ffconcat uses shell-like single quoting
+    return "'" + path.replace("'", "'\\''") + "'"
+
+
+# Maps output time of a gapless session back to a playlist index
+class _PlaylistTimeline:
+    def __init__(self, durations: List[float], loop: bool) -> None:
+        self._starts: List[float] = []
+        total = 0.0
+        for d in durations:
+            self._starts.append(total)
+            total += d
+        self.total = total
+        self.loop = loop
+
+    def index_at(self, seconds: float) -> int:
+        if self.loop and self.total > 0:
+            seconds = seconds % self.total
+        return max(0, bisect.bisect_right(self._starts, seconds) - 1)
+
+
+class FFMpegRunner:
+    # Qt-free; events fire on runner threads (see ui.runner_signals for the Qt adapter)
+    EVENTS = (
+        "on_started",
+        "on_stopped",
+        "on_error",
+        "on_file_started",
+        "on_file_mode",
+        "on_destination_status",
+        "on_progress",
+        "on_reconnect",
+        "on_preview_frame",
+        "on_output_started",
+        "on_go_live",
+    )
+
+    def __init__(
+        self,
+        ffmpeg_path: Optional[str] = None,
+        encode: Optional[EncodeSettings] = None,
+        encode_cache: Optional[EncodeCache] = None,
+        media_cache: Optional[MediaCache] = None,
+        stats_period: float = DEFAULT_STATS_PERIOD,
+        log_max_lines: int = DEFAULT_MAX_LINES,
+        reconnect: Optional[ReconnectPolicy] = None,
+        capabilities: Optional[CapabilityCache] = None,
+        prefetch: bool = True,
+        bitrate_ladder: Optional[List[int]] = None,
+        congestion_policy: Optional[CongestionPolicy] = None,
+        preview: Optional[PreviewSettings] = None,
+        lifecycle: Optional[LifecyclePolicy] = None,
+        standby: Optional[StandbyPolicy] = None,
+    ) -> None:
+        self.on_started = Event()
+        self.on_stopped = Event()  # exit code
+        self.on_error = Event()  # message
+        self.on_file_started = Event()  # emits current file path when a file starts
+        self.on_file_mode = Event()  # file path, "copy" / "transcode" / "cache"
+        self.on_destination_status = Event()  # destination URL, fanout.STATUS_* (multi-destination sessions)
+        self.on_progress = Event()  # progress.ProgressSample, once per stats period
+        self.on_reconnect = Event()  # reconnect.ReconnectEvent, before each resume attempt
+        self.on_preview_frame = Event()  # JPEG bytes, newest preview frame (only with a preview configured)
+        self.on_output_started = Event()  # progress.OutputStart, first progress report of each FFmpeg process
+        self.on_go_live = Event()  # standby.GoLiveReport, when a scheduled start switched to the playlist
+
         self._ffmpeg_path = ffmpeg_path or find_ffmpeg() or shutil.which("ffmpeg")
+        self._ffprobe_path = find_ffprobe()
+        # Shared per-binary probe results (-version / -encoders / -muxers / -protocols)
+        self._capability_cache = capabilities or default_capability_cache()
+        self._encode = encode or EncodeSettings()
+        self._encode_cache = encode_cache
+        self._media_cache = media_cache
+        self._stats_period = stats_period
+        self._last_progress: Optional[ProgressSample] = None
+        self._reconnect = reconnect or ReconnectPolicy()
+        self._reconnect_count = 0
+        # Progress of the current FFmpeg attempt and where in the item (or playlist) it started
+        self._attempt_progress: Optional[ProgressSample] = None
+        self._resume_offset = 0.0
+        # Start latency / item gap bookkeeping for on_output_started, and the playlist position on air
+        self._spawned_at = 0.0
+        self._awaiting_output = False
+        self._item_switch = False
+        self._last_output_at: Optional[float] = None
+        self._current_index = -1
+        # Per-session preset ladder (start_playlist(adaptive=True)) and the mode now on air
+        self._adaptive: Optional[AdaptivePresetController] = None
+        self._current_mode = ""
+        # Per-session video bitrate ladder (start_playlist(congestion=True)); the policy is pluggable
+        self._bitrate_ladder = bitrate_ladder
+        self._congestion_policy = congestion_policy
+        self._bitrate: Optional[BitrateController] = None
+        self._backlog_probe: Optional[SendBacklogProbe] = None
+        self._switch_requested = False
+        # Next-item preparation (validate, probe, page-cache warm-up, command) while the current one streams
+        self._prefetch = prefetch
+        self._prefetcher: Optional[ItemPrefetcher] = None
+        self._prepared: Optional[PreparedItem] = None
+        # Files handed to extend_playlist() that the running playlist has not taken in yet
+        self._appended: List[str] = []
+        # Optional low-rate MJPEG output of the streaming process for the GUI (None = off)
+        self._preview = preview
+        self._preview_thread: Optional[threading.Thread] = None
+        # Stop escalation and stall watchdog for every streaming process, with their measurements
+        self._lifecycle = lifecycle or LifecyclePolicy()
+        self._lifecycle_stats = LifecycleStats()
+        self._supervisor: Optional[ProcessSupervisor] = None
+        self._watchdog: Optional[StallWatchdog] = None
+        self._attempt_stalled = False
+        # FFmpeg output is buffered here and pulled by the UI in batches, not signalled per line
+        self._log_buffer = LogBuffer(log_max_lines)
+        self._precache_thread: Optional[threading.Thread] = None
         self._process: Optional[subprocess.Popen] = None
         self._stdout_thread: Optional[threading.Thread] = None
         self._stderr_thread: Optional[threading.Thread] = None
+        self._progress_thread: Optional[threading.Thread] = None
         self._runner_thread: Optional[threading.Thread] = None
         self._lock = threading.Lock()
         self._stop_event = threading.Event()
+        # Gapless session state (only set while a concat session is running)
+        self._timeline: Optional[_PlaylistTimeline] = None
+        self._timeline_files: List[str] = []
+        self._timeline_index = -1
+        self._fanout: Optional[FanOut] = None
+        # Scheduled start (start_playlist(go_live_at=...)): slate on the relays until the cut-over
+        self._standby = standby or StandbyPolicy()
+        self._cutover: Optional[Cutover] = None
+        self._slate: Optional[SlateSource] = None
+        self._go_live_timer: Optional[threading.Timer] = None
+
+    @property
+    def log_buffer(self) -> LogBuffer:
+        return self._log_buffer
+
+    @property
+    def last_progress(self) -> Optional[ProgressSample]:
+        return self._last_progress
+
+    @property
+    def reconnect_count(self) -> int:
+        return self._reconnect_count
+
+    @property
+    def current_index(self) -> int:
+        # Playlist position of the item on air, -1 when idle
+        return self._current_index
+
+    @property
+    def process_id(self) -> Optional[int]:
+        return self._current_pid()
+
+    @property
+    def lifecycle_stats(self) -> LifecycleStats:
+        with self._lock:
+            return self._lifecycle_stats.copy()
+
+    @property
+    def capabilities(self) -> Optional[FFmpegCapabilities]:
+        # None when the binary could not be probed; feature checks are then skipped
+        return self._capability_cache.get(self._ffmpeg_path)
 
     @property
     def is_running(self) -> bool:
@@ -35,11 +241,35 @@ class FFMpegRunner(QObject):
                 return True
             return self._process is not None and self._process.poll() is None
 
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        # Blocks until the current session has fully stopped; True when idle
+        thread = self._runner_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
     def start_stream(self, *, video_path: str, rtmp_url: str) -> None:
         # Backward-compatible single-file start just wraps playlist of size 1
         self.start_playlist(video_files=[video_path], rtmp_url=rtmp_url, loop=False)
 
-    def start_playlist(self, *, video_files: List[str], rtmp_url: str, loop: bool) -> None:
+    def start_playlist(
+        self,
+        *,
+        video_files: List[str],
+        rtmp_url: str,
+        loop: bool,
+        gapless: bool = False,
+        passthrough: bool = False,
+        use_cache: bool = False,
+        precache: bool = False,
+        destinations: Optional[List[str]] = None,
+        adaptive: bool = False,
+        congestion: bool = False,
+        go_live_at: Optional[float] = None,
+    ) -> None:
+        # go_live_at (time.time() seconds) schedules the start: a slate holds the RTMP connection
+        # from StandbyPolicy.warmup_s before, and the playlist takes over at that moment
         if not self._ffmpeg_path:
             self.on_error.emit("FFmpeg tidak ditemukan di PATH. Install FFmpeg terlebih dahulu.")
             return
@@ -51,43 +281,147 @@ class FFMpegRunner(QObject):
             self.on_error.emit("Playlist kosong atau file tidak ditemukan.")
             return
 
+        urls = list(dict.fromkeys(u for u in [rtmp_url] + list(destinations or []) if u))
+        if not urls:
+            self.on_error.emit("Tidak ada tujuan RTMP.")
+            return
+        use_cache = self._check_capabilities(urls, passthrough, use_cache)
+        if use_cache is None:
+            return
+
+        cache: Optional[EncodeCache] = None
+        if use_cache:
+            if self._encode_cache is None:
+                self._encode_cache = EncodeCache.from_app_settings(AppSettings())
+            cache = self._encode_cache
+            cache.purge_partials()
+
         self._stop_event.clear()
+        self._last_progress = None
+        self._reconnect_count = 0
+        self._appended = []
+        self._last_output_at = None
+        if go_live_at is not None and go_live_at <= time.time():
+            self._log("[standby] Jadwal mulai sudah lewat, langsung mulai\n")
+            go_live_at = None
+        self._begin_adaptive(adaptive, gapless)
+        self._begin_congestion(congestion, gapless, len(urls) > 1 or go_live_at is not None)
         self._runner_thread = threading.Thread(
-            target=self._run_playlist_worker, args=(valid_files, rtmp_url, loop), name="ffmpeg-playlist"
+            target=self._run_playlist_worker,
+            args=(valid_files, urls, loop, gapless, passthrough, cache, go_live_at),
+            name="ffmpeg-playlist",
         )
         self._runner_thread.daemon = True
         self._runner_thread.start()
+        if cache is not None and precache and not gapless:
+            self._precache_thread = threading.Thread(
+                target=self._run_precache_worker, args=(valid_files, passthrough, cache), name="ffmpeg-precache"
+            )
+            self._precache_thread.daemon = True
+            self._precache_thread.start()
+
+    def set_preview(self, preview: Optional[PreviewSettings]) -> None:
+        # Takes effect from the next FFmpeg process
+        self._preview = preview
+
+    def extend_playlist(self, files: List[str]) -> bool:
+        # Appends to the running playlist (watched folders); taken in at the next item boundary.
+        # Gapless sessions have a fixed concat list and pick new files up on their next start.
+        if not self.is_running:
+            return False
+        with self._lock:
+            self._appended.extend(f for f in files if f)
+        return True
 
     def stop_stream(self) -> None:
+        # Returns at once; the process is asked to quit and escalated on its supervisor thread
         self._stop_event.set()
         with self._lock:
-            proc = self._process
-        if proc is not None:
-            try:
-                proc.terminate()
-            except Exception:
-                pass
+            supervisor = self._supervisor
+        if supervisor is not None:
+            supervisor.request_stop("stop")
 
     # Internal
-    def _run_playlist_worker(self, files: List[str], rtmp_url: str, loop: bool) -> None:
+    def _run_playlist_worker(
+        self,
+        files: List[str],
+        urls: List[str],
+        loop: bool,
+        gapless: bool = False,
+        passthrough: bool = False,
+        cache: Optional[EncodeCache] = None,
+        go_live_at: Optional[float] = None,
+    ) -> None:
         self.on_started.emit()
         exit_code = 0
+        rtmp_url = urls[0]
         try:
-            index = 0
-            while not self._stop_event.is_set():
+            if go_live_at is not None and not self._await_warmup(go_live_at):
+                return
+            if len(urls) > 1 or go_live_at is not None:
+                # Encode once, relay the same bytes to every destination. A scheduled start always
+                # goes through the relays: they keep the RTMP connection while the feed changes.
+                fanout = FanOut(self._ffmpeg_path, urls, self.on_destination_status.emit, self._log)
+                with self._lock:
+                    self._fanout = fanout
+                fanout.start()
+                rtmp_url = FANOUT_TARGET
+            if self._media_cache is not None:
+                files = self._filter_decodable(files)
+                if not files:
+                    exit_code = -1
+                    self.on_error.emit("Tidak ada file di playlist yang bisa di-decode.")
+                    return
+            self._prefetcher = ItemPrefetcher() if self._prefetch else None
+            if go_live_at is not None and not self._enter_standby(files[0], go_live_at):
+                return
+            if gapless:
+                gapless_exit = self._run_gapless(files, rtmp_url, loop, passthrough)
+                if gapless_exit is not None:
+                    exit_code = gapless_exit
+                    return
+            # Mode decisions are stable for a file, so loops do not re-probe
+            modes: Dict[str, str] = {}
+            skipped = 0
+            index: Optional[int] = 0
+            while index is not None and not self._stop_event.is_set():
                 current = files[index]
+                prepared = self._prefetcher.take(current) if self._prefetcher is not None else None
+                if prepared is None:
+                    prepared = self._prepare_item(current, rtmp_url, passthrough, modes.get(current), ahead=False)
+                following = self._following(files, index, loop)
+                if not self._admit_item(prepared, modes, passthrough):
+                    skipped += 1
+                    if skipped >= len(files):
+                        exit_code = -1
+                        self.on_error.emit("Tidak ada file di playlist yang bisa diputar.")
+                        break
+                    index = self._join_appended(files, index, loop, following)
+                    continue
+                skipped = 0
+                self._current_index = index
                 self.on_file_started.emit(current)
-                exit_code = self._run_single_file(current, rtmp_url)
+                self._schedule_prefetch(files, following, loop, current, rtmp_url, passthrough, modes)
+                self._prepared = prepared
+                exit_code = self._play_item(current, rtmp_url, modes[current], cache)
+                self._prepared = None
                 if self._stop_event.is_set():
                     break
-                # Advance index
-                index += 1
-                if index >= len(files):
-                    if loop:
-                        index = 0
-                    else:
-                        break
+                if self._fanout is not None and self._fanout.all_failed():
+                    exit_code = -1
+                    self.on_error.emit("Semua tujuan RTMP gagal.")
+                    break
+                index = self._join_appended(files, index, loop, following)
         finally:
+            self._close_prefetcher()
+            self._leave_standby()
+            with self._lock:
+                fanout, self._fanout = self._fanout, None
+            if fanout is not None:
+                fanout.stop()
+            self._end_adaptive()
+            self._end_congestion()
+            self._current_index = -1
             self.on_stopped.emit(exit_code)
             with self._lock:
                 self._process = None
@@ -95,49 +429,780 @@ class FFMpegRunner(QObject):
                 self._stderr_thread = None
                 self._runner_thread = None
 
-    def _run_single_file(self, file_path: str, rtmp_url: str) -> int:
-        cmd: List[str] = [
-            self._ffmpeg_path,
-            "-hide_banner",
-            "-re",
-            "-i",
+    def _await_warmup(self, go_live_at: float) -> bool:
+        # Nothing runs (not even the relays) until warmup_s before the scheduled start; False when stopped
+        wait = go_live_at - self._standby.warmup_s - time.time()
+        if wait <= 0:
+            return True
+        when = datetime.fromtimestamp(go_live_at).strftime("%H:%M:%S")
+        self._log(f"[standby] Menunggu jadwal {when}; slate mulai {self._standby.warmup_s:g} detik sebelumnya\n")
+        return not self._stop_event.wait(wait)
+
+    def _enter_standby(self, first_file: str, go_live_at: float) -> bool:
+        # Slate on the relays (the RTMP handshake happens now), then return preroll_s before the
+        # scheduled start so the first item's FFmpeg is up by then. False when stopped meanwhile.
+        policy = self._standby
+        when = datetime.fromtimestamp(go_live_at).strftime("%H:%M:%S")
+        width, height, fps = slate_geometry(self._encode, self._probe(first_file))
+        with self._lock:
+            fanout = self._fanout
+        assert fanout is not None
+        cutover = Cutover(fanout, go_live_at, policy.preroll_s)
+        cutover.on_switched.connect(self._on_go_live)
+        slate: Optional[SlateSource] = SlateSource(
+            build_slate_command(self._ffmpeg_path, self._encode, width, height, fps),
+            cutover,
+            self._log_buffer,
+            self._lifecycle,
+        )
+        try:
+            slate.start()
+            self._log(f"[standby] Slate {width}x{height}@{fps:g} ke tujuan, live pukul {when}\n")
+        except OSError as exc:
+            # The switch still happens on time, only without a connection made in advance
+            self._log(f"[standby] Slate tidak bisa dijalankan: {exc}\n")
+            slate = None
+        timer = threading.Timer(max(0.0, go_live_at - time.time()), cutover.due)
+        timer.daemon = True
+        with self._lock:
+            self._cutover = cutover
+            self._slate = slate
+            self._go_live_timer = timer
+        timer.start()
+        return not self._stop_event.wait(max(0.0, go_live_at - policy.preroll_s - time.time()))
+
+    def _on_go_live(self, report: GoLiveReport) -> None:
+        # Runs on the thread that made the switch (the timer or the first item's stdout reader)
+        slate = self._slate
+        if slate is not None:
+            slate.stop_async()
+        self._log(f"[standby] {report.describe()}\n")
+        self.on_go_live.emit(report)
+
+    def _leave_standby(self) -> None:
+        with self._lock:
+            timer, self._go_live_timer = self._go_live_timer, None
+            slate, self._slate = self._slate, None
+            self._cutover = None
+        if timer is not None:
+            timer.cancel()
+        if slate is not None:
+            slate.stop()
+
+    def _join_appended(self, files: List[str], index: int, loop: bool, following: Optional[int]) -> Optional[int]:
+        # New files go to the end of the playlist, so a non-looping playlist that was about to
+        # finish carries on with them
+        with self._lock:
+            added, self._appended = self._appended, []
+        known = set(files)
+        added = [f for f in dict.fromkeys(added) if f not in known and os.path.isfile(f)]
+        if not added:
+            return following
+        files.extend(added)
+        self._log(f"[runner] {len(added)} file baru masuk playlist ({len(files)} total)\n")
+        return self._following(files, index, loop)
+
+    # Next-item preparation
+    @staticmethod
+    def _following(files: List[str], index: int, loop: bool) -> Optional[int]:
+        if index + 1 < len(files):
+            return index + 1
+        return 0 if loop else None
+
+    def _prepare_item(
+        self, file_path: str, rtmp_url: str, passthrough: bool, known_mode: Optional[str], ahead: bool = True
+    ) -> PreparedItem:
+        # ahead=True on the prefetch thread while the previous item streams; ahead=False inline, when
+        # nothing is streaming yet and extra probing or warm-up would only delay the start
+        started = time.monotonic()
+        if not is_file_readable(file_path):
+            return PreparedItem(file_path, ok=False, reason="file tidak bisa dibaca")
+        warmed = 0
+        if ahead:
+            try:
+                warmed = warm_file(file_path, cancelled=self._stop_event.is_set)
+            except OSError as exc:
+                return PreparedItem(file_path, ok=False, reason=f"gagal membaca file ({exc.strerror or exc})")
+        mode, mode_reason = known_mode or MODE_TRANSCODE, ""
+        if known_mode is None and (passthrough or ahead) and self._ffprobe_path:
+            # First lap only: later laps reuse the decision and just re-validate and warm
+            info = self._probe(file_path)
+            if not is_decodable(info):
+                return PreparedItem(file_path, ok=False, reason="file tidak bisa di-decode")
+            if passthrough:
+                mode, mode_reason = self._decide_mode(info)
+        elif known_mode is None and passthrough:
+            mode, mode_reason = self._decide_mode(None)
+        encode = self._encode
+        command = None
+        if mode == MODE_COPY or self._encode_cache is None:
+            command = self._build_file_command(file_path, rtmp_url, mode)
+        return PreparedItem(
             file_path,
-            "-c:v",
-            "libx264",
-            "-preset",
-            "veryfast",
-            "-b:v",
-            "2500k",
-            "-c:a",
-            "aac",
-            "-ar",
-            "44100",
-            "-b:a",
-            "128k",
-            "-f",
-            "flv",
-            rtmp_url,
-        ]
+            ok=True,
+            mode=mode,
+            mode_reason=mode_reason,
+            url=rtmp_url,
+            encode=encode,
+            command=command,
+            warmed_bytes=warmed,
+            elapsed_s=time.monotonic() - started,
+        )
+
+    def _admit_item(self, prepared: PreparedItem, modes: Dict[str, str], passthrough: bool) -> bool:
+        name = os.path.basename(prepared.file_path)
+        if not prepared.ok:
+            self._log(f"[runner] Dilewati, {prepared.reason}: {name}\n")
+            return False
+        if prepared.file_path not in modes:
+            modes[prepared.file_path] = prepared.mode
+            if passthrough:
+                self._log_mode(prepared.file_path, prepared.mode, prepared.mode_reason)
+        if prepared.elapsed_s >= 2.0:
+            self._log(f"[prefetch] {name} siap dalam {prepared.elapsed_s:.1f} detik (I/O lambat)\n")
+        return True
+
+    def _schedule_prefetch(
+        self,
+        files: List[str],
+        index: Optional[int],
+        loop: bool,
+        current: str,
+        rtmp_url: str,
+        passthrough: bool,
+        modes: Dict[str, str],
+    ) -> None:
+        prefetcher = self._prefetcher
+        if prefetcher is None or index is None or files[index] == current:
+            return
+        path = files[index]
+
+        def prepare() -> PreparedItem:
+            item = self._prepare_item(path, rtmp_url, passthrough, modes.get(path))
+            if not item.ok:
+                # It will be skipped, so the item after it is the one that has to be ready
+                following = self._following(files, index, loop)
+                self._schedule_prefetch(files, following, loop, current, rtmp_url, passthrough, modes)
+            return item
+
+        prefetcher.schedule(path, prepare)
+
+    def _warm_next(self, file_path: str) -> None:
+        # Gapless sessions: the concat demuxer opens the next file itself; only its data can be warmed
+        prefetcher = self._prefetcher
+        if prefetcher is None:
+            return
+
+        def warm() -> None:
+            try:
+                warm_file(file_path, cancelled=self._stop_event.is_set)
+            except OSError:
+                pass
+
+        prefetcher.take(file_path, timeout=0)
+        prefetcher.schedule(file_path, warm)
+
+    def _close_prefetcher(self) -> None:
+        prefetcher, self._prefetcher = self._prefetcher, None
+        self._prepared = None
+        if prefetcher is not None:
+            prefetcher.close()
+
+    def _file_command(self, file_path: str, rtmp_url: str, mode: str, start: float = 0.0) -> List[str]:
+        # The prefetched command line when it still matches (same URL, mode, encoder settings, no seek)
+        prepared = self._prepared
+        if (
+            prepared is not None
+            and prepared.command is not None
+            and start <= 0
+            and prepared.file_path == file_path
+            and prepared.url == rtmp_url
+            and prepared.mode == mode
+            and prepared.encode is self._encode
+        ):
+            self._prepared = None
+            return prepared.command
+        return self._build_file_command(file_path, rtmp_url, mode, start)
+
+    def _play_item(self, file_path: str, rtmp_url: str, mode: str, cache: Optional[EncodeCache]) -> int:
+        # One playlist item; an ingest drop resumes the same item near where its output stopped
+        tracker = ResumeTracker(self._reconnect)
+        self._item_switch = True
+        while True:
+            self._apply_adaptive()
+            self._apply_congestion()
+            started = time.monotonic()
+            self._attempt_progress = None
+            if tracker.offset > 0:
+                exit_code = self._run_resumed_file(file_path, rtmp_url, mode, cache, tracker.offset)
+            elif mode == MODE_TRANSCODE and cache is not None:
+                exit_code = self._run_cached_file(file_path, rtmp_url, cache)
+            else:
+                self._announce_mode(file_path, mode)
+                exit_code = self._run_single_file(file_path, rtmp_url, mode)
+            if self._resume_after_switch(file_path, tracker):
+                continue
+            delay = self._plan_reconnect(file_path, tracker, exit_code, time.monotonic() - started)
+            if delay is None or self._stop_event.wait(delay):
+                return exit_code
+
+    def _run_resumed_file(
+        self, file_path: str, rtmp_url: str, mode: str, cache: Optional[EncodeCache], start: float
+    ) -> int:
+        # Resumed attempts never tee into the encode cache: a partial entry would be incomplete
+        if mode == MODE_TRANSCODE and cache is not None:
+            key = cache.key_for(file_path, self._encode)
+            hit = cache.lookup(key) if key else None
+            if hit is not None:
+                self._announce_mode(file_path, MODE_CACHED)
+                return self._run_single_file(str(hit), rtmp_url, MODE_COPY, start)
+        self._announce_mode(file_path, mode)
+        return self._run_single_file(file_path, rtmp_url, mode, start)
+
+    def _announce_mode(self, file_path: str, mode: str) -> None:
+        self._current_mode = mode
+        self.on_file_mode.emit(file_path, mode)
+
+    def _check_capabilities(self, urls: List[str], passthrough: bool, use_cache: bool) -> Optional[bool]:
+        # Refuses what this FFmpeg build cannot do before anything is spawned.
+        # Returns the effective use_cache, or None when the session must not start.
+        caps = self.capabilities
+        if caps is None:
+            return use_cache
+        self._log(f"[runner] {caps.describe()}\n")
+        unsupported = caps.unsupported_outputs(urls)
+        if unsupported:
+            protocols = ", ".join(sorted({url_protocol(u) for u in unsupported}))
+            self.on_error.emit(f"FFmpeg ini tidak mendukung protokol output: {protocols}")
+            return None
+        if not caps.has_muxer("flv"):
+            self.on_error.emit("FFmpeg ini tidak mendukung muxer flv.")
+            return None
+        if len(urls) > 1 and not caps.has_muxer(FANOUT_FORMAT):
+            self.on_error.emit(f"FFmpeg ini tidak mendukung muxer {FANOUT_FORMAT} (multi-tujuan).")
+            return None
+        if use_cache and not caps.has_muxer("tee"):
+            self._log("[cache] Muxer tee tidak tersedia, cache encode dimatikan\n")
+            use_cache = False
+        if not passthrough or use_cache:
+            missing = [e for e in TRANSCODE_ENCODERS if not caps.has_encoder(e)]
+            if missing:
+                self._log(f"[runner] Peringatan: encoder {', '.join(missing)} tidak tersedia, transcode bisa gagal\n")
+        return use_cache
+
+    def _begin_adaptive(self, enabled: bool, gapless: bool) -> None:
+        self._adaptive = None
+        if not enabled:
+            return
+        if gapless:
+            # One encoder for the whole playlist leaves no item boundary to switch at
+            self._log("[adaptive] Tidak aktif di mode gapless (tidak ada batas item)\n")
+            return
+        self._adaptive = AdaptivePresetController(self._encode)
+        self._log(f"[adaptive] Aktif, mulai di {self._adaptive.step.describe()}\n")
+
+    def _end_adaptive(self) -> None:
+        controller, self._adaptive = self._adaptive, None
+        if controller is not None:
+            self._encode = controller.base
+
+    def _apply_adaptive(self) -> None:
+        # Item (or resume) boundary: the only place the encoder settings may change
+        controller = self._adaptive
+        decision = controller.apply_pending() if controller is not None else None
+        if controller is None or decision is None:
+            return
+        # The video bitrate belongs to the congestion controller, when one is active
+        self._encode = dataclasses.replace(controller.settings(), video_bitrate_kbps=self._encode.video_bitrate_kbps)
+        direction = "turun" if decision.direction < 0 else "naik"
+        self._log(
+            f"[adaptive] Diterapkan: {direction} {decision.from_step.describe()} -> "
+            f"{decision.to_step.describe()}\n"
+        )
+
+    def _observe_adaptive(self, sample: ProgressSample) -> None:
+        controller = self._adaptive
+        if controller is None or self._current_mode != MODE_TRANSCODE:
+            return
+        decision = controller.observe(sample)
+        if decision is not None:
+            direction = "turun" if decision.direction < 0 else "naik"
+            self._log(
+                f"[adaptive] Rencana {direction}: {decision.from_step.describe()} -> "
+                f"{decision.to_step.describe()} ({decision.reason}), berlaku di item berikutnya\n"
+            )
+
+    def _begin_congestion(self, enabled: bool, gapless: bool, fanout: bool) -> None:
+        self._bitrate = None
+        self._backlog_probe = None
+        self._switch_requested = False
+        if not enabled:
+            return
+        if gapless:
+            self._log("[bitrate] Kontrol kongesti tidak aktif di mode gapless\n")
+            return
+        if fanout:
+            # The encoder feeds local relays; a congested destination never shows up in its output
+            self._log("[bitrate] Kontrol kongesti tidak aktif saat output lewat relay (multi-tujuan/terjadwal)\n")
+            return
+        self._bitrate = BitrateController(self._encode, self._bitrate_ladder, self._congestion_policy)
+        ladder = "/".join(f"{k}k" for k in self._bitrate.ladder)
+        self._log(f"[bitrate] Kontrol kongesti aktif, tangga bitrate video {ladder}\n")
+
+    def _end_congestion(self) -> None:
+        controller, self._bitrate = self._bitrate, None
+        self._backlog_probe = None
+        if controller is not None:
+            self._encode = controller.base
+
+    def _apply_congestion(self) -> None:
+        # Item, resume or switch boundary: a new encoder process gets the current rung
+        controller = self._bitrate
+        if controller is None:
+            return
+        decision = controller.apply_pending()
+        controller.reset_window()
+        self._encode = controller.settings(self._encode)
+        if decision is not None:
+            direction = "turun" if decision.direction < 0 else "naik"
+            self._log(f"[bitrate] Diterapkan: {direction} {decision.from_kbps}k -> {decision.to_kbps}k\n")
+
+    def _observe_congestion(self, sample: ProgressSample) -> None:
+        controller = self._bitrate
+        if controller is None or sample.ended or self._current_mode != MODE_TRANSCODE:
+            return
+        decision = controller.observe(sample, self._read_backlog())
+        if decision is None:
+            return
+        direction = "turun" if decision.direction < 0 else "naik"
+        change = f"{direction} {decision.from_kbps}k -> {decision.to_kbps}k ({decision.reason})"
+        if not decision.urgent:
+            self._log(f"[bitrate] Rencana {change}, berlaku di item berikutnya\n")
+            return
+        if self._switch_requested or self._stop_event.is_set():
+            return
+        # Waiting for the item to end would get the stream dropped: restart the encoder where it is
+        self._log(f"[bitrate] Ganti sekarang: {change}, encoder diulang dari posisi saat ini\n")
+        self._switch_requested = True
+        self._interrupt_for_switch()
+
+    def _read_backlog(self) -> Optional[int]:
+        pid = self._current_pid()
+        if pid is None:
+            return None
+        probe = self._backlog_probe
+        if probe is None or probe.pid != pid:
+            probe = self._backlog_probe = SendBacklogProbe(pid)
+        return probe.read()
+
+    def _current_pid(self) -> Optional[int]:
+        with self._lock:
+            proc = self._process
+        return proc.pid if proc is not None else None
+
+    def _interrupt_for_switch(self) -> None:
+        with self._lock:
+            supervisor = self._supervisor
+        if supervisor is not None:
+            supervisor.request_stop("switch")
+
+    def _resume_after_switch(self, file_path: str, tracker: ResumeTracker) -> bool:
+        # After a planned restart for a new bitrate, continue the item where its output got to.
+        # FFmpeg reports progress=end when terminated too, so only the position says it finished.
+        if not self._switch_requested:
+            return False
+        self._switch_requested = False
+        if self._stop_event.is_set():
+            return False
+        reached = tracker.reached(self._attempt_progress)
+        duration = self._probe_duration(file_path)
+        if duration is not None and reached >= duration - END_SLACK_S:
+            return False
+        tracker.continue_from(reached)
+        return True
+
+    def _should_reconnect(self, exit_code: int) -> bool:
+        # Non-zero exit while we still want to stream; fan-out relays reconnect on their own.
+        # A process the watchdog stopped is resumed whatever its exit code.
+        if self._stop_event.is_set():
+            return False
+        return self._attempt_stalled or (exit_code > 0 and self._fanout is None)
+
+    def _plan_reconnect(
+        self, file_path: str, tracker: ResumeTracker, exit_code: int, ran_for: float
+    ) -> Optional[float]:
+        # Returns the backoff before resuming file_path, or None to give up on it
+        if not self._should_reconnect(exit_code):
+            return None
+        # FFmpeg writes a last progress=end block on a broken pipe too, so only the position
+        # (or a clean exit, see _should_reconnect) says the item finished
+        reached = tracker.reached(self._attempt_progress)
+        duration = self._probe_duration(file_path)
+        if duration is not None and reached >= duration - END_SLACK_S:
+            return None
+        delay = tracker.next_delay(ran_for)
+        if delay is None:
+            self._log(
+                f"[runner] {os.path.basename(file_path)}: batas reconnect ({self._reconnect.max_retries}x) "
+                "tercapai, lanjut ke item berikutnya\n"
+            )
+            return None
+        tracker.resume_from(reached)
+        if tracker.offset > 0:
+            # Start exactly on a keyframe so copy and transcode resume from the same picture
+            keyframe = probe_keyframe_before(file_path, tracker.offset, self._ffprobe_path)
+            if keyframe is not None:
+                tracker.offset = keyframe
+        self._report_reconnect(file_path, tracker, delay, exit_code)
+        return delay
+
+    def _plan_gapless_reconnect(
+        self, tracker: ResumeTracker, exit_code: int, ran_for: float, loop: bool
+    ) -> Optional[float]:
+        # Same as _plan_reconnect, but positions are on the whole-playlist timeline
+        timeline = self._timeline
+        if timeline is None or not self._should_reconnect(exit_code):
+            return None
+        reached = tracker.reached(self._attempt_progress)
+        if loop and timeline.total > 0:
+            reached %= timeline.total
+        elif reached >= timeline.total - END_SLACK_S:
+            return None
+        delay = tracker.next_delay(ran_for)
+        if delay is None:
+            self._log(f"[runner] Gapless: batas reconnect ({self._reconnect.max_retries}x) tercapai\n")
+            return None
+        tracker.resume_from(reached)
+        index = timeline.index_at(tracker.offset)
+        self._report_reconnect(self._timeline_files[index], tracker, delay, exit_code)
+        return delay
+
+    def _report_reconnect(self, file_path: str, tracker: ResumeTracker, delay: float, exit_code: int) -> None:
+        self._reconnect_count += 1
+        cause = "Output macet" if self._attempt_stalled else f"Koneksi terputus (exit {exit_code})"
+        self._log(
+            f"[runner] {cause}, reconnect #{self._reconnect_count} "
+            f"dalam {delay:.1f} detik, lanjut dari {format_duration(tracker.offset)}\n"
+        )
+        self.on_reconnect.emit(
+            ReconnectEvent(
+                file_path=file_path,
+                attempt=tracker.attempts,
+                total=self._reconnect_count,
+                delay_s=delay,
+                resume_at=tracker.offset,
+                exit_code=exit_code,
+                stalled=self._attempt_stalled,
+            )
+        )
+
+    def _run_cached_file(self, file_path: str, rtmp_url: str, cache: EncodeCache) -> int:
+        key = cache.key_for(file_path, self._encode)
+        hit = cache.lookup(key) if key else None
+        if hit is not None:
+            self._announce_mode(file_path, MODE_CACHED)
+            return self._run_single_file(str(hit), rtmp_url, MODE_COPY)
+
+        self._announce_mode(file_path, MODE_TRANSCODE)
+        partial = cache.begin(key) if key else None
+        if partial is None:
+            return self._run_single_file(file_path, rtmp_url, MODE_TRANSCODE)
+
+        # First pass: encode once, send live and fill the cache from the same encoder
+        exit_code = -1
+        try:
+            exit_code = self._run_process(
+                self._build_tee_command(file_path, rtmp_url, partial), MODE_TRANSCODE, file_path
+            )
+        finally:
+            if exit_code == 0 and not self._stop_event.is_set() and cache.commit(key, partial) is not None:
+                self._log(f"[runner] {os.path.basename(file_path)}: hasil encode disimpan ke cache\n")
+            else:
+                cache.abort(key, partial)
+        return exit_code
+
+    def _run_precache_worker(self, files: List[str], passthrough: bool, cache: EncodeCache) -> None:
+        # Background pre-encode of items the live pass has not reached yet, at low priority
+        pending = list(dict.fromkeys(files[1:] + files[:1]))
+        for path in pending:
+            if self._stop_event.is_set():
+                break
+            if passthrough and copy_compatibility(self._probe(path), self._encode)[0]:
+                continue
+            key = cache.key_for(path, self._encode)
+            if not key or cache.lookup(key) is not None:
+                continue
+            partial = cache.begin(key)
+            if partial is None:
+                continue
+            cmd = [self._ffmpeg_path, "-hide_banner", "-nostdin", "-loglevel", "error", "-y", "-i", path]
+            cmd += ["-map", "0:v:0?", "-map", "0:a:0?"] + transcode_args(self._encode) + ["-f", "flv", str(partial)]
+            exit_code = -1
+            try:
+                proc = subprocess.Popen(
+                    cmd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    **_low_priority_popen_kwargs(),
+                )
+                while proc.poll() is None:
+                    if self._stop_event.wait(0.5):
+                        proc.kill()
+                        break
+                exit_code = proc.wait()
+            except Exception as exc:
+                self._log(f"[runner] Pre-encode gagal untuk {os.path.basename(path)}: {exc}\n")
+            if exit_code == 0 and not self._stop_event.is_set() and cache.commit(key, partial) is not None:
+                self._log(f"[runner] Pre-encode selesai: {os.path.basename(path)}\n")
+            else:
+                cache.abort(key, partial)
+        with self._lock:
+            self._precache_thread = None
+
+    def _probe(self, file_path: str) -> Optional[MediaInfo]:
+        if self._media_cache is not None:
+            return self._media_cache.get(file_path)
+        return probe_media(file_path, self._ffprobe_path)
+
+    def _probe_duration(self, file_path: str) -> Optional[float]:
+        if self._media_cache is not None:
+            info = self._media_cache.get(file_path)
+            return info.duration if info is not None and info.duration else None
+        return probe_duration(file_path, self._ffprobe_path)
+
+    def _filter_decodable(self, files: List[str]) -> List[str]:
+        # Probe misses in parallel and drop undecodable items before going live
+        cache = self._media_cache
+        if cache is None or not cache.available:
+            return files
+        infos = cache.probe_many(files)
+        kept: List[str] = []
+        for path in files:
+            if is_decodable(infos.get(path)):
+                kept.append(path)
+            else:
+                self._log(f"[runner] Dilewati, file tidak bisa di-decode: {os.path.basename(path)}\n")
+        runtime = total_duration(infos.get(path) for path in kept)
+        if runtime > 0:
+            self._log(f"[runner] Playlist: {len(kept)} file, total durasi {format_duration(runtime)}\n")
+        return kept
+
+    def _select_mode(self, file_path: str) -> str:
+        mode, reason = self._decide_mode(self._probe(file_path))
+        self._log_mode(file_path, mode, reason)
+        return mode
+
+    def _decide_mode(self, info: Optional[MediaInfo]) -> Tuple[str, str]:
+        ok, reason = copy_compatibility(info, self._encode)
+        return (MODE_COPY if ok else MODE_TRANSCODE), reason
+
+    def _log_mode(self, file_path: str, mode: str, reason: str) -> None:
+        label = "stream copy" if mode == MODE_COPY else "transcode"
+        self._log(f"[runner] {os.path.basename(file_path)}: {label} ({reason})\n")
+
+    def _run_gapless(self, files: List[str], rtmp_url: str, loop: bool, passthrough: bool = False) -> Optional[int]:
+        # One FFmpeg process + one RTMP connection for the whole playlist (and its loops).
+        # Returns None when the session cannot be set up so the caller falls back to per-file mode.
+        prepared = self._prepare_gapless(files, loop, passthrough)
+        if prepared is None:
+            return None
+        list_path, mode = prepared
+        tracker = ResumeTracker(self._reconnect)
+        try:
+            while True:
+                started = time.monotonic()
+                self._attempt_progress = None
+                self._resume_offset = tracker.offset
+                exit_code = self._run_process(
+                    self._build_concat_command(list_path, rtmp_url, loop, mode, tracker.offset),
+                    mode,
+                    self._timeline_files[0] if self._timeline_files else None,
+                )
+                delay = self._plan_gapless_reconnect(tracker, exit_code, time.monotonic() - started, loop)
+                if delay is None or self._stop_event.wait(delay):
+                    return exit_code
+        finally:
+            self._resume_offset = 0.0
+            self._finish_gapless(list_path)
+
+    def _prepare_gapless(self, files: List[str], loop: bool, passthrough: bool) -> Optional[Tuple[str, str]]:
+        # Probes durations, writes the ffconcat list and arms the timeline; (list_path, mode) or None
+        durations: List[float] = []
+        infos: List[Optional[MediaInfo]] = []
+        for path in files:
+            if self._stop_event.is_set():
+                return None
+            if passthrough:
+                info = self._probe(path)
+                infos.append(info)
+                duration = info.duration if info is not None else None
+            else:
+                duration = self._probe_duration(path)
+            if duration is None:
+                self._log(
+                    f"[runner] Durasi tidak diketahui untuk {os.path.basename(path)}; "
+                    "gapless dinonaktifkan, kembali ke mode per-file.\n"
+                )
+                return None
+            durations.append(duration)
+
+        # Concat + stream copy needs every file to be compatible and identically encoded
+        mode = MODE_TRANSCODE
+        if passthrough:
+            verdicts = [copy_compatibility(info, self._encode) for info in infos]
+            signatures = {copy_signature(info) for info in infos if info is not None}
+            if all(ok for ok, _ in verdicts) and len(signatures) == 1:
+                mode = MODE_COPY
+                self._log("[runner] Gapless: semua file kompatibel, memakai stream copy\n")
+            else:
+                for path, (ok, reason) in zip(files, verdicts):
+                    if not ok:
+                        self._log_mode(path, MODE_TRANSCODE, reason)
+                if all(ok for ok, _ in verdicts):
+                    self._log("[runner] Gapless: parameter encode antar file berbeda, memakai transcode\n")
+        for path in files:
+            self.on_file_mode.emit(path, mode)
 
+        list_path = self._write_concat_list(files, durations)
+        with self._lock:
+            self._timeline = _PlaylistTimeline(durations, loop)
+            self._timeline_files = list(files)
+            self._timeline_index = 0
+        self._current_index = 0
+        self.on_file_started.emit(files[0])
+        if len(files) > 1:
+            self._warm_next(files[1])
+        return list_path, mode
+
+    def _finish_gapless(self, list_path: str) -> None:
+        with self._lock:
+            self._timeline = None
+            self._timeline_files = []
+            self._timeline_index = -1
+        try:
+            os.remove(list_path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _write_concat_list(files: List[str], durations: List[float]) -> str:
+        fd, list_path = tempfile.mkstemp(prefix="rtmp-client-", suffix=".ffconcat")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("ffconcat version 1.0\n")
+            for path, duration in zip(files, durations):
+                f.write(f"file {_concat_quote(os.path.abspath(path))}\n")
+                # Explicit durations keep timestamps continuous across files
+                f.write(f"duration {duration:.6f}\n")
+        return list_path
+
+    @staticmethod
+    def _output_format(target: str) -> str:
+        return FANOUT_FORMAT if target == FANOUT_TARGET else "flv"
+
+    def _output_args(self, rtmp_url: str, mode: str) -> List[str]:
+        codec = copy_args() if mode == MODE_COPY else transcode_args(self._encode)
+        return codec + ["-f", self._output_format(rtmp_url), rtmp_url]
+
+    @staticmethod
+    def _seek_args(start: float) -> List[str]:
+        # Input-side seek: fast, and lands on the keyframe the resume logic picked
+        return ["-ss", f"{start:.3f}"] if start > 0 else []
+
+    def _build_file_command(
+        self, file_path: str, rtmp_url: str, mode: str = MODE_TRANSCODE, start: float = 0.0
+    ) -> List[str]:
+        cmd = [self._ffmpeg_path, "-hide_banner", "-re"] + self._seek_args(start) + ["-i", file_path]
+        return cmd + self._output_args(rtmp_url, mode)
+
+    def _build_tee_command(self, file_path: str, rtmp_url: str, cache_path: Path) -> List[str]:
+        # tee does not propagate the FLV global-header requirement to the encoders
+        cmd = [self._ffmpeg_path, "-hide_banner", "-re", "-i", file_path, "-map", "0:v:0?", "-map", "0:a:0?"]
+        cmd += transcode_args(self._encode) + ["-flags", "+global_header", "-f", "tee"]
+        primary = f"[f={self._output_format(rtmp_url)}]{_tee_escape(rtmp_url)}"
+        cmd.append(f"{primary}|[f=flv:onfail=ignore]{_tee_escape(str(cache_path))}")
+        return cmd
+
+    def _build_concat_command(
+        self, list_path: str, rtmp_url: str, loop: bool, mode: str = MODE_TRANSCODE, start: float = 0.0
+    ) -> List[str]:
+        cmd: List[str] = [self._ffmpeg_path, "-hide_banner", "-re"]
+        if loop:
+            # Later loop iterations restart from the top, not from the resume point
+            cmd += ["-stream_loop", "-1"]
+        cmd += self._seek_args(start) + ["-f", "concat", "-safe", "0", "-i", list_path]
+        return cmd + self._output_args(rtmp_url, mode)
+
+    def _run_single_file(
+        self, file_path: str, rtmp_url: str, mode: str = MODE_TRANSCODE, start: float = 0.0
+    ) -> int:
+        return self._run_process(self._file_command(file_path, rtmp_url, mode, start), mode, file_path)
+
+    def _preview_channel(self, source: Optional[str]) -> Optional[PreviewChannel]:
+        # Only for inputs known to have video: an output without streams makes FFmpeg refuse the command
+        if self._preview is None or not source:
+            return None
+        info = self._probe(source)
+        if info is None or not info.has_video:
+            return None
+        return PreviewChannel(self._preview)
+
+    def _run_process(self, cmd: List[str], mode: str = MODE_TRANSCODE, preview_source: Optional[str] = None) -> int:
+        channel: Optional[ProgressChannel] = None
+        preview: Optional[PreviewChannel] = None
+        supervisor: Optional[ProcessSupervisor] = None
+        self._attempt_stalled = False
         try:
-            creationflags = 0
+            # Machine-readable progress goes to its own channel; stderr keeps only the human log
+            channel = ProgressChannel(self._stats_period)
+            cmd = cmd[:1] + channel.ffmpeg_args() + cmd[1:]
+            popen_kwargs = channel.popen_kwargs()
+            preview = self._preview_channel(preview_source)
+            if preview is not None:
+                # Same process, extra output: what goes out is what the preview shows
+                cmd = cmd + preview.ffmpeg_args(self._encode if mode == MODE_TRANSCODE else None)
+                fds = popen_kwargs.get("pass_fds", ()) + preview.popen_kwargs().get("pass_fds", ())
+                if fds:
+                    popen_kwargs["pass_fds"] = fds
+            group_kwargs = group_popen_kwargs()
+            popen_kwargs.update(group_kwargs)
+            creationflags = group_kwargs.get("creationflags", 0)
             startupinfo = None
             if os.name == "nt":
-                creationflags = subprocess.CREATE_NO_WINDOW  # type: ignore[attr-defined]
+                creationflags |= subprocess.CREATE_NO_WINDOW  # type: ignore[attr-defined]
+            popen_kwargs["creationflags"] = creationflags
             with self._lock:
                 self._process = subprocess.Popen(
                     cmd,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     stdin=subprocess.PIPE,
-                    text=True,
-                    bufsize=1,
-                    universal_newlines=True,
-                    creationflags=creationflags,
                     startupinfo=startupinfo,
+                    **popen_kwargs,
+                )
+                fanout = self._fanout
+                supervisor = self._supervisor = ProcessSupervisor(
+                    self._process, self._lifecycle, self._on_stall, self._record_stop
+                )
+                self._watchdog = supervisor.watchdog
+            supervisor.start()
+            self._mark_spawned()
+            if self._stop_event.is_set():
+                # stop_stream() ran while the process was being spawned
+                supervisor.request_stop("stop")
+            channel.after_spawn()
+            self._progress_thread = threading.Thread(target=channel.read, args=(self._handle_progress,))
+            self._progress_thread.daemon = True
+            self._progress_thread.start()
+            if preview is not None:
+                preview.after_spawn()
+                self._preview_thread = threading.Thread(
+                    target=preview.read, args=(self.on_preview_frame.emit,), name="ffmpeg-preview", daemon=True
                 )
-            # Start readers for this process
-            self._stdout_thread = threading.Thread(target=self._read_stream, args=(self._process.stdout,))
+                self._preview_thread.start()
+            # Start readers for this process; in a fan-out session stdout carries the encoded stream
+            stdout_target = self._feed_fanout if fanout is not None else self._read_stream
+            self._stdout_thread = threading.Thread(target=stdout_target, args=(self._process.stdout,))
             self._stderr_thread = threading.Thread(target=self._read_stream, args=(self._process.stderr,))
             self._stdout_thread.daemon = True
             self._stderr_thread.daemon = True
@@ -146,32 +1211,141 @@ class FFMpegRunner(QObject):
 
             exit_code = self._process.wait()
         except Exception as exc:
-            self.on_log.emit(f"[runner] Gagal menjalankan FFmpeg: {exc}\n")
+            self._log(f"[runner] Gagal menjalankan FFmpeg: {exc}\n")
             return -1
         finally:
-            # Best-effort cleanup
+            if supervisor is not None:
+                supervisor.finish()
+                self._attempt_stalled = supervisor.stalled
             with self._lock:
                 proc = self._process
-            if proc is not None:
-                try:
-                    if proc.stdout:
-                        proc.stdout.close()
-                    if proc.stderr:
-                        proc.stderr.close()
-                except Exception:
-                    pass
-            if self._stdout_thread:
-                self._stdout_thread.join(timeout=0.2)
-            if self._stderr_thread:
-                self._stderr_thread.join(timeout=0.2)
+                self._supervisor = None
+                self._watchdog = None
+            self._close_process(proc, [self._stdout_thread, self._stderr_thread, self._progress_thread])
+            self._progress_thread = None
+            if self._preview_thread:
+                self._preview_thread.join(timeout=1.0)
+                self._preview_thread = None
+            if channel is not None:
+                channel.close()
+            if preview is not None:
+                preview.close()
         return exit_code
 
+    def _close_process(self, proc: Optional[subprocess.Popen], readers: List[Optional[threading.Thread]]) -> None:
+        # Readers stop at EOF, which comes once every holder of the pipes has exited. Anything
+        # FFmpeg left behind in its group is killed so no reader thread outlives its process.
+        if proc is None:
+            return
+        try:
+            if proc.stdin:
+                proc.stdin.close()
+        except Exception:
+            pass
+        alive = self._join_readers(readers, READER_JOIN_S)
+        if alive and proc.returncode is not None:
+            reap_group(proc.pid)
+            alive = self._join_readers(alive, READER_JOIN_S)
+        if alive:
+            with self._lock:
+                self._lifecycle_stats.leaked_readers += len(alive)
+            self._log(f"[runner] {len(alive)} pembaca pipe FFmpeg belum selesai, dibiarkan berjalan\n")
+            return
+        # Readers close their own streams; this covers a reader that never started
+        for stream in (proc.stdout, proc.stderr):
+            try:
+                if stream:
+                    stream.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _join_readers(readers: List[Optional[threading.Thread]], timeout: float) -> List[threading.Thread]:
+        deadline = time.monotonic() + timeout
+        for thread in readers:
+            if thread is not None:
+                thread.join(max(0.0, deadline - time.monotonic()))
+        return [t for t in readers if t is not None and t.is_alive()]
+
+    def _mark_spawned(self) -> None:
+        self._spawned_at = time.monotonic()
+        self._awaiting_output = True
+
+    def _observe_output(self) -> None:
+        # Every progress report; the first one of a process yields its start latency and, when it
+        # begins a new playlist item, the gap since the previous item's last report
+        now = time.monotonic()
+        if self._awaiting_output:
+            self._awaiting_output = False
+            gap = now - self._last_output_at if self._item_switch and self._last_output_at is not None else None
+            self._item_switch = False
+            self.on_output_started.emit(OutputStart(now - self._spawned_at, gap))
+        self._last_output_at = now
+
+    def _on_stall(self, idle: float) -> None:
+        # Runs on the supervisor thread just before the stalled process is stopped
+        with self._lock:
+            self._lifecycle_stats.stall_restarts += 1
+        self._log(f"[runner] Output FFmpeg tidak bergerak {idle:.0f} detik, proses di-restart\n")
+
+    def _record_stop(self, outcome: StopOutcome) -> None:
+        with self._lock:
+            self._lifecycle_stats.record_stop(outcome)
+        self._log(f"[runner] {outcome.describe()}\n")
+
+    def _log(self, text: str) -> None:
+        self._log_buffer.write(text)
+
     def _read_stream(self, stream) -> None:
         if stream is None:
             return
-        for line in stream:
-            self.on_log.emit(line)
+        pump_lines(stream, self._log_buffer)
         try:
             stream.close()
         except Exception:
             pass
+
+    def _feed_fanout(self, stream) -> None:
+        fanout = self._fanout
+        if stream is None or fanout is None:
+            return
+        cutover = self._cutover
+        if cutover is not None and not cutover.switched:
+            cutover.feed_programme(stream)
+        else:
+            fanout.feed(stream)
+        try:
+            # Unblocks the encoder if feeding stopped early (all destinations failed)
+            stream.close()
+        except Exception:
+            pass
+
+    def _handle_progress(self, sample: ProgressSample) -> None:
+        # Runs on the progress reader thread, never on the GUI thread
+        self._last_progress = sample
+        self._attempt_progress = sample
+        watchdog = self._watchdog
+        if watchdog is not None:
+            watchdog.observe(sample)
+        self._observe_output()
+        self.on_progress.emit(sample)
+        self._observe_adaptive(sample)
+        self._observe_congestion(sample)
+        if self._timeline is not None:
+            self._track_gapless_position(self._resume_offset + sample.out_time)
+
+    def _track_gapless_position(self, seconds: float) -> None:
+        with self._lock:
+            timeline = self._timeline
+            if timeline is None:
+                return
+            index = timeline.index_at(seconds)
+            if index == self._timeline_index:
+                return
+            self._timeline_index = index
+            self._current_index = index
+            current = self._timeline_files[index]
+            upcoming = self._timeline_files[(index + 1) % len(self._timeline_files)]
+        self.on_file_started.emit(current)
+        if upcoming != current:
+            self._warm_next(upcoming)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+PROFILES_VERSION = 1
+
+
+def host_id() -> str:
+    return platform.node() or "localhost"
+
+
+@dataclass
+class HostProfile:
+    # The best encode profile this host sustained in `calibrate`, for `channels` concurrent
+    # encoders with `headroom` to spare. height/fps are caps: sources are never scaled up.
+    preset: str
+    height: Optional[int] = None  # None = source resolution
+    fps: Optional[float] = None  # None = source frame rate
+    channels: int = 1
+    headroom: float = 0.0
+    speed: float = 0.0  # slowest encoder's speed with this profile
+    video_bitrate_kbps: int = 0
+    source: str = ""  # synthetic source it was measured on, e.g. 1920x1080@30
+    cpu_count: int = 0
+    ffmpeg_version: str = ""
+    calibrated_at: float = 0.0  # unix time
+    results: List[Dict[str, object]] = field(default_factory=list)  # every trial, best profile first
+
+    def describe(self) -> str:
+        parts = [self.preset]
+        if self.height:
+            parts.append(f"{self.height}p")
+        if self.fps:
+            parts.append(f"{self.fps:g}fps")
+        return (
+            f"{'/'.join(parts)} ({self.speed:.2f}x untuk {self.channels} channel, "
+            f"headroom {self.headroom:.0%}, sumber {self.source or '?'})"
+        )
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "HostProfile":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})  # type: ignore[arg-type]
+
+
+def _read_profiles(path: Path) -> Dict[str, object]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def load_host_profile(path: Path, host: Optional[str] = None) -> Optional[HostProfile]:
+    # None when this host was never calibrated, or when its CPU count changed since (resized VM)
+    data = _read_profiles(path)
+    if data.get("version") != PROFILES_VERSION:
+        return None
+    hosts = data.get("hosts")
+    entry = hosts.get(host or host_id()) if isinstance(hosts, dict) else None
+    if not isinstance(entry, dict):
+        return None
+    try:
+        profile = HostProfile.from_dict(entry)
+    except Exception:
+        return None
+    if profile.cpu_count and profile.cpu_count != (os.cpu_count() or 0):
+        return None
+    return profile
+
+
+def save_host_profile(path: Path, profile: HostProfile, host: Optional[str] = None) -> bool:
+    # Other hosts' entries (a synced config dir) and any other keys in the file are kept
+    data = _read_profiles(path)
+    if data.get("version") != PROFILES_VERSION:
+        data = {"version": PROFILES_VERSION}
+    hosts = data.get("hosts")
+    if not isinstance(hosts, dict):
+        hosts = data["hosts"] = {}
+    hosts[host or host_id()] = profile.to_dict()
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except Exception:
+        return False
+    return True
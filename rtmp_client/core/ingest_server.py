@@ -0,0 +1,634 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .async_runner import AsyncEngine
+from .events import Event
+
+
+# Local stand-in for an RTMP ingest: enough of the protocol for FFmpeg (and similar publishers) to
+# handshake, connect, publish and send FLV audio/video. Nothing is decoded or forwarded; every message
+# is timestamped so ingest bitrate, jitter and stalls can be measured, and the link can be impaired
+# (throttle, reply latency, forced drops, refused connections) to exercise reconnect and bitrate logic.
+
+DEFAULT_APP = "live"
+DEFAULT_STREAM_KEY = "stream"
+HANDSHAKE_SIZE = 1536
+DEFAULT_CHUNK_SIZE = 128
+SERVER_CHUNK_SIZE = 4096
+WINDOW_ACK_SIZE = 2500000
+
+MSG_SET_CHUNK_SIZE = 1
+MSG_ABORT = 2
+MSG_ACK = 3
+MSG_USER_CONTROL = 4
+MSG_WINDOW_ACK_SIZE = 5
+MSG_SET_PEER_BANDWIDTH = 6
+MSG_AUDIO = 8
+MSG_VIDEO = 9
+MSG_DATA_AMF0 = 18
+MSG_COMMAND_AMF0 = 20
+MSG_AGGREGATE = 22
+
+STATE_HANDSHAKE = "handshake"
+STATE_CONNECTED = "connected"
+STATE_PUBLISHING = "publishing"
+STATE_CLOSED = "closed"
+
+# Bounded per-session message history (about an hour of 30 fps video + audio)
+MAX_RECORDS = 250000
+
+
+# AMF0 (only the types RTMP commands and onMetaData use)
+class _Undefined:
+    pass
+
+
+UNDEFINED = _Undefined()
+
+
+def amf0_encode(*values) -> bytes:
+    out = bytearray()
+    for value in values:
+        _amf0_write(out, value)
+    return bytes(out)
+
+
+def _amf0_write(out: bytearray, value) -> None:
+    if value is None:
+        out.append(0x05)
+    elif value is UNDEFINED:
+        out.append(0x06)
+    elif isinstance(value, bool):
+        out += bytes((0x01, 1 if value else 0))
+    elif isinstance(value, (int, float)):
+        out.append(0x00)
+        out += struct.pack(">d", float(value))
+    elif isinstance(value, str):
+        raw = value.encode("utf-8")
+        if len(raw) > 0xFFFF:
+            out.append(0x0C)
+            out += struct.pack(">I", len(raw)) + raw
+        else:
+            out.append(0x02)
+            out += struct.pack(">H", len(raw)) + raw
+    elif isinstance(value, dict):
+        out.append(0x03)
+        for key, item in value.items():
+            raw = str(key).encode("utf-8")
+            out += struct.pack(">H", len(raw)) + raw
+            _amf0_write(out, item)
+        out += b"\x00\x00\x09"
+    elif isinstance(value, (list, tuple)):
+        out.append(0x0A)
+        out += struct.pack(">I", len(value))
+        for item in value:
+            _amf0_write(out, item)
+    else:
+        raise TypeError(f"AMF0 tidak mendukung {type(value).__name__}")
+
+
+def amf0_decode(data: bytes) -> List:
+    values = []
+    pos = 0
+    while pos < len(data):
+        value, pos = _amf0_read(data, pos)
+        values.append(value)
+    return values
+
+
+def _amf0_read(data: bytes, pos: int):
+    marker = data[pos]
+    pos += 1
+    if marker == 0x00:
+        return struct.unpack_from(">d", data, pos)[0], pos + 8
+    if marker == 0x01:
+        return data[pos] != 0, pos + 1
+    if marker == 0x02:
+        (size,) = struct.unpack_from(">H", data, pos)
+        return data[pos + 2:pos + 2 + size].decode("utf-8", "replace"), pos + 2 + size
+    if marker == 0x0C:
+        (size,) = struct.unpack_from(">I", data, pos)
+        return data[pos + 4:pos + 4 + size].decode("utf-8", "replace"), pos + 4 + size
+    if marker in (0x03, 0x08):
+        if marker == 0x08:
+            pos += 4  # ECMA array count is advisory; the end marker terminates it
+        obj: Dict[str, object] = {}
+        while True:
+            (size,) = struct.unpack_from(">H", data, pos)
+            pos += 2
+            if size == 0 and data[pos] == 0x09:
+                return obj, pos + 1
+            key = data[pos:pos + size].decode("utf-8", "replace")
+            obj[key], pos = _amf0_read(data, pos + size)
+    if marker == 0x05:
+        return None, pos
+    if marker == 0x06:
+        return UNDEFINED, pos
+    if marker == 0x0A:
+        (count,) = struct.unpack_from(">I", data, pos)
+        pos += 4
+        items = []
+        for _ in range(count):
+            item, pos = _amf0_read(data, pos)
+            items.append(item)
+        return items, pos
+    if marker == 0x0B:
+        return struct.unpack_from(">d", data, pos)[0], pos + 10
+    raise ValueError(f"marker AMF0 tidak dikenal: {marker:#x}")
+
+
+@dataclass
+class IngestImpairments:
+    # Read live on every use, so a test may change them while a session is publishing
+    throttle_kbps: Optional[float] = None  # cap on what the server reads; TCP backpressure slows the client
+    latency_ms: float = 0.0  # added before every server reply (handshake, command results)
+    drop_after_s: Optional[float] = None  # close the connection once media reaches this timestamp
+    max_drops: int = 1  # forced drops across the server's lifetime; -1 = every session
+    refuse_first: int = 0  # close this many new connections right after accept
+
+
+@dataclass
+class MessageRecord:
+    arrival: float  # monotonic seconds
+    kind: int  # MSG_AUDIO / MSG_VIDEO / MSG_DATA_AMF0
+    size: int  # payload bytes
+    timestamp_ms: int
+    delta_ms: int  # timestamp delta to the previous message of the same kind
+
+
+@dataclass
+class IngestReport:
+    duration_s: float
+    bytes: int
+    video_bytes: int
+    audio_bytes: int
+    video_frames: int
+    keyframes: int
+    audio_frames: int
+    bitrate_kbps: float  # whole session
+    recent_bitrate_kbps: float  # last window_s seconds of arrivals
+    media_s: float  # timestamp span received
+    video_jitter_ms: float  # RFC 3550 interarrival jitter against media timestamps
+    audio_jitter_ms: float
+    max_video_delta_ms: int
+    stalls: int
+    stall_s: float
+    longest_stall_s: float
+    stalled: bool  # no media for stall_threshold_s right now
+    lag_s: float  # wall clock spent minus media time received; > 0 = falling behind realtime
+
+    def describe(self) -> str:
+        text = (
+            f"{self.bitrate_kbps:.0f} kbps (baru {self.recent_bitrate_kbps:.0f}), media {self.media_s:.1f}s, "
+            f"jitter {self.video_jitter_ms:.1f} ms, stall {self.stalls}x/{self.stall_s:.1f}s, lag {self.lag_s:+.2f}s"
+        )
+        return text + (" [STALL]" if self.stalled else "")
+
+
+class IngestStats:
+    def __init__(self, stall_threshold_s: float = 1.0, window_s: float = 5.0) -> None:
+        self.stall_threshold_s = stall_threshold_s
+        self.window_s = window_s
+        self.records: Deque[MessageRecord] = deque(maxlen=MAX_RECORDS)
+        self.first_arrival: Optional[float] = None
+        self.last_arrival: Optional[float] = None
+        self.bytes = 0
+        self.video_bytes = 0
+        self.audio_bytes = 0
+        self.video_frames = 0
+        self.keyframes = 0
+        self.audio_frames = 0
+        self.stalls = 0
+        self.stall_s = 0.0
+        self.longest_stall_s = 0.0
+        self.max_video_delta_ms = 0
+        self._first_ts: Optional[int] = None
+        self._last_ts: Dict[int, int] = {}
+        self._max_ts = 0
+        self._transit: Dict[int, float] = {}
+        self._jitter: Dict[int, float] = {MSG_AUDIO: 0.0, MSG_VIDEO: 0.0}
+        self._window: Deque[Tuple[float, int]] = deque()
+        self._window_bytes = 0
+
+    def record(self, arrival: float, kind: int, payload: bytes, timestamp_ms: int) -> None:
+        size = len(payload)
+        if self.last_arrival is not None:
+            gap = arrival - self.last_arrival
+            if gap >= self.stall_threshold_s:
+                self.stalls += 1
+                self.stall_s += gap
+                self.longest_stall_s = max(self.longest_stall_s, gap)
+        if self.first_arrival is None:
+            self.first_arrival = arrival
+        self.last_arrival = arrival
+        delta = timestamp_ms - self._last_ts.get(kind, timestamp_ms)
+        self._last_ts[kind] = timestamp_ms
+        self.records.append(MessageRecord(arrival, kind, size, timestamp_ms, delta))
+        self.bytes += size
+        self._window.append((arrival, size))
+        self._window_bytes += size
+        if kind == MSG_VIDEO:
+            self.video_bytes += size
+            self.video_frames += 1
+            if payload and payload[0] >> 4 == 1:
+                self.keyframes += 1
+            self.max_video_delta_ms = max(self.max_video_delta_ms, delta)
+        elif kind == MSG_AUDIO:
+            self.audio_bytes += size
+            self.audio_frames += 1
+        if kind in self._jitter:
+            if self._first_ts is None:
+                self._first_ts = timestamp_ms
+            self._max_ts = max(self._max_ts, timestamp_ms)
+            transit = arrival - timestamp_ms / 1000.0
+            previous = self._transit.get(kind)
+            if previous is not None:
+                d = abs(transit - previous)
+                self._jitter[kind] += (d - self._jitter[kind]) / 16.0
+            self._transit[kind] = transit
+
+    def report(self, now: Optional[float] = None, live: bool = True) -> IngestReport:
+        now = time.monotonic() if now is None else now
+        while self._window and self._window[0][0] < now - self.window_s:
+            self._window_bytes -= self._window.popleft()[1]
+        end = now if live else (self.last_arrival or now)
+        duration = end - self.first_arrival if self.first_arrival is not None else 0.0
+        media_s = (self._max_ts - self._first_ts) / 1000.0 if self._first_ts is not None else 0.0
+        recent_span = min(self.window_s, duration) if duration > 0 else 0.0
+        return IngestReport(
+            duration_s=duration,
+            bytes=self.bytes,
+            video_bytes=self.video_bytes,
+            audio_bytes=self.audio_bytes,
+            video_frames=self.video_frames,
+            keyframes=self.keyframes,
+            audio_frames=self.audio_frames,
+            bitrate_kbps=self.bytes * 8 / duration / 1000 if duration > 0 else 0.0,
+            recent_bitrate_kbps=self._window_bytes * 8 / recent_span / 1000 if recent_span > 0 else 0.0,
+            media_s=media_s,
+            video_jitter_ms=self._jitter[MSG_VIDEO] * 1000,
+            audio_jitter_ms=self._jitter[MSG_AUDIO] * 1000,
+            max_video_delta_ms=self.max_video_delta_ms,
+            stalls=self.stalls,
+            stall_s=self.stall_s,
+            longest_stall_s=self.longest_stall_s,
+            stalled=live and self.last_arrival is not None and now - self.last_arrival >= self.stall_threshold_s,
+            lag_s=duration - media_s if self.first_arrival is not None else 0.0,
+        )
+
+
+class _ChunkStream:
+    # Reassembly state of one chunk stream id
+    __slots__ = ("timestamp", "ts_field", "length", "type", "stream_id", "extended", "payload")
+
+    def __init__(self) -> None:
+        self.timestamp = 0
+        self.ts_field = 0
+        self.length = 0
+        self.type = 0
+        self.stream_id = 0
+        self.extended = False
+        self.payload = bytearray()
+
+
+class _SessionClosed(Exception):
+    pass
+
+
+class IngestSession:
+    def __init__(self, server: "RtmpIngestServer", index: int, reader, writer) -> None:
+        self.server = server
+        self.index = index
+        peer = writer.get_extra_info("peername")
+        self.peer = f"{peer[0]}:{peer[1]}" if isinstance(peer, tuple) else str(peer)
+        self.accepted = time.monotonic()
+        self.state = STATE_HANDSHAKE
+        self.app = ""
+        self.stream_key = ""
+        self.publish_started: Optional[float] = None
+        self.ended: Optional[float] = None
+        self.close_reason = ""
+        self.metadata: Dict[str, object] = {}
+        self.bytes_in = 0
+        self.stats = IngestStats(server.stall_threshold_s)
+        self._reader = reader
+        self._writer = writer
+        self._in_chunk_size = DEFAULT_CHUNK_SIZE
+        self._chunk_streams: Dict[int, _ChunkStream] = {}
+        self._paced_until = 0.0
+        self._unpublished = False
+
+    @property
+    def first_media(self) -> Optional[float]:
+        return self.stats.first_arrival
+
+    @property
+    def last_media(self) -> Optional[float]:
+        return self.stats.last_arrival
+
+    def report(self) -> IngestReport:
+        return self.stats.report(live=self.ended is None)
+
+    async def run(self) -> None:
+        try:
+            await self._handshake()
+            self.state = STATE_CONNECTED
+            while True:
+                msg_type, stream_id, timestamp, payload = await self._read_message()
+                await self._handle(msg_type, stream_id, timestamp, payload)
+        except _SessionClosed as exc:
+            self.close_reason = str(exc)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.close_reason = "selesai" if self._unpublished else "koneksi putus"
+        except asyncio.CancelledError:
+            self.close_reason = "server berhenti"
+        except Exception as exc:
+            self.close_reason = f"error: {exc}"
+        finally:
+            self.state = STATE_CLOSED
+            self.ended = time.monotonic()
+            self._writer.close()
+
+    def close(self) -> None:
+        self._writer.close()
+
+    # Wire I/O
+    async def _read(self, size: int) -> bytes:
+        data = await self._reader.readexactly(size)
+        self.bytes_in += size
+        kbps = self.server.impairments.throttle_kbps
+        if kbps:
+            # Pacing clock instead of a running average, so a changed limit applies immediately
+            now = time.monotonic()
+            self._paced_until = max(self._paced_until, now) + size * 8 / (kbps * 1000)
+            if self._paced_until - now > 0.005:
+                await asyncio.sleep(self._paced_until - now)
+        return data
+
+    async def _write(self, data: bytes) -> None:
+        latency = self.server.impairments.latency_ms
+        if latency > 0:
+            # Delayed, not blocking: replies keep their order and reading goes on meanwhile
+            asyncio.get_running_loop().call_later(latency / 1000.0, self._write_now, data)
+            return
+        self._writer.write(data)
+        await self._writer.drain()
+
+    def _write_now(self, data: bytes) -> None:
+        if not self._writer.is_closing():
+            self._writer.write(data)
+
+    async def _handshake(self) -> None:
+        c0c1 = await self._read(1 + HANDSHAKE_SIZE)
+        if c0c1[0] != 3:
+            raise _SessionClosed(f"versi RTMP {c0c1[0]} tidak didukung")
+        # Zero version bytes in S1 select the plain (digest-less) handshake
+        s1 = struct.pack(">II", int(time.monotonic() * 1000) & 0xFFFFFFFF, 0) + os.urandom(HANDSHAKE_SIZE - 8)
+        s2 = c0c1[1:5] + struct.pack(">I", int(time.monotonic() * 1000) & 0xFFFFFFFF) + c0c1[9:]
+        await self._write(b"\x03" + s1 + s2)
+        await self._read(HANDSHAKE_SIZE)  # C2, echo of S1
+
+    async def _read_message(self) -> Tuple[int, int, int, bytes]:
+        while True:
+            first = (await self._read(1))[0]
+            fmt = first >> 6
+            csid = first & 0x3F
+            if csid == 0:
+                csid = 64 + (await self._read(1))[0]
+            elif csid == 1:
+                extra = await self._read(2)
+                csid = 64 + extra[0] + extra[1] * 256
+            cs = self._chunk_streams.get(csid)
+            if cs is None:
+                cs = self._chunk_streams[csid] = _ChunkStream()
+            if fmt < 3:
+                header = await self._read((11, 7, 3)[fmt])
+                ts = int.from_bytes(header[0:3], "big")
+                if fmt < 2:
+                    cs.length = int.from_bytes(header[3:6], "big")
+                    cs.type = header[6]
+                if fmt == 0:
+                    cs.stream_id = int.from_bytes(header[7:11], "little")
+                cs.extended = ts == 0xFFFFFF
+                if cs.extended:
+                    ts = int.from_bytes(await self._read(4), "big")
+                cs.ts_field = ts
+                cs.timestamp = ts if fmt == 0 else cs.timestamp + ts
+                cs.payload = bytearray()
+            else:
+                if cs.extended:
+                    await self._read(4)
+                if not cs.payload:
+                    # Type 3 starting a new message repeats the previous delta (as FFmpeg reads it)
+                    cs.timestamp += cs.ts_field
+            need = min(self._in_chunk_size, cs.length - len(cs.payload))
+            if need > 0:
+                cs.payload += await self._read(need)
+            if len(cs.payload) >= cs.length:
+                payload = bytes(cs.payload)
+                cs.payload = bytearray()
+                return cs.type, cs.stream_id, cs.timestamp, payload
+
+    async def _send(self, csid: int, msg_type: int, payload: bytes, stream_id: int = 0, timestamp: int = 0) -> None:
+        out = bytearray()
+        out.append(csid)  # fmt 0, csid < 64
+        out += min(timestamp, 0xFFFFFF).to_bytes(3, "big") + len(payload).to_bytes(3, "big")
+        out.append(msg_type)
+        out += stream_id.to_bytes(4, "little")
+        for offset in range(0, len(payload), SERVER_CHUNK_SIZE):
+            if offset:
+                out.append(0xC0 | csid)
+            out += payload[offset:offset + SERVER_CHUNK_SIZE]
+        await self._write(bytes(out))
+
+    async def _send_command(self, *values, stream_id: int = 0) -> None:
+        await self._send(5 if stream_id else 3, MSG_COMMAND_AMF0, amf0_encode(*values), stream_id)
+
+    # Protocol
+    async def _handle(self, msg_type: int, stream_id: int, timestamp: int, payload: bytes) -> None:
+        if msg_type in (MSG_AUDIO, MSG_VIDEO):
+            self.stats.record(time.monotonic(), msg_type, payload, timestamp)
+            self.server._media_received(self, timestamp)
+        elif msg_type == MSG_SET_CHUNK_SIZE:
+            self._in_chunk_size = max(1, int.from_bytes(payload[:4], "big") & 0x7FFFFFFF)
+        elif msg_type == MSG_ABORT:
+            cs = self._chunk_streams.get(int.from_bytes(payload[:4], "big"))
+            if cs is not None:
+                cs.payload = bytearray()
+        elif msg_type == MSG_COMMAND_AMF0:
+            await self._handle_command(amf0_decode(payload), stream_id)
+        elif msg_type == MSG_DATA_AMF0:
+            values = amf0_decode(payload)
+            if values and values[0] == "@setDataFrame":
+                values = values[1:]
+            if len(values) >= 2 and values[0] == "onMetaData" and isinstance(values[1], dict):
+                self.metadata = values[1]
+        elif msg_type == MSG_AGGREGATE:
+            self.stats.bytes += len(payload)
+        # Ack / window size / user control / peer bandwidth from the client need no reply
+
+    async def _handle_command(self, values: List, stream_id: int) -> None:
+        if not values or not isinstance(values[0], str):
+            return
+        name = values[0]
+        txn = values[1] if len(values) > 1 else 0
+        if name == "connect":
+            params = values[2] if len(values) > 2 and isinstance(values[2], dict) else {}
+            self.app = str(params.get("app", ""))
+            await self._send(2, MSG_WINDOW_ACK_SIZE, struct.pack(">I", WINDOW_ACK_SIZE))
+            await self._send(2, MSG_SET_PEER_BANDWIDTH, struct.pack(">IB", WINDOW_ACK_SIZE, 2))
+            await self._send(2, MSG_SET_CHUNK_SIZE, struct.pack(">I", SERVER_CHUNK_SIZE))
+            await self._send(2, MSG_USER_CONTROL, struct.pack(">HI", 0, 0))  # StreamBegin 0
+            await self._send_command(
+                "_result",
+                txn,
+                {"fmsVer": "FMS/3,0,1,123", "capabilities": 31},
+                {
+                    "level": "status",
+                    "code": "NetConnection.Connect.Success",
+                    "description": "Connection succeeded.",
+                    "objectEncoding": 0,
+                },
+            )
+        elif name == "createStream":
+            await self._send_command("_result", txn, None, 1)
+        elif name in ("releaseStream", "FCPublish"):
+            await self._send_command("_result", txn, None, UNDEFINED)
+        elif name == "publish":
+            self.stream_key = str(values[3]) if len(values) > 3 else ""
+            self.state = STATE_PUBLISHING
+            self.publish_started = time.monotonic()
+            await self._send(2, MSG_USER_CONTROL, struct.pack(">HI", 0, stream_id or 1))
+            await self._send_command(
+                "onStatus",
+                0,
+                None,
+                {
+                    "level": "status",
+                    "code": "NetStream.Publish.Start",
+                    "description": f"{self.stream_key} is now published.",
+                    "details": self.stream_key,
+                },
+                stream_id=stream_id or 1,
+            )
+            self.server._published(self)
+        elif name in ("FCUnpublish", "deleteStream", "closeStream"):
+            self._unpublished = True
+        elif txn:
+            # Unknown call expecting an answer: a null result keeps publishers from waiting on it
+            await self._send_command("_result", txn, None, UNDEFINED)
+
+
+class RtmpIngestServer:
+    # Listens on localhost by default, so rtmp://localhost:<port>/live/<key> (or 127.0.0.1) just works.
+    # Async API for an existing loop (start/close); start_background/stop_background run it on its own
+    # AsyncEngine thread for threaded callers (benchmarks, the CLI, ad-hoc scripts).
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 0,
+        impairments: Optional[IngestImpairments] = None,
+        stall_threshold_s: float = 1.0,
+    ) -> None:
+        self.host = host
+        self.requested_port = port
+        self.impairments = impairments or IngestImpairments()
+        self.stall_threshold_s = stall_threshold_s
+        self.on_session_started = Event()  # IngestSession, after publish
+        self.on_session_ended = Event()  # IngestSession
+        self.sessions: List[IngestSession] = []
+        self.connections = 0
+        self.drops = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks: List[asyncio.Task] = []
+        self._engine: Optional[AsyncEngine] = None
+        self._own_engine = False
+
+    @property
+    def port(self) -> int:
+        if self._server is None or not self._server.sockets:
+            return self.requested_port
+        return self._server.sockets[0].getsockname()[1]
+
+    def url(self, stream_key: str = DEFAULT_STREAM_KEY, app: str = DEFAULT_APP) -> str:
+        host = "localhost" if self.host in ("localhost", "127.0.0.1", "::1", "") else self.host
+        return f"rtmp://{host}:{self.port}/{app}/{stream_key}"
+
+    def latest_session(self, stream_key: Optional[str] = None) -> Optional[IngestSession]:
+        for session in reversed(list(self.sessions)):
+            if stream_key is None or session.stream_key == stream_key:
+                return session
+        return None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._accept, self.host or None, self.requested_port)
+        if not self.requested_port:
+            # Every address (127.0.0.1 and ::1) must share the port picked for the first one
+            port = self.port
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = await asyncio.start_server(self._accept, self.host or None, port)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        for session in list(self.sessions):
+            session.close()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_background(self, engine: Optional[AsyncEngine] = None, timeout: float = 10.0) -> None:
+        self._own_engine = engine is None
+        self._engine = engine or AsyncEngine()
+        self._engine.submit(self.start()).result(timeout)
+
+    def stop_background(self, timeout: float = 10.0) -> None:
+        engine, self._engine = self._engine, None
+        if engine is None:
+            return
+        engine.submit(self.close()).result(timeout)
+        if self._own_engine:
+            engine.close()
+
+    async def _accept(self, reader, writer) -> None:
+        self.connections += 1
+        if self.connections <= self.impairments.refuse_first:
+            writer.close()
+            return
+        session = IngestSession(self, len(self.sessions), reader, writer)
+        self.sessions.append(session)
+        task = asyncio.current_task()
+        if task is not None:
+            self._tasks.append(task)
+        try:
+            await session.run()
+        finally:
+            if task is not None and task in self._tasks:
+                self._tasks.remove(task)
+            if session.publish_started is not None:
+                self.on_session_ended.emit(session)
+
+    def _published(self, session: IngestSession) -> None:
+        self.on_session_started.emit(session)
+
+    def _media_received(self, session: IngestSession, timestamp_ms: int) -> None:
+        imp = self.impairments
+        if imp.drop_after_s is None or timestamp_ms < imp.drop_after_s * 1000:
+            return
+        if 0 <= imp.max_drops <= self.drops:
+            return
+        self.drops += 1
+        raise _SessionClosed(f"diputus server setelah {timestamp_ms / 1000:.1f}s media")
@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .events import Event
+from .settings import AppSettings
+
+
+# RTMP_CLIENT_INSTRUMENT=1 turns the counters on without touching settings;
+# RTMP_CLIENT_PROFILE=<seconds>[:sample|:cprofile] starts one capture when the app starts
+ENV_INSTRUMENT = "RTMP_CLIENT_INSTRUMENT"
+ENV_PROFILE = "RTMP_CLIENT_PROFILE"
+
+PROFILE_SAMPLE = "sample"
+PROFILE_CPROFILE = "cprofile"
+PROFILE_MODES = (PROFILE_SAMPLE, PROFILE_CPROFILE)
+
+SAMPLE_INTERVAL_S = 0.005
+MAX_STACK_DEPTH = 64
+REPORT_TOP = 25
+
+
+def instrumentation_enabled(settings: AppSettings) -> bool:
+    value = os.environ.get(ENV_INSTRUMENT, "").strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    return settings.instrumentation
+
+
+def profile_request_from_env() -> Optional[Tuple[float, str]]:
+    # (duration, mode) from RTMP_CLIENT_PROFILE, or None when unset or unreadable
+    value = os.environ.get(ENV_PROFILE, "").strip().lower()
+    if not value:
+        return None
+    duration, _, mode = value.partition(":")
+    mode = mode or PROFILE_SAMPLE
+    try:
+        seconds = float(duration)
+    except ValueError:
+        return None
+    if seconds <= 0 or mode not in PROFILE_MODES:
+        return None
+    return seconds, mode
+
+
+@dataclass
+class Timing:
+    count: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.count if self.count else 0.0
+
+
+@dataclass
+class InstrumentationReport:
+    window_s: float
+    counts: Dict[str, int] = field(default_factory=dict)
+    timings: Dict[str, Timing] = field(default_factory=dict)
+    lag: Timing = field(default_factory=Timing)
+
+    def rate(self, name: str) -> float:
+        return self.counts.get(name, 0) / self.window_s if self.window_s > 0 else 0.0
+
+    def busy_share(self, name: str) -> float:
+        # Fraction of the window spent inside one measured section
+        timing = self.timings.get(name)
+        return timing.total_s / self.window_s if timing is not None and self.window_s > 0 else 0.0
+
+    def describe(self) -> str:
+        # One log line: rates, the three most expensive sections, event-loop lag
+        parts = [f"[perf] {self.window_s:.0f}s"]
+        rates = [f"{name} {self.rate(name):.1f}/s" for name in sorted(self.counts) if self.counts[name]]
+        if rates:
+            parts.append(", ".join(rates))
+        ranked = sorted(self.timings.items(), key=lambda item: item[1].total_s, reverse=True)[:3]
+        if ranked:
+            parts.append(", ".join(
+                f"{name} {t.count}x rata-rata {t.mean_s * 1000:.2f} ms maks {t.max_s * 1000:.1f} ms "
+                f"({self.busy_share(name):.1%})"
+                for name, t in ranked
+            ))
+        if self.lag.count:
+            parts.append(f"lag loop rata-rata {self.lag.mean_s * 1000:.1f} ms maks {self.lag.max_s * 1000:.0f} ms")
+        return " | ".join(parts)
+
+    def lines(self) -> List[str]:
+        out = [f"Jendela: {self.window_s:.1f} detik", "", "Rate per detik:"]
+        for name in sorted(self.counts):
+            out.append(f"  {name:<40} {self.rate(name):>10.1f}  ({self.counts[name]})")
+        out += ["", "Waktu per bagian (total, jumlah, rata-rata, maks, porsi jendela):"]
+        for name, t in sorted(self.timings.items(), key=lambda item: item[1].total_s, reverse=True):
+            out.append(
+                f"  {name:<40} {t.total_s:>8.3f}s {t.count:>8} {t.mean_s * 1000:>9.3f}ms "
+                f"{t.max_s * 1000:>9.1f}ms {self.busy_share(name):>7.2%}"
+            )
+        if self.lag.count:
+            out += [
+                "",
+                f"Lag event loop: {self.lag.count} tick, rata-rata {self.lag.mean_s * 1000:.2f} ms, "
+                f"maks {self.lag.max_s * 1000:.1f} ms",
+            ]
+        return out
+
+
+class Instrumentation:
+    # Counters for the path between a runner and whoever displays it: how often each event fires,
+    # how long each measured section (GUI slots, log flushes) takes, and how late the UI's event
+    # loop runs. Off unless enabled; when on it costs a lock and two clock reads per measured call.
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._timings: Dict[str, Timing] = {}
+        self._lag = Timing()
+        self._since = time.monotonic()
+        # Monotonic counters owned elsewhere (e.g. log lines), read and diffed at report time
+        self._sources: Dict[str, Callable[[], int]] = {}
+        self._source_base: Dict[str, int] = {}
+        self._connections: List[Tuple[Event, Callable]] = []
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + n
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = Timing()
+            timing.add(seconds)
+
+    def record_lag(self, seconds: float) -> None:
+        with self._lock:
+            self._lag.add(max(0.0, seconds))
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def add_source(self, name: str, read: Callable[[], int]) -> None:
+        with self._lock:
+            self._sources[name] = read
+            self._source_base[name] = read()
+
+    def watch_runner(self, runner, names: Optional[List[str]] = None) -> None:
+        # Counts emissions on the runner's own threads, i.e. before any queueing to a UI
+        for name in names or runner.EVENTS:
+            event: Event = getattr(runner, name)
+            key = f"event.{name}"
+
+            def callback(*args, _key: str = key) -> None:
+                self.count(_key)
+
+            event.connect(callback)
+            self._connections.append((event, callback))
+        self.add_source("log.lines", lambda: runner.log_buffer.total_lines)
+
+    def detach(self) -> None:
+        for event, callback in self._connections:
+            event.disconnect(callback)
+        self._connections.clear()
+        with self._lock:
+            self._sources.clear()
+            self._source_base.clear()
+
+    def report(self, reset: bool = True) -> InstrumentationReport:
+        now = time.monotonic()
+        with self._lock:
+            counts = dict(self._counts)
+            for name, read in self._sources.items():
+                value = read()
+                counts[name] = value - self._source_base.get(name, 0)
+                if reset:
+                    self._source_base[name] = value
+            report = InstrumentationReport(
+                window_s=now - self._since,
+                counts=counts,
+                timings={name: Timing(t.count, t.total_s, t.max_s) for name, t in self._timings.items()},
+                lag=Timing(self._lag.count, self._lag.total_s, self._lag.max_s),
+            )
+            if reset:
+                self._counts.clear()
+                self._timings.clear()
+                self._lag = Timing()
+                self._since = now
+        return report
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileCapture:
+    # One profiling window written to a report file under `directory`.
+    # "sample" walks every thread's stack from its own thread (sys._current_frames), so the
+    # runner's reader threads show up next to the GUI thread; it is wall-clock, so threads
+    # blocked in read() or wait() are listed too. It stops itself after duration_s.
+    # "cprofile" traces every call, but only on the thread that calls start(); that thread must
+    # also call stop() (the GUI does both on its own thread, with a timer).
+    # on_finished(path) fires once the report is written, from whichever thread wrote it.
+
+    def __init__(
+        self,
+        directory: Path,
+        duration_s: float,
+        mode: str = PROFILE_SAMPLE,
+        interval_s: float = SAMPLE_INTERVAL_S,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> None:
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Mode profil tidak dikenal: {mode}")
+        self.directory = Path(directory)
+        self.duration_s = max(0.1, duration_s)
+        self.mode = mode
+        self.interval_s = max(0.001, interval_s)
+        # When given, its counters (not reset) head the report so rates and stacks can be read together
+        self.instrumentation = instrumentation
+        self.on_finished = Event()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.path = self.directory / f"profile-{stamp}-{mode}.txt"
+        self._started = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._profiler: Optional[cProfile.Profile] = None
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._finished = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._started > 0 and not self._finished
+
+    def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._started = time.monotonic()
+        if self.mode == PROFILE_CPROFILE:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+            return
+        self._thread = threading.Thread(target=self._sample_loop, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Optional[Path]:
+        # Ends the window early (or, for cprofile, at all) and writes the report; None if already written
+        if self.mode == PROFILE_CPROFILE:
+            if self._profiler is not None:
+                self._profiler.disable()
+            return self._finish()
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(5.0)
+        return self.path if self._finished else None
+
+    def _sample_loop(self) -> None:
+        own = threading.get_ident()
+        deadline = self._started + self.duration_s
+        while not self._stop.wait(self.interval_s):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                self._stacks[(names.get(ident, str(ident)), tuple(stack))] += 1
+            self._samples += 1
+            if time.monotonic() >= deadline:
+                break
+        self._finish()
+
+    def _finish(self) -> Optional[Path]:
+        with self._lock:
+            if self._finished:
+                return None
+            self._finished = True
+        elapsed = time.monotonic() - self._started
+        header = [
+            f"Profil {self.mode}, {elapsed:.1f} detik, dibuat {datetime.now().isoformat(timespec='seconds')}",
+            f"PID {os.getpid()}, Python {sys.version.split()[0]}",
+            "",
+        ]
+        if self.instrumentation is not None:
+            header += self.instrumentation.report(reset=False).lines() + [""]
+        try:
+            if self.mode == PROFILE_CPROFILE:
+                body = self._cprofile_report()
+            else:
+                body = self._sample_report()
+            self.path.write_text("\n".join(header + body) + "\n", encoding="utf-8")
+        except OSError:
+            return None
+        self.on_finished.emit(self.path)
+        return self.path
+
+    def _cprofile_report(self) -> List[str]:
+        assert self._profiler is not None
+        self._profiler.dump_stats(str(self.path.with_suffix(".prof")))  # for snakeviz / pstats
+        text = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=text)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_TOP * 2)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(REPORT_TOP)
+        return text.getvalue().splitlines()
+
+    def _sample_report(self) -> List[str]:
+        # Per thread: where it was found (self) and what was on its stack (inclusive), in % of samples;
+        # a .folded file next to the report feeds flamegraph.pl / speedscope
+        out = [f"{self._samples} sample tiap {self.interval_s * 1000:.0f} ms (wall-clock)", ""]
+        per_thread: Dict[str, Counter] = {}
+        for (thread, stack), hits in self._stacks.items():
+            per_thread.setdefault(thread, Counter())[stack] += hits
+        for thread in sorted(per_thread):
+            stacks = per_thread[thread]
+            total = sum(stacks.values()) or 1
+            own: Counter = Counter()
+            inclusive: Counter = Counter()
+            for stack, hits in stacks.items():
+                if stack:
+                    own[stack[-1]] += hits
+                for label in set(stack):
+                    inclusive[label] += hits
+            out.append(f"== {thread} ({total} sample)")
+            out.append("  self:")
+            out += [f"    {hits / total:>7.1%}  {label}" for label, hits in own.most_common(REPORT_TOP)]
+            out.append("  inklusif:")
+            out += [f"    {hits / total:>7.1%}  {label}" for label, hits in inclusive.most_common(REPORT_TOP)]
+            out.append("")
+        folded = [
+            ";".join((thread,) + stack) + f" {hits}"
+            for (thread, stack), hits in sorted(self._stacks.items(), key=lambda item: -item[1])
+        ]
+        self.path.with_suffix(".folded").write_text("\n".join(folded) + "\n", encoding="utf-8")
+        return out
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Optional
+
+from .progress import ProgressSample
+from .settings import AppSettings
+
+
+# How a stopped FFmpeg process finally went away
+STAGE_QUIT = "quit"  # "q" on stdin: FFmpeg flushes, writes the trailer and closes the RTMP connection
+STAGE_TERMINATE = "terminate"
+STAGE_KILL = "kill"
+STAGE_LOST = "lost"  # still running after the kill; only its pipes are given up
+STOP_STAGES = (STAGE_QUIT, STAGE_TERMINATE, STAGE_KILL, STAGE_LOST)
+
+
+@dataclass
+class LifecyclePolicy:
+    # Stop escalation: each stage waits this long for the process to exit before the next one
+    quit_timeout_s: float = 3.0
+    terminate_timeout_s: float = 2.0
+    kill_timeout_s: float = 2.0
+    # Watchdog: a process whose output position has not advanced for this long is restarted (0 = off)
+    stall_timeout_s: float = 20.0
+    # Allowance for probing the input and the RTMP handshake before the first frame goes out
+    startup_timeout_s: float = 30.0
+    check_interval_s: float = 1.0
+
+    @classmethod
+    def from_app_settings(cls, settings: AppSettings) -> "LifecyclePolicy":
+        return cls(quit_timeout_s=settings.stop_grace_s, stall_timeout_s=settings.stall_timeout_s)
+
+
+@dataclass
+class StopOutcome:
+    stage: str
+    elapsed_s: float
+    reason: str = ""
+
+    def describe(self) -> str:
+        how = "tidak berhenti" if self.stage == STAGE_LOST else self.stage
+        return f"FFmpeg berhenti dalam {self.elapsed_s:.2f} detik ({how})"
+
+
+@dataclass
+class LifecycleStats:
+    # Per-runner totals since it was created; read through FFMpegRunner.lifecycle_stats (a copy)
+    stops: int = 0
+    stop_stages: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(STOP_STAGES, 0))
+    last_stop_s: float = 0.0
+    max_stop_s: float = 0.0
+    total_stop_s: float = 0.0
+    stall_restarts: int = 0
+    leaked_readers: int = 0  # pipe reader threads still alive after their process exited
+
+    def record_stop(self, outcome: StopOutcome) -> None:
+        self.stops += 1
+        self.stop_stages[outcome.stage] = self.stop_stages.get(outcome.stage, 0) + 1
+        self.last_stop_s = outcome.elapsed_s
+        self.max_stop_s = max(self.max_stop_s, outcome.elapsed_s)
+        self.total_stop_s += outcome.elapsed_s
+
+    def describe(self) -> str:
+        parts = []
+        if self.stops:
+            stages = ", ".join(f"{k} {v}" for k, v in self.stop_stages.items() if v)
+            parts.append(
+                f"{self.stops}x stop, rata-rata {self.total_stop_s / self.stops:.2f}s, "
+                f"maks {self.max_stop_s:.2f}s ({stages})"
+            )
+        if self.stall_restarts:
+            parts.append(f"{self.stall_restarts}x restart karena output macet")
+        if self.leaked_readers:
+            parts.append(f"{self.leaked_readers} pembaca pipe tertinggal")
+        return "; ".join(parts) or "tidak ada stop"
+
+    def copy(self) -> "LifecycleStats":
+        return replace(self, stop_stages=dict(self.stop_stages))
+
+
+def group_popen_kwargs() -> dict:
+    # FFmpeg gets its own process group so a stop reaches anything it spawned as well. This also
+    # keeps a terminal Ctrl+C from hitting FFmpeg directly: the runner stops it in order instead.
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}  # type: ignore[attr-defined]
+    return {"start_new_session": True}
+
+
+def signal_group(pid: int, stage: str) -> bool:
+    # Terminates or kills FFmpeg's whole process group. Callers check the process is still
+    # unreaped first, so its pid (= the group id) cannot have been reused. False when the group
+    # could not be signalled and the caller should fall back to the process alone.
+    if os.name == "nt":
+        # TerminateProcess has no group variant; only the kill stage takes the tree down
+        if stage != STAGE_KILL:
+            return False
+        try:
+            result = subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(pid)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                creationflags=subprocess.CREATE_NO_WINDOW,  # type: ignore[attr-defined]
+                timeout=5,
+            )
+            return result.returncode == 0
+        except (OSError, subprocess.SubprocessError):
+            return False
+    try:
+        os.killpg(pid, signal.SIGKILL if stage == STAGE_KILL else signal.SIGTERM)
+        return True
+    except OSError:
+        # Not a group leader (spawned without group_popen_kwargs) or already gone
+        return False
+
+
+def reap_group(pid: int) -> None:
+    # Kills what is left of an exited FFmpeg's group. Only used while something still holds its
+    # pipes open, i.e. the group still has members, and a group id is not reused while it has any.
+    if os.name != "nt":
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _signal_process(proc: subprocess.Popen, stage: str) -> None:
+    if proc.poll() is not None or signal_group(proc.pid, stage):
+        return
+    try:
+        if stage == STAGE_KILL:
+            proc.kill()
+        else:
+            proc.terminate()
+    except OSError:
+        pass
+
+
+def request_quit(stdin) -> bool:
+    # FFmpeg reads single-key commands from stdin unless started with -nostdin
+    if stdin is None:
+        return False
+    try:
+        stdin.write(b"q")
+        stdin.flush()
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def stop_process(proc: subprocess.Popen, policy: LifecyclePolicy, reason: str = "") -> StopOutcome:
+    # Graceful quit, then terminate, then kill the whole group, each bounded by the policy.
+    # Blocks for at most the sum of the three timeouts.
+    started = time.monotonic()
+    stages = (
+        (STAGE_QUIT, policy.quit_timeout_s),
+        (STAGE_TERMINATE, policy.terminate_timeout_s),
+        (STAGE_KILL, policy.kill_timeout_s),
+    )
+    for stage, timeout in stages:
+        if stage == STAGE_QUIT:
+            if not request_quit(proc.stdin):
+                continue
+        else:
+            _signal_process(proc, stage)
+        try:
+            proc.wait(timeout=max(0.0, timeout))
+            return StopOutcome(stage, time.monotonic() - started, reason)
+        except subprocess.TimeoutExpired:
+            continue
+    return StopOutcome(STAGE_LOST, time.monotonic() - started, reason)
+
+
+class StallWatchdog:
+    # Notices an FFmpeg process that is alive but no longer moving: the output position and byte
+    # count of its progress samples must advance within stall_timeout_s (startup_timeout_s before
+    # the first advance). Samples that repeat the same position do not count as progress, and a
+    # process that reported progress=end is finishing, not stuck.
+
+    def __init__(self, policy: LifecyclePolicy, now: Optional[float] = None) -> None:
+        self.policy = policy
+        self._started = time.monotonic() if now is None else now
+        self._advanced: Optional[float] = None
+        self._out_time = 0.0
+        self._total_size = 0
+        self._ended = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.policy.stall_timeout_s > 0
+
+    def observe(self, sample: ProgressSample, now: Optional[float] = None) -> None:
+        self._ended = self._ended or sample.ended
+        if sample.out_time > self._out_time or sample.total_size > self._total_size:
+            self._out_time = max(self._out_time, sample.out_time)
+            self._total_size = max(self._total_size, sample.total_size)
+            self._advanced = time.monotonic() if now is None else now
+
+    def stalled_for(self, now: Optional[float] = None) -> Optional[float]:
+        # Seconds without progress once over the limit, else None
+        if not self.enabled or self._ended:
+            return None
+        now = time.monotonic() if now is None else now
+        if self._advanced is None:
+            idle = now - self._started
+            return idle if idle >= max(self.policy.startup_timeout_s, self.policy.stall_timeout_s) else None
+        idle = now - self._advanced
+        return idle if idle >= self.policy.stall_timeout_s else None
+
+
+class ProcessSupervisor:
+    # Owns stopping one FFmpeg process from its own thread, so neither stop_stream() on the GUI
+    # thread nor the runner thread blocking in wait() has to run the escalation. It also polls
+    # the watchdog and stops the process itself when its output stalls.
+
+    def __init__(
+        self,
+        proc: subprocess.Popen,
+        policy: LifecyclePolicy,
+        on_stall: Callable[[float], None],
+        on_stopped: Callable[[StopOutcome], None],
+    ) -> None:
+        self.proc = proc
+        self.policy = policy
+        self.watchdog = StallWatchdog(policy)
+        self.stalled = False
+        self._on_stall = on_stall
+        self._on_stopped = on_stopped
+        self._reason: Optional[str] = None
+        self._wake = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ffmpeg-lifecycle", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def observe(self, sample: ProgressSample) -> None:
+        self.watchdog.observe(sample)
+
+    def request_stop(self, reason: str = "stop") -> None:
+        if self._reason is None:
+            self._reason = reason
+        self._wake.set()
+
+    def finish(self) -> None:
+        # Called once the process has exited; waits for a stop that is still escalating
+        self._done.set()
+        self._wake.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            total = self.policy.quit_timeout_s + self.policy.terminate_timeout_s + self.policy.kill_timeout_s
+            self._thread.join(total + 1.0)
+
+    def _run(self) -> None:
+        interval = max(0.05, self.policy.check_interval_s)
+        while not self._done.is_set():
+            self._wake.wait(interval if self.watchdog.enabled else None)
+            self._wake.clear()
+            if self._done.is_set() or self.proc.poll() is not None:
+                return
+            if self._reason is None:
+                idle = self.watchdog.stalled_for()
+                if idle is None:
+                    continue
+                self.stalled = True
+                self._reason = "stall"
+                self._on_stall(idle)
+            self._on_stopped(stop_process(self.proc, self.policy, self._reason))
+            return
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import deque
+from typing import Deque, IO, List, Tuple, Union
+
+
+DEFAULT_MAX_LINES = 5000
+READ_CHUNK = 64 * 1024
+
+_LINE_SPLIT = re.compile(rb"\r\n|\r|\n")
+
+LogLine = Union[bytes, str]
+
+
+def _decode(line: LogLine) -> str:
+    if isinstance(line, bytes):
+        return line.decode("utf-8", errors="replace")
+    return line
+
+
+class LogBuffer:
+    # Bounded ring of log lines shared by the reader threads and the UI.
+    # Lines stay raw bytes until someone actually displays them.
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES) -> None:
+        self.max_lines = max(1, max_lines)
+        self._lock = threading.Lock()
+        self._history: Deque[LogLine] = deque(maxlen=self.max_lines)
+        self._pending: Deque[LogLine] = deque(maxlen=self.max_lines)
+        self._dropped = 0
+        self.total_lines = 0
+
+    def append(self, line: LogLine) -> None:
+        with self._lock:
+            self._append_locked(line)
+
+    def extend(self, lines: List[LogLine]) -> None:
+        with self._lock:
+            for line in lines:
+                self._append_locked(line)
+
+    def write(self, text: str) -> None:
+        # Runner messages arrive as newline-terminated strings, possibly several lines
+        lines = [part for part in text.splitlines() if part]
+        if lines:
+            self.extend(lines)
+
+    def drain(self) -> List[str]:
+        # Lines not yet delivered, decoded; a marker replaces what overflowed in between
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+        out = [_decode(line) for line in pending]
+        if dropped:
+            out.insert(0, f"[log] {dropped} baris dilewati (buffer penuh)")
+        return out
+
+    def snapshot(self) -> List[str]:
+        with self._lock:
+            history = list(self._history)
+        return [_decode(line) for line in history]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._history.clear()
+            self._pending.clear()
+            self._dropped = 0
+
+    def _append_locked(self, line: LogLine) -> None:
+        if len(self._pending) == self.max_lines:
+            self._dropped += 1
+        self._history.append(line)
+        self._pending.append(line)
+        self.total_lines += 1
+
+
+def split_lines(carry: bytes, chunk: bytes) -> Tuple[List[bytes], bytes]:
+    # Splits raw child output on \r and \n (FFmpeg stats use bare \r) without decoding;
+    # returns complete non-empty lines and the unterminated remainder
+    parts = _LINE_SPLIT.split(carry + chunk)
+    carry = parts.pop()
+    if len(carry) > READ_CHUNK:
+        # Never let a line without terminator grow without bound
+        parts.append(carry)
+        carry = b""
+    return [p for p in parts if p], carry
+
+
+def pump_lines(stream: IO[bytes], buffer: LogBuffer) -> None:
+    carry = b""
+    read = stream.read1 if hasattr(stream, "read1") else stream.read
+    try:
+        while True:
+            chunk = read(READ_CHUNK)
+            if not chunk:
+                break
+            lines, carry = split_lines(carry, chunk)
+            if lines:
+                buffer.extend(lines)
+    except (OSError, ValueError):
+        pass
+    if carry:
+        buffer.append(carry)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .ffmpeg_resolver import find_ffprobe
+from .media_probe import MediaInfo, probe_media_checked
+from .settings import AppSettings
+
+
+CACHE_VERSION = 1
+DEFAULT_PROBE_WORKERS = 8
+
+_MEDIA_INFO_FIELDS = {f.name for f in fields(MediaInfo)}
+
+
+def default_media_cache_path(settings: AppSettings) -> Path:
+    # Persisted next to the playlist it describes
+    return settings.playlist_file.with_name("media-cache.json")
+
+
+def _file_identity(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def is_decodable(info: Optional[MediaInfo]) -> bool:
+    return info is not None and (info.has_video or info.has_audio)
+
+
+class MediaCache:
+    # Probe results keyed by absolute path and invalidated by size + mtime.
+    # An entry with info=None records a file ffprobe could not read.
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ffprobe_path: Optional[str] = None,
+        max_workers: int = DEFAULT_PROBE_WORKERS,
+    ) -> None:
+        self.path = Path(path) if path is not None else default_media_cache_path(AppSettings())
+        self.max_workers = max(1, max_workers)
+        self._ffprobe_path = ffprobe_path or find_ffprobe()
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        self._dirty = False
+        self._loaded = False
+
+    @property
+    def available(self) -> bool:
+        return bool(self._ffprobe_path)
+
+    def load(self) -> None:
+        with self._lock:
+            self._loaded = True
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                return
+            if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+                return
+            entries = data.get("entries")
+            if isinstance(entries, dict):
+                self._entries = entries
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": CACHE_VERSION, "entries": dict(self._entries)}
+            self._dirty = False
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except Exception:
+            with self._lock:
+                self._dirty = True
+
+    def cached(self, file_path: str) -> Tuple[bool, Optional[MediaInfo]]:
+        # (hit, info) without probing; a hit with info=None means "known undecodable"
+        self._ensure_loaded()
+        key = os.path.abspath(file_path)
+        identity = _file_identity(key)
+        if identity is None:
+            return False, None
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry or (entry.get("size"), entry.get("mtime_ns")) != identity:
+            return False, None
+        data = entry.get("info")
+        if data is None:
+            return True, None
+        info = MediaInfo(**{k: v for k, v in data.items() if k in _MEDIA_INFO_FIELDS})
+        info.path = file_path
+        return True, info
+
+    def get(self, file_path: str) -> Optional[MediaInfo]:
+        hit, info = self.cached(file_path)
+        if hit:
+            return info
+        return self._probe_and_store(file_path)
+
+    def probe_many(
+        self,
+        files: Iterable[str],
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, Optional[MediaInfo]]:
+        results: Dict[str, Optional[MediaInfo]] = {}
+        misses: List[str] = []
+        for path in dict.fromkeys(files):
+            hit, info = self.cached(path)
+            if hit:
+                results[path] = info
+            else:
+                misses.append(path)
+        total = len(misses)
+        if misses:
+            done = 0
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, total), thread_name_prefix="ffprobe") as pool:
+                for path, info in zip(misses, pool.map(self._probe_and_store, misses)):
+                    results[path] = info
+                    done += 1
+                    if progress is not None:
+                        progress(done, total)
+            self.save()
+        return results
+
+    def _probe_and_store(self, file_path: str) -> Optional[MediaInfo]:
+        identity = _file_identity(file_path)
+        if identity is None or not self._ffprobe_path:
+            # Missing file or no ffprobe: nothing trustworthy to remember
+            return None
+        definitive, info = probe_media_checked(file_path, self._ffprobe_path)
+        if not definitive:
+            # Timeout or spawn error: report it as unknown this time, probe again next time
+            return None
+        entry = {
+            "size": identity[0],
+            "mtime_ns": identity[1],
+            "info": asdict(info) if info is not None else None,
+        }
+        with self._lock:
+            self._entries[os.path.abspath(file_path)] = entry
+            self._dirty = True
+        return info
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+
+def total_duration(infos: Iterable[Optional[MediaInfo]]) -> float:
+    return sum(info.duration for info in infos if info is not None and info.duration)
+
+
+def format_duration(seconds: float) -> str:
+    total = int(round(seconds))
+    return f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
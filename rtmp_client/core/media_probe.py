@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .ffmpeg_resolver import find_ffprobe
+
+
+# Seconds of packets scanned from the start of a file to estimate the GOP length
+KEYFRAME_SCAN_SECONDS = 30
+
+
+@dataclass
+class MediaInfo:
+    path: str
+    duration: Optional[float] = None
+    format_name: str = ""
+    bit_rate: Optional[int] = None
+
+    video_codec: Optional[str] = None
+    video_profile: Optional[str] = None
+    pix_fmt: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    video_bit_rate: Optional[int] = None
+    # Longest distance between keyframes seen in the scanned window (seconds)
+    max_keyframe_interval: Optional[float] = None
+
+    audio_codec: Optional[str] = None
+    audio_sample_rate: Optional[int] = None
+    audio_channels: Optional[int] = None
+    audio_bit_rate: Optional[int] = None
+
+    @property
+    def has_video(self) -> bool:
+        return self.video_codec is not None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_codec is not None
+
+
+def _creationflags() -> int:
+    if os.name == "nt":
+        return subprocess.CREATE_NO_WINDOW  # type: ignore[attr-defined]
+    return 0
+
+
+def _run_ffprobe_checked(cmd: List[str], timeout: float) -> Tuple[bool, Optional[str]]:
+    # (ffprobe ran to completion, its output if it succeeded). A timeout or spawn error says
+    # nothing about the file; a completed run with an error does.
+    try:
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            stdin=subprocess.DEVNULL,
+            timeout=timeout,
+            creationflags=_creationflags(),
+        )
+    except Exception:
+        return False, None
+    if result.returncode != 0:
+        return True, None
+    return True, result.stdout.decode("utf-8", errors="replace")
+
+
+def _run_ffprobe(cmd: List[str], timeout: float) -> Optional[str]:
+    return _run_ffprobe_checked(cmd, timeout)[1]
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_rate(value: Optional[str]) -> Optional[float]:
+    # ffprobe reports frame rates as "30000/1001"
+    if not value or value == "0/0":
+        return None
+    num, _, den = value.partition("/")
+    n = _to_float(num)
+    d = _to_float(den) if den else 1.0
+    if not n or not d:
+        return None
+    return n / d
+
+
+def probe_duration(file_path: str, ffprobe_path: Optional[str] = None, timeout: float = 15.0) -> Optional[float]:
+    ffprobe = ffprobe_path or find_ffprobe()
+    if not ffprobe:
+        return None
+    cmd = [
+        ffprobe,
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        file_path,
+    ]
+    out = _run_ffprobe(cmd, timeout)
+    if not out:
+        return None
+    lines = out.strip().splitlines()
+    value = _to_float(lines[0]) if lines else None
+    if value is None or value <= 0:
+        return None
+    return value
+
+
+def probe_max_keyframe_interval(
+    file_path: str, ffprobe_path: Optional[str] = None, timeout: float = 15.0
+) -> Optional[float]:
+    ffprobe = ffprobe_path or find_ffprobe()
+    if not ffprobe:
+        return None
+    cmd = [
+        ffprobe,
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-read_intervals",
+        f"%+{KEYFRAME_SCAN_SECONDS}",
+        "-show_entries",
+        "packet=pts_time,flags",
+        "-of",
+        "csv=p=0",
+        file_path,
+    ]
+    out = _run_ffprobe(cmd, timeout)
+    if not out:
+        return None
+    keyframes: List[float] = []
+    last_pts: Optional[float] = None
+    for line in out.splitlines():
+        pts_text, _, flags = line.partition(",")
+        pts = _to_float(pts_text)
+        if pts is None:
+            continue
+        last_pts = pts if last_pts is None else max(last_pts, pts)
+        if "K" in flags:
+            keyframes.append(pts)
+    if not keyframes or last_pts is None:
+        return None
+    keyframes.sort()
+    # The tail after the last keyframe counts too, otherwise a single keyframe looks perfect
+    gaps = [b - a for a, b in zip(keyframes, keyframes[1:])]
+    gaps.append(last_pts - keyframes[-1])
+    return max(gaps)
+
+
+def probe_keyframe_before(
+    file_path: str, position: float, ffprobe_path: Optional[str] = None, timeout: float = 15.0
+) -> Optional[float]:
+    # Timestamp of the last video keyframe at or before `position` (seconds), scanning one window back
+    ffprobe = ffprobe_path or find_ffprobe()
+    if not ffprobe or position <= 0:
+        return None
+    start = max(0.0, position - KEYFRAME_SCAN_SECONDS)
+    cmd = [
+        ffprobe,
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-read_intervals",
+        f"{start:.3f}%{position:.3f}",
+        "-show_entries",
+        "packet=pts_time,flags",
+        "-of",
+        "csv=p=0",
+        file_path,
+    ]
+    out = _run_ffprobe(cmd, timeout)
+    if not out:
+        return None
+    best: Optional[float] = None
+    for line in out.splitlines():
+        pts_text, _, flags = line.partition(",")
+        pts = _to_float(pts_text)
+        if pts is None or "K" not in flags or pts > position:
+            continue
+        best = pts if best is None else max(best, pts)
+    return best
+
+
+def probe_media(
+    file_path: str,
+    ffprobe_path: Optional[str] = None,
+    timeout: float = 15.0,
+    scan_keyframes: bool = True,
+) -> Optional[MediaInfo]:
+    return probe_media_checked(file_path, ffprobe_path, timeout, scan_keyframes)[1]
+
+
+def probe_media_checked(
+    file_path: str,
+    ffprobe_path: Optional[str] = None,
+    timeout: float = 15.0,
+    scan_keyframes: bool = True,
+) -> Tuple[bool, Optional[MediaInfo]]:
+    # (definitive, info): only a definitive None means the file is undecodable; anything else
+    # (no ffprobe, timeout, spawn error) is worth probing again later
+    ffprobe = ffprobe_path or find_ffprobe()
+    if not ffprobe:
+        return False, None
+    cmd = [
+        ffprobe,
+        "-v",
+        "error",
+        "-show_format",
+        "-show_streams",
+        "-of",
+        "json",
+        file_path,
+    ]
+    completed, out = _run_ffprobe_checked(cmd, timeout)
+    if not out:
+        return completed, None
+    try:
+        data = json.loads(out)
+    except ValueError:
+        return True, None
+
+    fmt = data.get("format") or {}
+    info = MediaInfo(
+        path=file_path,
+        duration=_to_float(fmt.get("duration")),
+        format_name=str(fmt.get("format_name") or ""),
+        bit_rate=_to_int(fmt.get("bit_rate")),
+    )
+    for stream in data.get("streams") or []:
+        kind = stream.get("codec_type")
+        if kind == "video" and info.video_codec is None:
+            disposition = stream.get("disposition") or {}
+            if disposition.get("attached_pic"):
+                continue
+            info.video_codec = stream.get("codec_name")
+            info.video_profile = stream.get("profile")
+            info.pix_fmt = stream.get("pix_fmt")
+            info.width = _to_int(stream.get("width"))
+            info.height = _to_int(stream.get("height"))
+            info.fps = _parse_rate(stream.get("avg_frame_rate")) or _parse_rate(stream.get("r_frame_rate"))
+            info.video_bit_rate = _to_int(stream.get("bit_rate"))
+        elif kind == "audio" and info.audio_codec is None:
+            info.audio_codec = stream.get("codec_name")
+            info.audio_sample_rate = _to_int(stream.get("sample_rate"))
+            info.audio_channels = _to_int(stream.get("channels"))
+            info.audio_bit_rate = _to_int(stream.get("bit_rate"))
+
+    # MKV and friends carry no per-stream bitrate; derive it from the container total
+    if info.video_codec and info.video_bit_rate is None and info.bit_rate:
+        info.video_bit_rate = max(0, info.bit_rate - (info.audio_bit_rate or 0))
+
+    if scan_keyframes and info.has_video:
+        info.max_keyframe_interval = probe_max_keyframe_interval(file_path, ffprobe, timeout)
+    return True, info
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .ffmpeg_runner import FFMpegRunner
+from .progress import OutputStart, ProgressSample
+from .reconnect import ReconnectEvent
+from .standby import GoLiveReport
+
+
+DEFAULT_METRICS_HOST = "127.0.0.1"
+DEFAULT_METRICS_PORT = 9464
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "rtmp_client"
+
+# Seconds. Item gaps are usually well under a second; start latency includes probing the input
+# and the RTMP handshake.
+GAP_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+START_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+try:
+    _CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _CLOCK_TICKS = _PAGE_SIZE = 0
+
+
+def read_process_usage(pid: int) -> Optional[Tuple[float, int]]:
+    # (CPU seconds, resident bytes) of a process from /proc; Linux only, None elsewhere
+    if not _CLOCK_TICKS:
+        return None
+    try:
+        with open(f"/proc/{pid}/stat", "r", encoding="ascii", errors="replace") as f:
+            # The command name may contain spaces; the fields after it start with the state
+            fields = f.read().rpartition(")")[2].split()
+        with open(f"/proc/{pid}/statm", "r", encoding="ascii") as f:
+            pages = int(f.read().split()[1])
+        return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS, pages * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Histogram:
+    # Cumulative-bucket histogram in the Prometheus layout
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        # (cumulative count per bucket, +Inf last), sum, count
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+
+class _Counter:
+    # Folds a per-process counter (FFmpeg's drop/dup frames, CPU time) into one that survives restarts
+
+    def __init__(self) -> None:
+        self._base = 0.0
+        self._last = 0.0
+
+    def update(self, value: float) -> None:
+        if value < self._last:
+            self._base += self._last
+        self._last = value
+
+    def restart(self) -> None:
+        self._base += self._last
+        self._last = 0.0
+
+    @property
+    def total(self) -> float:
+        return self._base + self._last
+
+
+class StreamMetrics:
+    # What one runner exposes. Event handlers run on the runner's threads and only store values
+    # under a short lock; /proc sampling and formatting happen on the scrape thread.
+
+    def __init__(self, name: str, runner: FFMpegRunner) -> None:
+        self.name = name
+        self.runner = runner
+        self.switch_gap = Histogram(GAP_BUCKETS)
+        self.start_latency = Histogram(START_BUCKETS)
+        self._lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self._sample: Optional[ProgressSample] = None
+        self._dropped = _Counter()
+        self._duplicated = _Counter()
+        self._cpu = _Counter()
+        self._cpu_pid: Optional[int] = None
+        self._reconnects = 0
+        self._stall_restarts = 0
+        self._go_live_latency: Optional[float] = None
+        runner.on_started.connect(self._on_started)
+        runner.on_stopped.connect(self._on_stopped)
+        runner.on_progress.connect(self._on_progress)
+        runner.on_output_started.connect(self._on_output_started)
+        runner.on_reconnect.connect(self._on_reconnect)
+        runner.on_go_live.connect(self._on_go_live)
+
+    def detach(self) -> None:
+        self.runner.on_started.disconnect(self._on_started)
+        self.runner.on_stopped.disconnect(self._on_stopped)
+        self.runner.on_progress.disconnect(self._on_progress)
+        self.runner.on_output_started.disconnect(self._on_output_started)
+        self.runner.on_reconnect.disconnect(self._on_reconnect)
+        self.runner.on_go_live.disconnect(self._on_go_live)
+
+    def _on_started(self) -> None:
+        with self._lock:
+            self._started_at = time.monotonic()
+            self._sample = None
+
+    def _on_stopped(self, exit_code: int) -> None:
+        with self._lock:
+            self._started_at = None
+            self._sample = None
+
+    def _on_progress(self, sample: ProgressSample) -> None:
+        with self._lock:
+            self._sample = sample
+            self._dropped.update(sample.drop_frames)
+            self._duplicated.update(sample.dup_frames)
+
+    def _on_output_started(self, start: OutputStart) -> None:
+        with self._lock:
+            # A new FFmpeg process counts its frames from zero again
+            self._dropped.restart()
+            self._duplicated.restart()
+        self.start_latency.observe(start.start_latency_s)
+        if start.gap_s is not None:
+            self.switch_gap.observe(start.gap_s)
+
+    def _on_reconnect(self, event: ReconnectEvent) -> None:
+        with self._lock:
+            if event.stalled:
+                self._stall_restarts += 1
+            else:
+                self._reconnects += 1
+
+    def _on_go_live(self, report: GoLiveReport) -> None:
+        with self._lock:
+            self._go_live_latency = report.latency_s
+
+    def collect(self) -> Dict[str, object]:
+        # Child CPU is sampled at scrape time, so CPU spent after the last scrape of a process that
+        # has since exited is not counted
+        pid = self.runner.process_id
+        usage = read_process_usage(pid) if pid is not None else None
+        now = time.monotonic()
+        with self._lock:
+            if usage is not None:
+                if pid != self._cpu_pid:
+                    self._cpu.restart()
+                    self._cpu_pid = pid
+                self._cpu.update(usage[0])
+            sample = self._sample
+            return {
+                "up": 1 if self._started_at is not None else 0,
+                "uptime": now - self._started_at if self._started_at is not None else 0.0,
+                "sample": sample,
+                "dropped": self._dropped.total,
+                "duplicated": self._duplicated.total,
+                "reconnects": self._reconnects,
+                "stall_restarts": self._stall_restarts,
+                "cpu": self._cpu.total,
+                "rss": usage[1] if usage is not None else None,
+                "index": self.runner.current_index,
+                "go_live": self._go_live_latency,
+            }
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    # The streams a /metrics scrape reports, by name (the channel name under the supervisor)
+
+    def __init__(self) -> None:
+        self._streams: Dict[str, StreamMetrics] = {}
+        self._lock = threading.Lock()
+
+    def track(self, name: str, runner: FFMpegRunner) -> StreamMetrics:
+        # A channel restarted with a new runner replaces its old entry
+        stream = StreamMetrics(name, runner)
+        with self._lock:
+            old = self._streams.get(name)
+            self._streams[name] = stream
+        if old is not None:
+            old.detach()
+        return stream
+
+    def untrack(self, name: str) -> None:
+        with self._lock:
+            stream = self._streams.pop(name, None)
+        if stream is not None:
+            stream.detach()
+
+    def streams(self) -> List[StreamMetrics]:
+        with self._lock:
+            return list(self._streams.values())
+
+    def render(self) -> str:
+        streams = sorted(self.streams(), key=lambda s: s.name)
+        snapshots = [(s, s.collect()) for s in streams]
+        out: List[str] = []
+
+        def family(name: str, kind: str, help_text: str, rows: List[Tuple[str, float]]) -> None:
+            out.append(f"# HELP {PREFIX}_{name} {help_text}")
+            out.append(f"# TYPE {PREFIX}_{name} {kind}")
+            for labels, value in rows:
+                out.append(f"{PREFIX}_{name}{{{labels}}} {_number(value)}")
+
+        def per_stream(key, transform=lambda v: v) -> List[Tuple[str, float]]:
+            rows = []
+            for stream, data in snapshots:
+                value = data[key] if isinstance(key, str) else key(data)
+                if value is not None:
+                    rows.append((f'stream="{_label(stream.name)}"', transform(value)))
+            return rows
+
+        def from_sample(attr: str):
+            return lambda data: getattr(data["sample"], attr) if data["sample"] is not None else None
+
+        family("stream_up", "gauge", "1 while the stream's playlist session is running.", per_stream("up"))
+        family("uptime_seconds", "gauge", "Seconds since the session started.", per_stream("uptime"))
+        family("playlist_index", "gauge", "Playlist position of the item on air (-1 when idle).", per_stream("index"))
+        family("fps", "gauge", "Output frames per second reported by FFmpeg.", per_stream(from_sample("fps")))
+        family(
+            "output_bitrate_bits_per_second",
+            "gauge",
+            "Output bitrate reported by FFmpeg.",
+            per_stream(from_sample("bitrate_kbps"), lambda kbps: kbps * 1000),
+        )
+        family("speed_ratio", "gauge", "Encoding speed relative to realtime.", per_stream(from_sample("speed")))
+        family("dropped_frames_total", "counter", "Frames FFmpeg dropped.", per_stream("dropped"))
+        family("duplicated_frames_total", "counter", "Frames FFmpeg duplicated.", per_stream("duplicated"))
+        restarts: List[Tuple[str, float]] = []
+        for stream, data in snapshots:
+            name = _label(stream.name)
+            restarts.append((f'stream="{name}",reason="reconnect"', data["reconnects"]))
+            restarts.append((f'stream="{name}",reason="stall"', data["stall_restarts"]))
+        family("restarts_total", "counter", "FFmpeg restarts after an ingest drop or a stalled output.", restarts)
+        family("ffmpeg_cpu_seconds_total", "counter", "CPU time of the streaming FFmpeg processes.", per_stream("cpu"))
+        family("ffmpeg_resident_memory_bytes", "gauge", "Resident memory of the current FFmpeg.", per_stream("rss"))
+        family(
+            "go_live_latency_seconds",
+            "gauge",
+            "How late the last scheduled start switched from the slate to the playlist.",
+            per_stream("go_live"),
+        )
+        for name, help_text, attr in (
+            ("item_switch_gap_seconds", "Output silence between two playlist items.", "switch_gap"),
+            ("start_latency_seconds", "FFmpeg spawn to its first progress report.", "start_latency"),
+        ):
+            out.append(f"# HELP {PREFIX}_{name} {help_text}")
+            out.append(f"# TYPE {PREFIX}_{name} histogram")
+            for stream, _ in snapshots:
+                histogram: Histogram = getattr(stream, attr)
+                cumulative, total, count = histogram.snapshot()
+                label = f'stream="{_label(stream.name)}"'
+                for bound, value in zip(list(histogram.buckets) + [float("inf")], cumulative):
+                    le = "+Inf" if bound == float("inf") else _number(float(bound))
+                    out.append(f'{PREFIX}_{name}_bucket{{{label},le="{le}"}} {value}')
+                out.append(f"{PREFIX}_{name}_sum{{{label}}} {_number(total)}")
+                out.append(f"{PREFIX}_{name}_count{{{label}}} {count}")
+        return "\n".join(out) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        # Scrapes every few seconds would flood stderr
+        pass
+
+
+class MetricsServer:
+    # Optional local HTTP endpoint serving the registry at /metrics from its own daemon thread
+
+    def __init__(
+        self, registry: MetricsRegistry, host: str = DEFAULT_METRICS_HOST, port: int = DEFAULT_METRICS_PORT
+    ) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def start(self) -> None:
+        # Raises OSError when the port is taken; port 0 picks a free one (see .port afterwards)
+        handler = type("MetricsHandler", (_Handler,), {"registry": self.registry})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+JOURNAL_SUFFIX = ".journal"
+# Edits (or journal bytes) appended before the journal is folded back into the snapshot
+DEFAULT_COMPACT_AFTER = 500
+COMPACT_BYTES = 1 << 20
+
+
+def row_runs(rows: Iterable[int]) -> List[Tuple[int, int]]:
+    # Sorted rows as inclusive (first, last) runs, e.g. [1, 2, 3, 7] -> [(1, 3), (7, 7)]
+    runs: List[Tuple[int, int]] = []
+    for row in sorted(set(rows)):
+        if runs and row == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], row)
+        else:
+            runs.append((row, row))
+    return runs
+
+
+def _rows(entry: Dict[str, object]) -> List[int]:
+    # Journal entries store row sets as runs, which keeps a "select all, move" edit one short line
+    return [row for first, last in entry.get("runs") or [] for row in range(first, last + 1)]  # type: ignore
+
+
+class PlaylistJournal:
+    # playlist.json stays the {"files": [...]} snapshot every reader understands (CLI, channels).
+    # Edits made since are appended to playlist.json.journal, one JSON line each, and replayed on
+    # load, so an edit costs one short append instead of rewriting the whole list. Snapshot and
+    # journal lines carry a sequence number: a crash between writing a new snapshot and truncating
+    # the journal cannot replay old edits twice, and a torn last line is simply dropped.
+
+    def __init__(self, path: Path, compact_after: int = DEFAULT_COMPACT_AFTER) -> None:
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.name + JOURNAL_SUFFIX)
+        self.compact_after = compact_after
+        self.seq = 0
+        self.pending = 0  # journal lines not folded into the snapshot yet
+        self.pending_bytes = 0
+        self.dirty = False  # journal had a torn or stale tail; compact before appending
+
+    def load(self) -> List[str]:
+        store = PlaylistStore()
+        self.seq = 0
+        self.pending = 0
+        self.pending_bytes = 0
+        self.dirty = False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and isinstance(data.get("files"), list):
+                store = PlaylistStore(str(x) for x in data["files"])
+                self.seq = int(data.get("seq") or 0)
+        except Exception:
+            pass
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        seq = int(entry["seq"])
+                    except Exception:
+                        self.dirty = True
+                        break
+                    if seq <= self.seq:
+                        self.dirty = True  # already in the snapshot
+                        continue
+                    store.apply(entry)
+                    self.seq = seq
+                    self.pending += 1
+                    self.pending_bytes += len(line)
+        except OSError:
+            pass
+        return store.files()
+
+    def append(self, op: Dict[str, object]) -> None:
+        self.seq += 1
+        line = json.dumps(dict(op, seq=self.seq), ensure_ascii=False)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError:
+            pass
+        self.pending += 1
+        self.pending_bytes += len(line) + 1
+
+    def needs_compaction(self) -> bool:
+        return self.dirty or self.pending >= self.compact_after or self.pending_bytes >= COMPACT_BYTES
+
+    def compact(self, files: Sequence[str]) -> None:
+        # New snapshot first (atomic replace), then drop the journal it now contains
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"files": list(files), "seq": self.seq}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+        except OSError:
+            return
+        try:
+            os.remove(self.journal_path)
+        except OSError:
+            pass
+        self.pending = 0
+        self.pending_bytes = 0
+        self.dirty = False
+
+
+class PlaylistStore:
+    # The playlist as one flat list of paths: batched edits are single O(n) passes, with no
+    # per-row widget objects. With a journal attached every edit is also recorded for load().
+
+    def __init__(self, files: Iterable[str] = (), journal: Optional[PlaylistJournal] = None) -> None:
+        self._files: List[str] = list(files)
+        self.journal = journal
+
+    @classmethod
+    def open(cls, path: Path, compact_after: int = DEFAULT_COMPACT_AFTER) -> "PlaylistStore":
+        journal = PlaylistJournal(path, compact_after)
+        store = cls(journal.load(), journal)
+        if journal.dirty:
+            journal.compact(store._files)
+        return store
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __getitem__(self, row: int) -> str:
+        return self._files[row]
+
+    def files(self) -> List[str]:
+        return list(self._files)
+
+    def insert(self, files: Sequence[str], at: Optional[int] = None) -> Tuple[int, int]:
+        # Returns the (first, last) rows the new files occupy
+        files = [str(f) for f in files]
+        at = len(self._files) if at is None else max(0, min(at, len(self._files)))
+        if files:
+            self._files[at:at] = files
+            self._record({"op": "insert", "at": at, "files": files})
+        return at, at + len(files) - 1
+
+    def remove(self, rows: Iterable[int]) -> int:
+        drop = {r for r in rows if 0 <= r < len(self._files)}
+        if not drop:
+            return 0
+        self._files = [f for i, f in enumerate(self._files) if i not in drop]
+        self._record({"op": "remove", "runs": row_runs(drop)})
+        return len(drop)
+
+    def move(self, rows: Iterable[int], delta: int) -> List[int]:
+        # Moves every selected row one place up (delta < 0) or down. Rows already at the edge, and
+        # selected rows stacked against them, stay put. Returns the rows the selection now occupies.
+        n = len(self._files)
+        selected = sorted({r for r in rows if 0 <= r < n}, reverse=delta > 0)
+        if not selected or delta == 0:
+            return selected
+        step = -1 if delta < 0 else 1
+        edge = 0 if step < 0 else n - 1
+        files = self._files
+        stuck: Optional[int] = None
+        moved: List[int] = []
+        for row in selected:
+            if row == edge or row + step == stuck:
+                stuck = row
+                moved.append(row)
+                continue
+            files[row + step], files[row] = files[row], files[row + step]
+            moved.append(row + step)
+        moved.sort()
+        selected.sort()
+        if moved != selected:
+            self._record({"op": "move", "runs": row_runs(selected), "delta": step})
+        return moved
+
+    def move_to(self, rows: Iterable[int], dest: int) -> List[int]:
+        # Moves the selected rows (keeping their order) so they start at dest, as in drag and drop
+        n = len(self._files)
+        picked = sorted({r for r in rows if 0 <= r < n})
+        if not picked:
+            return []
+        keep = set(picked)
+        block = [self._files[r] for r in picked]
+        rest = [f for i, f in enumerate(self._files) if i not in keep]
+        at = max(0, min(dest, n)) - sum(1 for r in picked if r < dest)
+        at = max(0, min(at, len(rest)))
+        self._files = rest[:at] + block + rest[at:]
+        self._record({"op": "move_to", "runs": row_runs(picked), "dest": dest})
+        return list(range(at, at + len(block)))
+
+    def clear(self) -> None:
+        if self._files:
+            self._files = []
+            self._record({"op": "clear"})
+
+    def apply(self, entry: Dict[str, object]) -> None:
+        # Replays one journal entry without recording it again
+        journal, self.journal = self.journal, None
+        try:
+            op = entry.get("op")
+            if op == "insert":
+                self.insert(list(entry.get("files") or []), int(entry.get("at", len(self._files))))  # type: ignore
+            elif op == "remove":
+                self.remove(_rows(entry))
+            elif op == "move":
+                self.move(_rows(entry), int(entry.get("delta", 0)))  # type: ignore[arg-type]
+            elif op == "move_to":
+                self.move_to(_rows(entry), int(entry.get("dest", 0)))  # type: ignore[arg-type]
+            elif op == "clear":
+                self.clear()
+        finally:
+            self.journal = journal
+
+    def save(self) -> None:
+        # Folds the journal into a fresh snapshot (done automatically every compact_after edits)
+        if self.journal is not None:
+            self.journal.compact(self._files)
+
+    def _record(self, op: Dict[str, object]) -> None:
+        journal = self.journal
+        if journal is None:
+            return
+        journal.append(op)
+        if journal.needs_compaction():
+            journal.compact(self._files)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .encoding import MODE_TRANSCODE, EncodeSettings
+
+
+# What FFmpeg touches first: container header, first GOPs, and (for MP4 written without faststart)
+# the moov index at the end of the file
+DEFAULT_HEAD_BYTES = 8 * 1024 * 1024
+DEFAULT_TAIL_BYTES = 2 * 1024 * 1024
+READ_CHUNK = 1024 * 1024
+
+
+@dataclass
+class PreparedItem:
+    file_path: str
+    ok: bool
+    reason: str = ""  # why the item cannot be played (ok=False)
+    mode: str = MODE_TRANSCODE
+    mode_reason: str = ""
+    # Command built ahead of time; only valid for this URL and these exact encoder settings
+    url: str = ""
+    encode: Optional[EncodeSettings] = None
+    command: Optional[List[str]] = None
+    warmed_bytes: int = 0
+    elapsed_s: float = 0.0
+
+
+def warm_file(
+    path: str,
+    head_bytes: int = DEFAULT_HEAD_BYTES,
+    tail_bytes: int = DEFAULT_TAIL_BYTES,
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> int:
+    # Readahead hint plus a real read: fadvise is advisory and network filesystems largely ignore it
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.fstat(fd).st_size
+        ranges = [(0, min(size, head_bytes))]
+        if size > head_bytes and tail_bytes > 0:
+            tail_start = max(head_bytes, size - tail_bytes)
+            ranges.append((tail_start, size - tail_start))
+        if hasattr(os, "posix_fadvise"):
+            for offset, length in ranges:
+                try:
+                    os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+                except OSError:
+                    pass
+        total = 0
+        for offset, length in ranges:
+            os.lseek(fd, offset, os.SEEK_SET)
+            remaining = length
+            while remaining > 0:
+                if cancelled is not None and cancelled():
+                    return total
+                chunk = os.read(fd, min(READ_CHUNK, remaining))
+                if not chunk:
+                    break
+                total += len(chunk)
+                remaining -= len(chunk)
+        return total
+    finally:
+        os.close(fd)
+
+
+class ItemPrefetcher:
+    # Prepares upcoming playlist items while the current one streams: on its own thread, or on a
+    # shared executor (the asyncio engine shares one pool across all of its runners)
+
+    def __init__(self, executor: Optional[Executor] = None) -> None:
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="ffmpeg-prefetch")
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, file_path: str, prepare: Callable[[], Optional[PreparedItem]]) -> None:
+        with self._lock:
+            if file_path in self._pending:
+                return
+            try:
+                self._pending[file_path] = self._executor.submit(prepare)
+            except RuntimeError:
+                pass  # closed
+
+    def take(self, file_path: str, timeout: Optional[float] = None) -> Optional[PreparedItem]:
+        # Waits for an in-flight preparation: finishing it is never slower than starting over
+        with self._lock:
+            future = self._pending.pop(file_path, None)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout)
+        except Exception:
+            return None
+
+    def close(self) -> None:
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from .encoding import EncodeSettings, video_filters
+from .progress import PipeChannel
+from .settings import AppSettings
+
+
+READ_CHUNK = 64 * 1024
+# A preview frame larger than this means the stream lost sync; the buffer is dropped
+MAX_FRAME_BYTES = 4 * 1024 * 1024
+
+_SOI = b"\xff\xd8"
+
+
+@dataclass
+class PreviewSettings:
+    # Thumbnail-sized MJPEG output of the streaming FFmpeg process itself
+    height: int = 240
+    fps: float = 5.0
+    quality: int = 8  # mjpeg -q:v, 2 (best) .. 31
+
+    @classmethod
+    def from_app_settings(cls, settings: AppSettings) -> Optional["PreviewSettings"]:
+        if not settings.preview_enabled:
+            return None
+        return cls(height=settings.preview_height, fps=settings.preview_fps)
+
+
+def preview_args(preview: PreviewSettings, encode: Optional[EncodeSettings], target: str) -> List[str]:
+    # Extra video-only output. Frames go through the same scale/fps filters as the encode (encode=None
+    # for stream copy, which sends the source as-is), then shrink to the preview size. FFmpeg decodes
+    # the input once for both outputs, so the preview costs a downscale and a small JPEG per frame.
+    filters = video_filters(encode) if encode is not None else []
+    filters += [f"fps={preview.fps:g}", f"scale=-2:'min(ih,{preview.height})'"]
+    return [
+        "-map", "0:v:0?",
+        "-an", "-sn", "-dn",
+        "-vf", ",".join(filters),
+        "-c:v", "mjpeg",
+        "-q:v", str(preview.quality),
+        "-f", "image2pipe",
+        target,
+    ]
+
+
+def _jpeg_end(buf: bytearray, start: int) -> int:
+    # End offset of the JPEG starting at buf[start] (SOI), -1 while incomplete, -2 when malformed.
+    # Segments are skipped by their length, so table bytes cannot be mistaken for EOI; inside the
+    # entropy-coded data FF is always followed by 00 or a restart marker.
+    n = len(buf)
+    i = start + 2
+    while i + 1 < n:
+        if buf[i] != 0xFF:
+            return -2
+        marker = buf[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker == 0xD9:
+            return i + 2
+        if i + 3 >= n:
+            return -1
+        length = (buf[i + 2] << 8) | buf[i + 3]
+        if marker != 0xDA:
+            i += 2 + length
+            continue
+        j = i + 2 + length
+        while True:
+            j = buf.find(b"\xff", j)
+            if j < 0 or j + 1 >= n:
+                return -1
+            following = buf[j + 1]
+            if following == 0x00 or 0xD0 <= following <= 0xD7 or following == 0xFF:
+                j += 1
+                continue
+            break
+        i = j
+    return -1
+
+
+class JpegFrameSplitter:
+    # Cuts FFmpeg's image2pipe MJPEG byte stream into whole JPEG frames
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        self._buf += data
+        frames: List[bytes] = []
+        while True:
+            start = self._buf.find(_SOI)
+            if start < 0:
+                # Keep a trailing FF in case it is the first half of the next SOI
+                del self._buf[: max(0, len(self._buf) - 1)]
+                return frames
+            end = _jpeg_end(self._buf, start)
+            if end == -1:
+                if start:
+                    del self._buf[:start]
+                if len(self._buf) > MAX_FRAME_BYTES:
+                    self._buf.clear()
+                return frames
+            if end == -2:
+                del self._buf[: start + 2]
+                continue
+            frames.append(bytes(self._buf[start:end]))
+            del self._buf[:end]
+
+
+class PreviewChannel(PipeChannel):
+    # Transport for the preview output; the reader always drains it so FFmpeg never blocks on a
+    # slow UI, and hands on only the newest complete frame of each read
+
+    def __init__(self, preview: PreviewSettings) -> None:
+        super().__init__()
+        self.preview = preview
+
+    def ffmpeg_args(self, encode: Optional[EncodeSettings]) -> List[str]:
+        return preview_args(self.preview, encode, self.target())
+
+    def read(self, on_frame: Callable[[bytes], None]) -> None:
+        splitter = JpegFrameSplitter()
+        stream = self._open_stream(binary=True)
+        if stream is None:
+            return
+        try:
+            while True:
+                data = stream.read(READ_CHUNK)
+                if not data:
+                    break
+                frames = splitter.feed(data)
+                if frames:
+                    on_frame(frames[-1])
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                stream.close()
+            except Exception:
+                pass
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import io
+import os
+import socket
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+DEFAULT_STATS_PERIOD = 1.0
+_ACCEPT_TIMEOUT = 15.0
+
+
+@dataclass
+class ProgressSample:
+    frame: int = 0
+    fps: float = 0.0
+    bitrate_kbps: Optional[float] = None
+    out_time: float = 0.0  # seconds of output written
+    speed: Optional[float] = None  # 1.0 == realtime
+    dup_frames: int = 0
+    drop_frames: int = 0
+    total_size: int = 0
+    ended: bool = False
+
+
+@dataclass
+class OutputStart:
+    # First progress report of an FFmpeg process: how long it took to get going, and for the first
+    # process of a new playlist item, how long the output was silent since the previous item
+    start_latency_s: float  # spawn to first progress report
+    gap_s: Optional[float] = None  # previous item's last progress report to this one's first
+
+
+def _int(value: Optional[str]) -> int:
+    try:
+        return int(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return 0
+
+
+def _float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
+
+
+class ProgressParser:
+    # FFmpeg's -progress output is blocks of key=value lines terminated by progress=continue|end
+
+    def __init__(self) -> None:
+        self._fields: Dict[str, str] = {}
+
+    def feed_line(self, line: str) -> Optional[ProgressSample]:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            return None
+        if key != "progress":
+            self._fields[key] = value.strip()
+            return None
+        fields, self._fields = self._fields, {}
+        return self._build(fields, ended=value.strip() == "end")
+
+    @staticmethod
+    def _build(fields: Dict[str, str], ended: bool) -> ProgressSample:
+        bitrate = fields.get("bitrate", "")
+        speed = fields.get("speed", "")
+        # out_time_ms is historically in microseconds as well
+        out_us = fields.get("out_time_us") or fields.get("out_time_ms")
+        out_time = (_float(out_us) or 0.0) / 1_000_000
+        return ProgressSample(
+            frame=_int(fields.get("frame")),
+            fps=_float(fields.get("fps")) or 0.0,
+            bitrate_kbps=_float(bitrate[: -len("kbits/s")]) if bitrate.endswith("kbits/s") else None,
+            out_time=max(0.0, out_time),
+            speed=_float(speed[:-1]) if speed.endswith("x") else None,
+            dup_frames=_int(fields.get("dup_frames")),
+            drop_frames=_int(fields.get("drop_frames")),
+            total_size=_int(fields.get("total_size")),
+            ended=ended,
+        )
+
+
+class PipeChannel:
+    # An extra output of an FFmpeg process that the runner reads, separate from stdout/stderr.
+    # POSIX hands FFmpeg the write end of a pipe; Windows (no pass_fds) uses a loopback socket.
+
+    def __init__(self) -> None:
+        self._read_fd: Optional[int] = None
+        self._write_fd: Optional[int] = None
+        self._listener: Optional[socket.socket] = None
+        if os.name == "nt":
+            self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._listener.bind(("127.0.0.1", 0))
+            self._listener.listen(1)
+            self._listener.settimeout(_ACCEPT_TIMEOUT)
+        else:
+            self._read_fd, self._write_fd = os.pipe()
+
+    def target(self) -> str:
+        # Output URL for FFmpeg
+        if self._listener is not None:
+            return f"tcp://127.0.0.1:{self._listener.getsockname()[1]}"
+        return f"pipe:{self._write_fd}"
+
+    def popen_kwargs(self) -> dict:
+        if self._write_fd is not None:
+            return {"pass_fds": (self._write_fd,)}
+        return {}
+
+    def after_spawn(self) -> None:
+        # Only the child keeps the write end, so EOF arrives when FFmpeg exits
+        if self._write_fd is not None:
+            os.close(self._write_fd)
+            self._write_fd = None
+
+    def close(self) -> None:
+        for fd in (self._read_fd, self._write_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._read_fd = None
+        self._write_fd = None
+        if self._listener is not None:
+            try:
+                self._listener.close()
+            except OSError:
+                pass
+
+    def _open_stream(self, binary: bool = False):
+        if self._read_fd is not None:
+            fd, self._read_fd = self._read_fd, None
+            if binary:
+                return io.open(fd, "rb", buffering=0)
+            return io.open(fd, "r", encoding="utf-8", errors="replace")
+        if self._listener is None:
+            return None
+        try:
+            conn, _ = self._listener.accept()
+        except OSError:
+            return None
+        finally:
+            try:
+                self._listener.close()
+            except OSError:
+                pass
+        if binary:
+            return conn.makefile("rb", buffering=0)
+        return conn.makefile("r", encoding="utf-8", errors="replace")
+
+
+class ProgressChannel(PipeChannel):
+    # Dedicated transport for -progress, separate from the human-readable stderr log
+
+    def __init__(self, stats_period: float = DEFAULT_STATS_PERIOD) -> None:
+        super().__init__()
+        self.stats_period = stats_period
+
+    def ffmpeg_args(self) -> List[str]:
+        return ["-nostats", "-progress", self.target(), "-stats_period", f"{self.stats_period:g}"]
+
+    def read(self, on_sample: Callable[[ProgressSample], None]) -> None:
+        parser = ProgressParser()
+        stream = self._open_stream()
+        if stream is None:
+            return
+        try:
+            for line in stream:
+                sample = parser.feed_line(line)
+                if sample is not None:
+                    on_sample(sample)
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                stream.close()
+            except Exception:
+                pass
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+from .progress import ProgressSample
+from .settings import AppSettings
+
+
+# An item whose output got this close to its end is treated as finished, not dropped
+END_SLACK_S = 1.0
+
+
+@dataclass
+class ReconnectPolicy:
+    max_retries: int = 10  # per incident; -1 = retry forever, 0 = never reconnect
+    initial_delay_s: float = 1.0
+    max_delay_s: float = 30.0
+    multiplier: float = 2.0
+    jitter: float = 0.25  # +/- fraction of the delay, so many channels do not retry in lockstep
+    # A connection that stayed up this long starts a fresh incident with a full budget
+    stable_after_s: float = 60.0
+    # Resume slightly before the last acknowledged output; what was in flight is lost
+    rewind_s: float = 2.0
+
+    @classmethod
+    def from_app_settings(cls, settings: AppSettings) -> "ReconnectPolicy":
+        return cls(
+            max_retries=settings.reconnect_max_retries,
+            initial_delay_s=settings.reconnect_initial_delay_s,
+            max_delay_s=settings.reconnect_max_delay_s,
+        )
+
+    def delay_for(self, attempt: int) -> float:
+        base = min(self.max_delay_s, self.initial_delay_s * self.multiplier ** max(0, attempt - 1))
+        spread = base * self.jitter
+        return max(0.0, base + random.uniform(-spread, spread))
+
+
+@dataclass
+class ReconnectEvent:
+    file_path: str
+    attempt: int  # within the current incident
+    total: int  # reconnects since the session started
+    delay_s: float
+    resume_at: float  # seconds into the item (or into the playlist for gapless sessions)
+    exit_code: int
+    stalled: bool = False  # the watchdog restarted a process whose output stopped moving
+
+
+class ResumeTracker:
+    # Retry state for one playlist item: where its output has got to and how much budget is left
+
+    def __init__(self, policy: ReconnectPolicy) -> None:
+        self.policy = policy
+        self.offset = 0.0  # where the current attempt started, seconds into the item
+        self.attempts = 0
+
+    def reached(self, sample: Optional[ProgressSample]) -> float:
+        # Output timestamps restart at zero for every attempt
+        return self.offset + (sample.out_time if sample is not None else 0.0)
+
+    def next_delay(self, ran_for: float) -> Optional[float]:
+        # Backoff before the next attempt, or None when the retry budget is spent
+        if ran_for >= self.policy.stable_after_s:
+            self.attempts = 0
+        self.attempts += 1
+        if 0 <= self.policy.max_retries < self.attempts:
+            return None
+        return self.policy.delay_for(self.attempts)
+
+    def resume_from(self, position: float) -> None:
+        self.offset = max(0.0, position - self.policy.rewind_s)
+
+    def continue_from(self, position: float) -> None:
+        # A planned restart loses nothing in flight, so there is nothing to rewind over
+        self.offset = max(0.0, position)
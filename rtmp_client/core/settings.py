@@ -3,11 +3,12 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Optional
-import json
 import os
 import platform
 import random
 
+from .playlist_store import PlaylistJournal
+
 
 APP_NAME = "RTMP Client"
 ORG_NAME = "RTMP Client"
@@ -39,9 +40,63 @@ class AppSettings:
     target_width: Optional[int] = None
     target_height: Optional[int] = None
     target_fps: Optional[int] = None
+    # Walk the preset/resolution ladder when the encoder falls behind realtime
+    adaptive_encoding: bool = False
+    # Apply the profile `calibrate` measured for this host (preset, resolution/fps caps) from profiles_file
+    use_host_profile: bool = True
+    # Step the video bitrate down while the uplink is congested; empty ladder = derived from the target
+    congestion_control: bool = False
+    bitrate_ladder_kbps: List[int] = field(default_factory=list)
+
+    # Watched folders: rescan interval and how long a file must sit unmodified before it is picked up
+    watch_interval_s: float = 30.0
+    watch_settle_s: float = 5.0
+
+    # GUI preview: a small MJPEG output of the streaming FFmpeg process (headless runs never add it)
+    preview_enabled: bool = True
+    preview_height: int = 240
+    preview_fps: float = 5.0
+
+    # Disk cache of encoded playlist items (LRU, lives under the config dir)
+    encode_cache_max_mb: int = 20480
+
+    # Log pipeline: ring-buffer line cap (core and log view) and UI batch interval
+    log_max_lines: int = 5000
+    log_flush_interval_ms: int = 200
+
+    # Multi-channel supervisor: concurrent encoder cap and spacing between channel starts
+    max_concurrent_channels: int = 8
+    channel_start_stagger_s: float = 2.0
+
+    # Auto-reconnect after an ingest drop (per incident; -1 = unlimited)
+    reconnect_max_retries: int = 10
+    reconnect_initial_delay_s: float = 1.0
+    reconnect_max_delay_s: float = 30.0
+
+    # FFmpeg lifecycle: how long a stopped process gets to quit cleanly before it is terminated,
+    # and how long its output may stand still before the watchdog restarts it (0 = no watchdog)
+    stop_grace_s: float = 3.0
+    stall_timeout_s: float = 20.0
+
+    # Scheduled start: the slate goes out (and connects) this long before showtime, and the first
+    # item's FFmpeg starts preroll seconds early so its output is waiting at the switch
+    standby_warmup_s: float = 60.0
+    standby_preroll_s: float = 2.0
+
+    # Local Prometheus /metrics endpoint for the GUI session (0 = off; the CLI has --metrics-port)
+    metrics_port: int = 0
+    metrics_host: str = "127.0.0.1"
+
+    # Diagnostics: hot-path counters logged every instrument_report_interval_s (also RTMP_CLIENT_INSTRUMENT=1)
+    # and profile captures (Ctrl+Shift+P in the GUI, RTMP_CLIENT_PROFILE=<seconds>) written to diagnostics_dir
+    instrumentation: bool = False
+    instrument_report_interval_s: float = 30.0
+    profile_duration_s: float = 30.0
+    profile_mode: str = "sample"  # or "cprofile" (GUI thread only)
 
     profiles_file: Path = field(default_factory=lambda: default_config_dir() / "profiles.json")
     playlist_file: Path = field(default_factory=lambda: default_config_dir() / "playlist.json")
+    diagnostics_dir: Path = field(default_factory=lambda: default_config_dir() / "diagnostics")
 
 
 def ensure_config_dir() -> Path:
@@ -59,21 +114,13 @@ def shuffle_playlist(files: List[str]) -> List[str]:
 
 
 def save_playlist(path: Path, files: List[str]) -> None:
+    # Full rewrite; the GUI journals single edits through PlaylistStore.open() instead
     ensure_config_dir()
-    try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump({"files": files}, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+    journal = PlaylistJournal(path)
+    journal.load()  # continue the sequence so stale journal lines are not replayed over this
+    journal.compact(files)
 
 
 def load_playlist(path: Path) -> List[str]:
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if isinstance(data, dict) and isinstance(data.get("files"), list):
-            return [str(x) for x in data["files"]]
-    except Exception:
-        return []
-    return []
+    # Snapshot plus any edits journaled since
+    return PlaylistJournal(path).load()
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import IO, List, Optional, Tuple
+
+from .encoding import EncodeSettings, lowest_cap, transcode_args
+from .events import Event
+from .fanout import FANOUT_FORMAT, FANOUT_TARGET, FanOut, read_chunks
+from .lifecycle import LifecyclePolicy, StopOutcome, group_popen_kwargs, stop_process
+from .log_buffer import LogBuffer, pump_lines
+from .media_probe import MediaInfo
+from .settings import AppSettings
+
+
+# Slate size when neither the encode caps nor the first item say otherwise
+DEFAULT_SLATE_SIZE = (1280, 720)
+DEFAULT_SLATE_FPS = 30.0
+# The slate is forwarded in whole MPEG-TS packets so the cut-over never tears one
+TS_PACKET_SIZE = 188
+
+
+@dataclass
+class StandbyPolicy:
+    # How long before the scheduled start the slate goes out (and the RTMP connection is made)
+    warmup_s: float = 60.0
+    # How long before the scheduled start the programme's first FFmpeg is spawned; its output is
+    # held until the switch, so this should cover spawn, input open and encoder start-up
+    preroll_s: float = 2.0
+
+    @classmethod
+    def from_app_settings(cls, settings: AppSettings) -> "StandbyPolicy":
+        return cls(warmup_s=settings.standby_warmup_s, preroll_s=settings.standby_preroll_s)
+
+
+@dataclass
+class GoLiveReport:
+    scheduled_at: float  # wall clock (time.time())
+    switched_at: float  # when the programme's first bytes went to the relays, wall clock
+    preroll_s: float
+    ready: bool  # programme output was already waiting at the scheduled moment
+
+    @property
+    def latency_s(self) -> float:
+        return self.switched_at - self.scheduled_at
+
+    def describe(self) -> str:
+        when = datetime.fromtimestamp(self.scheduled_at).strftime("%H:%M:%S")
+        text = f"Live {self.latency_s * 1000:.0f} ms setelah jadwal {when}"
+        if self.ready:
+            return text + f" (output program sudah menunggu, pre-roll {self.preroll_s:g} detik)"
+        return text + f" (output program belum siap saat jadwal; pre-roll {self.preroll_s:g} detik kurang)"
+
+
+def _even(value: float) -> int:
+    return max(2, int(value) // 2 * 2)
+
+
+def slate_geometry(encode: EncodeSettings, info: Optional[MediaInfo]) -> Tuple[int, int, float]:
+    # What the first programme item will be encoded at (see encoding.video_filters), so the relay's
+    # stream copy sees no change of size or frame rate at the switch
+    width, height = DEFAULT_SLATE_SIZE
+    fps = DEFAULT_SLATE_FPS
+    if info is not None and info.width and info.height:
+        width, height = info.width, info.height
+    if info is not None and info.fps:
+        fps = info.fps
+    scale = 1.0
+    height_cap = lowest_cap(encode.height, encode.transcode_max_height)
+    if height_cap and height > height_cap:
+        scale = min(scale, height_cap / height)
+    if encode.width and width > encode.width:
+        scale = min(scale, encode.width / width)
+    fps_cap = lowest_cap(encode.fps, encode.transcode_max_fps)
+    return _even(width * scale), _even(height * scale), float(fps_cap or fps)
+
+
+def build_slate_command(
+    ffmpeg_path: str, encode: EncodeSettings, width: int, height: int, fps: float
+) -> List[str]:
+    # Black video and silence through the same encoder settings as the programme, as MPEG-TS for the relays
+    return [
+        ffmpeg_path,
+        "-hide_banner",
+        "-loglevel",
+        "warning",
+        "-re",
+        "-f",
+        "lavfi",
+        "-i",
+        f"color=c=black:s={width}x{height}:r={fps:g}",
+        "-f",
+        "lavfi",
+        "-i",
+        f"anullsrc=r={encode.audio_sample_rate}:cl=stereo",
+        "-map",
+        "0:v",
+        "-map",
+        "1:a",
+    ] + transcode_args(encode) + ["-f", FANOUT_FORMAT, FANOUT_TARGET]
+
+
+class Cutover:
+    # Moves a FanOut from the standby feed to the programme feed at the scheduled moment. The
+    # relays, and with them the RTMP connections, are not touched: only what they are fed changes.
+    # Programme output is held until due() (across programme processes, as fan-out would have
+    # sent them back to back); if none has arrived by then, the standby keeps feeding until the
+    # programme's first chunk. on_switched(GoLiveReport) fires once, from the thread that switched.
+
+    def __init__(self, fanout: FanOut, scheduled_at: float, preroll_s: float) -> None:
+        self.fanout = fanout
+        self.scheduled_at = scheduled_at
+        self.preroll_s = preroll_s
+        self.on_switched = Event()
+        self.report: Optional[GoLiveReport] = None
+        self._lock = threading.Lock()
+        self._held: List[bytes] = []
+        self._due = False
+
+    @property
+    def switched(self) -> bool:
+        return self.report is not None
+
+    def feed_standby(self, stream: IO[bytes]) -> None:
+        # read1 returns whatever the pipe had, so a partial packet is carried over to the next read
+        pending = b""
+        for chunk in read_chunks(stream):
+            pending += chunk
+            whole = len(pending) - len(pending) % TS_PACKET_SIZE
+            if not whole:
+                continue
+            with self._lock:
+                if self.report is not None:
+                    return
+                self.fanout.distribute(pending[:whole])
+            pending = pending[whole:]
+
+    def feed_programme(self, stream: IO[bytes]) -> None:
+        # Stands in for FanOut.feed on the programme encoder's stdout thread
+        for chunk in read_chunks(stream):
+            if self.fanout.stopped or self.fanout.all_failed():
+                break
+            if self.report is None:
+                report = None
+                with self._lock:
+                    if self.report is None:
+                        self._held.append(chunk)
+                        if not self._due:
+                            continue
+                        report = self._switch_locked(ready=False)
+                if report is not None:
+                    self.on_switched.emit(report)
+                    continue
+            self.fanout.distribute(chunk)
+
+    def due(self) -> None:
+        # Called at the scheduled moment
+        with self._lock:
+            self._due = True
+            if self.report is not None or not self._held:
+                return
+            report = self._switch_locked(ready=True)
+        self.on_switched.emit(report)
+
+    def _switch_locked(self, ready: bool) -> GoLiveReport:
+        for chunk in self._held:
+            self.fanout.distribute(chunk)
+        self._held.clear()
+        self.report = GoLiveReport(self.scheduled_at, time.time(), self.preroll_s, ready)
+        return self.report
+
+
+class SlateSource:
+    # The standby encoder: black slate and silence fed to the relays until the cut-over
+
+    def __init__(
+        self, cmd: List[str], cutover: Cutover, log_buffer: LogBuffer, policy: LifecyclePolicy
+    ) -> None:
+        self.cmd = cmd
+        self.cutover = cutover
+        self.policy = policy
+        self._log_buffer = log_buffer
+        self._proc: Optional[subprocess.Popen] = None
+        self._threads: List[threading.Thread] = []
+        self._stopper: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> None:
+        kwargs = group_popen_kwargs()
+        if os.name == "nt":
+            kwargs["creationflags"] |= subprocess.CREATE_NO_WINDOW  # type: ignore[attr-defined]
+        self._proc = subprocess.Popen(
+            self.cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs
+        )
+        self._threads = [
+            threading.Thread(target=self._feed, args=(self._proc.stdout,), name="standby-feed", daemon=True),
+            threading.Thread(target=self._read_log, args=(self._proc.stderr,), name="standby-log", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop_async(self) -> None:
+        # From the cut-over: the programme is already on the relays, the slate can take its time
+        with self._lock:
+            if self._stopper is not None or self._proc is None:
+                return
+            self._stopper = threading.Thread(target=self._stop, name="standby-stop", daemon=True)
+            self._stopper.start()
+
+    def stop(self) -> None:
+        self.stop_async()
+        stopper = self._stopper
+        if stopper is not None:
+            stopper.join()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+
+    def _stop(self) -> None:
+        proc = self._proc
+        if proc is None or proc.poll() is not None:
+            return
+        outcome: StopOutcome = stop_process(proc, self.policy, "standby")
+        self._log_buffer.write(f"[standby] Slate: {outcome.describe()}\n")
+
+    def _feed(self, stream: IO[bytes]) -> None:
+        self.cutover.feed_standby(stream)
+        try:
+            # Nothing reads the slate after the switch; a closed pipe keeps it from blocking on write
+            stream.close()
+        except Exception:
+            pass
+
+    def _read_log(self, stream: IO[bytes]) -> None:
+        pump_lines(stream, self._log_buffer)
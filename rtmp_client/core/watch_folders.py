@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .events import Event
+from .ffmpeg_resolver import find_ffprobe
+from .media_cache import DEFAULT_PROBE_WORKERS
+from .media_probe import MediaInfo, probe_media_checked
+from .settings import AppSettings
+
+
+INDEX_VERSION = 1
+# Same set the GUI's "Add Video(s)" dialog offers
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".mov")
+DEFAULT_INTERVAL_S = 30.0
+# Files modified more recently than this are probably still being copied in; picked up next rescan
+DEFAULT_SETTLE_S = 5.0
+
+_MEDIA_INFO_FIELDS = {f.name for f in fields(MediaInfo)}
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY, added_at REAL, scanned_at REAL)",
+    "CREATE TABLE IF NOT EXISTS files ("
+    " root TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+    " decodable INTEGER NOT NULL, info TEXT, PRIMARY KEY (root, path))",
+)
+
+
+def default_watch_index_path(settings: AppSettings) -> Path:
+    # Lives next to media-cache.json and the playlist
+    return settings.playlist_file.with_name("watch-index.sqlite3")
+
+
+def walk_media(root: str, extensions: Sequence[str] = VIDEO_EXTENSIONS) -> Iterator[Tuple[str, os.stat_result]]:
+    # Every media file under root with its stat. Hidden entries (partial downloads such as rsync's
+    # ".name.XXXXXX") are skipped, and directory symlinks are not followed so loops cannot recurse
+    suffixes = tuple(e.lower() for e in extensions)
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.lower().endswith(suffixes) and entry.is_file():
+                            yield entry.path, entry.stat()
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+@dataclass
+class ScanResult:
+    root: str
+    added: List[str] = field(default_factory=list)  # became playable: new files, or fixed ones
+    removed: List[str] = field(default_factory=list)  # gone, or no longer playable
+    probed: int = 0
+    unchanged: int = 0
+    settling: int = 0
+    total: int = 0  # playable files under root after the scan
+    elapsed_s: float = 0.0
+    missing: bool = False  # folder not reachable (unmounted disk); its index rows were left alone
+
+    def describe(self) -> str:
+        if self.missing:
+            return f"{self.root}: folder tidak ditemukan, dilewati"
+        return (
+            f"{self.root}: {self.total} file, +{len(self.added)} -{len(self.removed)}, "
+            f"{self.probed} di-probe, {self.unchanged} tidak berubah"
+            + (f", {self.settling} masih disalin" if self.settling else "")
+            + f" ({self.elapsed_s:.2f}s)"
+        )
+
+
+class FolderIndex:
+    # SQLite index of the media files under each watched folder: size, mtime and the ffprobe
+    # result. A rescan is one directory walk compared against the stored rows; only new or
+    # modified files are probed, and the changes are written in a single transaction.
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ffprobe_path: Optional[str] = None,
+        max_workers: int = DEFAULT_PROBE_WORKERS,
+        settle_s: float = DEFAULT_SETTLE_S,
+        extensions: Sequence[str] = VIDEO_EXTENSIONS,
+    ) -> None:
+        self.path = Path(path) if path is not None else default_watch_index_path(AppSettings())
+        self.max_workers = max(1, max_workers)
+        self.settle_s = settle_s
+        self.extensions = tuple(extensions)
+        self._ffprobe_path = ffprobe_path or find_ffprobe()
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._db:
+            if self._db.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+                self._db.execute("DROP TABLE IF EXISTS files")
+                self._db.execute("DROP TABLE IF EXISTS roots")
+                self._db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute("PRAGMA synchronous = NORMAL")
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def roots(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT path FROM roots ORDER BY added_at")]
+
+    def add_root(self, root: str) -> str:
+        root = os.path.abspath(root)
+        with self._lock, self._db:
+            self._db.execute("INSERT OR IGNORE INTO roots (path, added_at) VALUES (?, ?)", (root, time.time()))
+        return root
+
+    def remove_root(self, root: str) -> None:
+        root = os.path.abspath(root)
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM roots WHERE path = ?", (root,))
+            self._db.execute("DELETE FROM files WHERE root = ?", (root,))
+
+    def files(self, root: str) -> List[str]:
+        # Playable files under root in path order
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path FROM files WHERE root = ? AND decodable = 1 ORDER BY path", (os.path.abspath(root),)
+            )
+            return [row[0] for row in rows]
+
+    def info(self, file_path: str) -> Optional[MediaInfo]:
+        with self._lock:
+            row = self._db.execute("SELECT info FROM files WHERE path = ? LIMIT 1", (file_path,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        data = json.loads(row[0])
+        info = MediaInfo(**{k: v for k, v in data.items() if k in _MEDIA_INFO_FIELDS})
+        info.path = file_path
+        return info
+
+    def scan(self, root: str, progress: Optional[Callable[[int, int], None]] = None) -> ScanResult:
+        started = time.monotonic()
+        root = self.add_root(root)
+        result = ScanResult(root)
+        if not os.path.isdir(root):
+            # An unmounted share would otherwise read as "every file deleted"
+            result.missing = True
+            return result
+        now_ns = time.time_ns()
+        settle_ns = int(self.settle_s * 1e9)
+        found: Dict[str, Tuple[int, int]] = {}
+        settling: Set[str] = set()
+        for path, st in walk_media(root, self.extensions):
+            if now_ns - st.st_mtime_ns < settle_ns:
+                settling.add(path)
+            else:
+                found[path] = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            known = {
+                path: (size, mtime_ns, bool(decodable))
+                for path, size, mtime_ns, decodable in self._db.execute(
+                    "SELECT path, size, mtime_ns, decodable FROM files WHERE root = ?", (root,)
+                )
+            }
+        stale = [p for p, identity in found.items() if known.get(p, (None, None, False))[:2] != identity]
+        # A file being rewritten keeps its old row until it settles
+        gone = [p for p in known if p not in found and p not in settling]
+        rows = []
+        for path, (definitive, info) in zip(stale, self._probe_all(stale, progress)):
+            size, mtime_ns = found[path]
+            if not definitive and self._ffprobe_path:
+                # ffprobe timed out or failed to start: leave the row as it was so the next scan
+                # probes the file again instead of pinning it as undecodable
+                continue
+            if info is None and not self._ffprobe_path:
+                # Nothing to probe with: trust the extension, the runner still validates every item
+                decodable = True
+            else:
+                decodable = info is not None and (info.has_video or info.has_audio)
+            rows.append((root, path, size, mtime_ns, int(decodable), json.dumps(asdict(info)) if info else None))
+            was_playable = known.get(path, (None, None, False))[2]
+            if decodable and not was_playable:
+                result.added.append(path)
+            elif was_playable and not decodable:
+                result.removed.append(path)
+        result.removed.extend(p for p in gone if known[p][2])
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.executemany("DELETE FROM files WHERE root = ? AND path = ?", [(root, p) for p in gone])
+            self._db.execute("UPDATE roots SET scanned_at = ? WHERE path = ?", (time.time(), root))
+            result.total = self._db.execute(
+                "SELECT COUNT(*) FROM files WHERE root = ? AND decodable = 1", (root,)
+            ).fetchone()[0]
+        result.added.sort()
+        result.removed.sort()
+        result.probed = len(stale)
+        result.unchanged = len(found) - len(stale)
+        result.settling = len(settling)
+        result.elapsed_s = time.monotonic() - started
+        return result
+
+    def _probe_all(
+        self, paths: List[str], progress: Optional[Callable[[int, int], None]]
+    ) -> List[Tuple[bool, Optional[MediaInfo]]]:
+        # (definitive, info) per path, see probe_media_checked
+        if not paths or not self._ffprobe_path:
+            return [(False, None)] * len(paths)
+        infos: List[Tuple[bool, Optional[MediaInfo]]] = []
+        workers = min(self.max_workers, len(paths))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="watch-probe") as pool:
+            for info in pool.map(lambda p: probe_media_checked(p, self._ffprobe_path), paths):
+                infos.append(info)
+                if progress is not None:
+                    progress(len(infos), len(paths))
+        return infos
+
+
+class FolderWatcher:
+    # Rescans the watched folders every interval_s on a daemon thread. Playlists bound to the
+    # folders follow on_added / on_removed instead of being rebuilt.
+
+    def __init__(self, index: FolderIndex, roots: Sequence[str] = (), interval_s: float = DEFAULT_INTERVAL_S) -> None:
+        self.on_scanned = Event()  # ScanResult, per folder and rescan
+        self.on_added = Event()  # list of paths that became playable, path order within each folder
+        self.on_removed = Event()  # list of paths that are gone or no longer playable
+        self.index = index
+        self.interval_s = max(1.0, interval_s)
+        self._roots: List[str] = [index.add_root(r) for r in roots] if roots else index.roots()
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def roots(self) -> List[str]:
+        with self._lock:
+            return list(self._roots)
+
+    def add_root(self, root: str) -> str:
+        root = self.index.add_root(root)
+        with self._lock:
+            if root not in self._roots:
+                self._roots.append(root)
+        return root
+
+    def remove_root(self, root: str) -> List[str]:
+        # Returns the files that leave the playlist with it
+        root = os.path.abspath(root)
+        files = self.index.files(root)
+        with self._lock:
+            if root in self._roots:
+                self._roots.remove(root)
+        self.index.remove_root(root)
+        return files
+
+    def files(self) -> List[str]:
+        seen: Dict[str, None] = {}
+        for root in self.roots:
+            seen.update(dict.fromkeys(self.index.files(root)))
+        return list(seen)
+
+    def scan_now(self) -> List[ScanResult]:
+        # Synchronous rescan of every folder; events fire for what changed
+        results = []
+        with self._scan_lock:
+            for root in self.roots:
+                if self._stop.is_set():
+                    break
+                result = self.index.scan(root)
+                results.append(result)
+                self.on_scanned.emit(result)
+                if result.removed:
+                    self.on_removed.emit(list(result.removed))
+                if result.added:
+                    self.on_added.emit(list(result.added))
+        return results
+
+    def start(self, scan_first: bool = True) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(scan_first,), name="folder-watcher", daemon=True)
+        self._thread.start()
+
+    def rescan_soon(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(5.0)
+        self._thread = None
+
+    def _run(self, scan_first: bool) -> None:
+        if not scan_first:
+            self._wake.wait(self.interval_s)
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.scan_now()
+            except Exception:
+                # A folder on an unplugged disk or a locked index must not end the watcher
+                pass
+            self._wake.wait(self.interval_s)
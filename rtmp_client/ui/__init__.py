@@ -1,3 +1,5 @@
 __all__ = [
     "main_window",
+    "playlist_model",
+    "runner_signals",
 ]
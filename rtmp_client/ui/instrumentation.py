@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import functools
+import time
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, Qt, QTimer
+
+from rtmp_client.core.instrumentation import Instrumentation
+
+
+LAG_INTERVAL_MS = 100
+
+
+def timed_slot(func: Callable) -> Callable:
+    # Times a MainWindow slot as "ui.<name>" when self._instrumentation is set. The wrapper stays
+    # a method of the QObject, so queued connections from runner threads still land on the GUI
+    # thread. Only for slots whose signal passes exactly the slot's arguments.
+    name = f"ui.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(self, *args):
+        instrumentation = self._instrumentation
+        if instrumentation is None:
+            return func(self, *args)
+        started = time.perf_counter()
+        try:
+            return func(self, *args)
+        finally:
+            instrumentation.record(name, time.perf_counter() - started)
+
+    return wrapper
+
+
+class EventLoopLagMonitor(QObject):
+    # A precise timer that should fire every LAG_INTERVAL_MS; how much later it actually fires
+    # is the time the GUI thread was busy with something else (slots, painting, layout)
+
+    def __init__(
+        self,
+        instrumentation: Instrumentation,
+        interval_ms: int = LAG_INTERVAL_MS,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        super().__init__(parent)
+        self._instrumentation = instrumentation
+        self._interval_s = interval_ms / 1000.0
+        self._last: Optional[float] = None
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self) -> None:
+        self._last = None
+        self._timer.start()
+
+    def stop(self) -> None:
+        self._timer.stop()
+
+    def _tick(self) -> None:
+        now = time.monotonic()
+        if self._last is not None:
+            self._instrumentation.record_lag(now - self._last - self._interval_s)
+        self._last = now
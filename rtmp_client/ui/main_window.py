@@ -1,15 +1,17 @@
 from __future__ import annotations
 
 import os
-import re
-from typing import Optional
+import threading
+import time
+from typing import Dict, List, Optional
 
-from PySide6.QtCore import Qt, Slot, QUrl
-from PySide6.QtGui import QTextCursor
+from PySide6.QtCore import Qt, QDateTime, QItemSelectionModel, QTimer, Signal, Slot
+from PySide6.QtGui import QImage, QKeySequence, QPixmap, QShortcut, QTextCursor
 from PySide6.QtWidgets import (
     QWidget,
     QMainWindow,
     QFileDialog,
+    QInputDialog,
     QVBoxLayout,
     QHBoxLayout,
     QFormLayout,
@@ -19,25 +21,83 @@ from PySide6.QtWidgets import (
     QLabel,
     QMessageBox,
     QSizePolicy,
-    QListWidget,
-    QListWidgetItem,
+    QListView,
     QCheckBox,
     QGroupBox,
     QAbstractItemView,
     QSplitter,
+    QDateTimeEdit,
 )
-from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
-from PySide6.QtMultimediaWidgets import QVideoWidget
 
+from rtmp_client.core.encode_cache import EncodeCache
+from rtmp_client.core.encoding import MODE_CACHED, MODE_COPY, EncodeSettings
 from rtmp_client.core.ffmpeg_runner import FFMpegRunner
+from rtmp_client.core.instrumentation import (
+    PROFILE_CPROFILE,
+    Instrumentation,
+    ProfileCapture,
+    instrumentation_enabled,
+    profile_request_from_env,
+)
+from rtmp_client.core.lifecycle import LifecyclePolicy
+from rtmp_client.core.media_cache import (
+    MediaCache,
+    default_media_cache_path,
+    format_duration,
+    total_duration,
+)
+from rtmp_client.core.metrics import MetricsRegistry, MetricsServer
+from rtmp_client.core.playlist_store import PlaylistStore
+from rtmp_client.core.preview import PreviewSettings
+from rtmp_client.core.progress import ProgressSample
+from rtmp_client.core.reconnect import ReconnectEvent, ReconnectPolicy
+from rtmp_client.core.settings import AppSettings
+from rtmp_client.core.standby import GoLiveReport, StandbyPolicy
 from rtmp_client.core.validators import is_valid_rtmp_url, is_file_readable
+from rtmp_client.core.watch_folders import FolderIndex, FolderWatcher, default_watch_index_path
+from rtmp_client.ui.instrumentation import EventLoopLagMonitor, timed_slot
+from rtmp_client.ui.playlist_model import PlaylistModel
+from rtmp_client.ui.runner_signals import RunnerSignals
 
 
 class MainWindow(QMainWindow):
+    # Results of a background playlist probe (dict: path -> MediaInfo or None)
+    _probe_finished = Signal(object)
+    # Watched-folder changes from the watcher thread (list of paths)
+    _watch_added = Signal(object)
+    _watch_removed = Signal(object)
+    # Report path of a finished profile capture (the sampler writes it from its own thread)
+    _profile_finished = Signal(object)
+
     def __init__(self, parent: Optional[QWidget] = None) -> None:
         super().__init__(parent)
         self.setWindowTitle("RTMP Client")
-        self._runner = FFMpegRunner()
+        self._settings = AppSettings()
+        self._media_cache = MediaCache(default_media_cache_path(self._settings))
+        self._runner = FFMpegRunner(
+            encode=EncodeSettings.from_app_settings(self._settings),
+            encode_cache=EncodeCache.from_app_settings(self._settings),
+            media_cache=self._media_cache,
+            log_max_lines=self._settings.log_max_lines,
+            reconnect=ReconnectPolicy.from_app_settings(self._settings),
+            lifecycle=LifecyclePolicy.from_app_settings(self._settings),
+            standby=StandbyPolicy.from_app_settings(self._settings),
+            bitrate_ladder=self._settings.bitrate_ladder_kbps or None,
+            preview=PreviewSettings.from_app_settings(self._settings),
+        )
+        self._runner_signals = RunnerSignals(self._runner, self)
+        # Hot-path counters (settings.instrumentation or RTMP_CLIENT_INSTRUMENT=1); None keeps timed slots free
+        self._instrumentation: Optional[Instrumentation] = None
+        if instrumentation_enabled(self._settings):
+            self._instrumentation = Instrumentation()
+            self._instrumentation.watch_runner(self._runner)
+        self._profile: Optional[ProfileCapture] = None
+        self._probe_thread: Optional[threading.Thread] = None
+        self._probe_pending = False
+        self._current_file: Optional[str] = None
+        self._file_modes: Dict[str, str] = {}
+        # Scheduled start time (time.time()) while the slate is on air, None otherwise
+        self._scheduled_at: Optional[float] = None
 
         central = QWidget(self)
         self.setCentralWidget(central)
@@ -51,8 +111,12 @@ class MainWindow(QMainWindow):
         self.browse_button.clicked.connect(self.on_browse_clicked)
 
         # Playlist widgets
-        self.playlist = QListWidget(self)
+        # Restored from the last session; every edit is journaled to playlist_file as it happens
+        self.playlist_model = PlaylistModel(PlaylistStore.open(self._settings.playlist_file), self)
+        self.playlist = QListView(self)
+        self.playlist.setModel(self.playlist_model)
         self.playlist.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.playlist.setUniformItemSizes(True)
         self.add_videos_button = QPushButton("Add Video(s)", self)
         self.add_videos_button.clicked.connect(self.on_add_videos)
         self.remove_selected_button = QPushButton("Remove Selected", self)
@@ -61,12 +125,58 @@ class MainWindow(QMainWindow):
         self.move_up_button.clicked.connect(self.on_move_up)
         self.move_down_button = QPushButton("Move Down", self)
         self.move_down_button.clicked.connect(self.on_move_down)
+        self.watch_folder_button = QPushButton("Watch Folder...", self)
+        self.watch_folder_button.setToolTip(
+            "File video baru di folder ini otomatis masuk playlist, juga saat streaming"
+        )
+        self.watch_folder_button.clicked.connect(self.on_watch_folder)
+        self.unwatch_folder_button = QPushButton("Unwatch", self)
+        self.unwatch_folder_button.clicked.connect(self.on_unwatch_folder)
+        self.watch_label = QLabel("", self)
+        self.watch_label.setWordWrap(True)
+        # Folder index and rescans; folders watched last session are picked up again
+        self._watcher = FolderWatcher(
+            FolderIndex(default_watch_index_path(self._settings), settle_s=self._settings.watch_settle_s),
+            interval_s=self._settings.watch_interval_s,
+        )
         self.loop_checkbox = QCheckBox("Loop Playlist", self)
+        self.playlist_info_label = QLabel("", self)
+        self.gapless_checkbox = QCheckBox("Gapless (satu koneksi RTMP untuk seluruh playlist)", self)
+        self.gapless_checkbox.setToolTip(
+            "Semua file dikirim lewat satu proses FFmpeg tanpa reconnect antar file. "
+            "File sebaiknya memiliki codec dan resolusi yang sama."
+        )
+        self.passthrough_checkbox = QCheckBox("Stream copy bila file sudah kompatibel (hemat CPU)", self)
+        self.passthrough_checkbox.setChecked(True)
+        self.passthrough_checkbox.setToolTip(
+            "File H.264/AAC dengan GOP dan bitrate yang sesuai target dikirim tanpa re-encode (-c copy)."
+        )
+        self.cache_checkbox = QCheckBox("Cache hasil encode (loop berikutnya tanpa re-encode)", self)
+        self.cache_checkbox.setToolTip(
+            "Hasil encode putaran pertama disimpan di folder config dan dipakai ulang dengan stream copy."
+        )
+        self.adaptive_checkbox = QCheckBox("Preset adaptif (turunkan kualitas saat encoder tertinggal)", self)
+        self.adaptive_checkbox.setChecked(self._settings.adaptive_encoding)
+        self.adaptive_checkbox.setToolTip(
+            "Preset/resolusi/fps disesuaikan dengan speed encode; perubahan berlaku di awal file berikutnya."
+        )
+        self.congestion_checkbox = QCheckBox("Turunkan bitrate saat koneksi padat", self)
+        self.congestion_checkbox.setChecked(self._settings.congestion_control)
+        self.congestion_checkbox.setToolTip(
+            "Bitrate video diturunkan bertahap saat upload tertinggal dan dinaikkan lagi setelah koneksi pulih."
+        )
+        self.precache_checkbox = QCheckBox("Pre-encode di background", self)
+        self.precache_checkbox.setEnabled(False)
+        self.cache_checkbox.toggled.connect(self.precache_checkbox.setEnabled)
 
         # RTMP URL
         self.rtmp_url_edit = QLineEdit(self)
         self.rtmp_url_edit.setPlaceholderText("rtmp://... atau rtmps://...")
         self.rtmp_url_edit.setClearButtonEnabled(True)
+        self.extra_urls_edit = QPlainTextEdit(self)
+        self.extra_urls_edit.setPlaceholderText("Tujuan tambahan (opsional), satu URL RTMP/RTMPS per baris")
+        self.extra_urls_edit.setFixedHeight(60)
+        self._destination_status: Dict[str, str] = {}
 
         # Controls
         self.start_button = QPushButton("Start Streaming", self)
@@ -74,28 +184,52 @@ class MainWindow(QMainWindow):
         self.stop_button = QPushButton("Stop Streaming", self)
         self.stop_button.clicked.connect(self.on_stop_clicked)
         self.stop_button.setEnabled(False)
+        self.schedule_checkbox = QCheckBox("Mulai terjadwal", self)
+        self.schedule_checkbox.setToolTip(
+            "Slate hitam menahan koneksi RTMP sejak sebelum jadwal; playlist mengambil alih tepat pada waktunya."
+        )
+        self.schedule_edit = QDateTimeEdit(QDateTime.currentDateTime().addSecs(600), self)
+        self.schedule_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.schedule_edit.setCalendarPopup(True)
+        self.schedule_edit.setEnabled(False)
+        self.schedule_checkbox.toggled.connect(self.schedule_edit.setEnabled)
 
         # Status and connection quality
         self.status_label = QLabel("Idle", self)
         self.status_label.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
         self.conn_label = QLabel("", self)
         self.conn_label.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        self.destinations_label = QLabel("", self)
+        self.destinations_label.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        self.destinations_label.setWordWrap(True)
 
         # Log output
         self.log_output = QPlainTextEdit(self)
         self.log_output.setReadOnly(True)
         self.log_output.setLineWrapMode(QPlainTextEdit.NoWrap)
-
-        # Preview setup (QtMultimedia)
+        self.log_output.setMaximumBlockCount(self._settings.log_max_lines)
+        # Runner output is pulled from its ring buffer in batches instead of one signal per line
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(self._settings.log_flush_interval_ms)
+        self._log_timer.timeout.connect(self._flush_runner_logs)
+        self._log_timer.start()
+
+        # Preview: frames come from the streaming FFmpeg process itself (no second decoder)
         self.preview_group = QGroupBox("Preview", self)
         preview_layout = QVBoxLayout(self.preview_group)
-        self.video_widget = QVideoWidget(self.preview_group)
-        preview_layout.addWidget(self.video_widget)
-        self.media_player = QMediaPlayer(self.preview_group)
-        self.audio_output = QAudioOutput(self.preview_group)
-        self.audio_output.setVolume(0.0)
-        self.media_player.setAudioOutput(self.audio_output)
-        self.media_player.setVideoOutput(self.video_widget)
+        self.preview_label = QLabel(self.preview_group)
+        self.preview_label.setAlignment(Qt.AlignCenter)
+        # Ignored: a pixmap must not grow the label, or every frame would resize the window
+        self.preview_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.preview_label.setStyleSheet("background-color: black;")
+        preview_layout.addWidget(self.preview_label, 1)
+        self.preview_checkbox = QCheckBox("Tampilkan preview (output kecil dari proses FFmpeg)", self)
+        self.preview_checkbox.setChecked(self._settings.preview_enabled)
+        self.preview_checkbox.setToolTip(
+            "Preview memakai hasil scale/fps yang sama dengan stream. Berlaku saat Start berikutnya."
+        )
+        preview_layout.addWidget(self.preview_checkbox)
+        self._preview_image: Optional[QImage] = None
 
         # Layouts
         form = QFormLayout()
@@ -104,6 +238,7 @@ class MainWindow(QMainWindow):
         file_row.addWidget(self.browse_button)
         form.addRow("Video File:", file_row)
         form.addRow("RTMP URL:", self.rtmp_url_edit)
+        form.addRow("Simulcast:", self.extra_urls_edit)
 
         playlist_group = QGroupBox("Playlist", self)
         playlist_layout = QVBoxLayout(playlist_group)
@@ -115,7 +250,22 @@ class MainWindow(QMainWindow):
         playlist_buttons_row.addWidget(self.move_up_button)
         playlist_buttons_row.addWidget(self.move_down_button)
         playlist_layout.addLayout(playlist_buttons_row)
+        watch_row = QHBoxLayout()
+        watch_row.addWidget(self.watch_folder_button)
+        watch_row.addWidget(self.unwatch_folder_button)
+        watch_row.addWidget(self.watch_label, 1)
+        playlist_layout.addLayout(watch_row)
+        playlist_layout.addWidget(self.playlist_info_label)
         playlist_layout.addWidget(self.loop_checkbox)
+        playlist_layout.addWidget(self.gapless_checkbox)
+        playlist_layout.addWidget(self.passthrough_checkbox)
+        playlist_layout.addWidget(self.adaptive_checkbox)
+        playlist_layout.addWidget(self.congestion_checkbox)
+        cache_row = QHBoxLayout()
+        cache_row.addWidget(self.cache_checkbox)
+        cache_row.addWidget(self.precache_checkbox)
+        cache_row.addStretch(1)
+        playlist_layout.addLayout(cache_row)
 
         buttons_row = QHBoxLayout()
         buttons_row.addWidget(self.start_button)
@@ -131,11 +281,15 @@ class MainWindow(QMainWindow):
         right_widget = QWidget(self)
         right_layout = QVBoxLayout(right_widget)
         self.preview_group.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.video_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.video_widget.setMinimumHeight(240)
+        self.preview_label.setMinimumHeight(240)
         right_layout.addWidget(self.preview_group, 3)
         right_layout.addWidget(self.status_label)
         right_layout.addWidget(self.conn_label)
+        right_layout.addWidget(self.destinations_label)
+        schedule_row = QHBoxLayout()
+        schedule_row.addWidget(self.schedule_checkbox)
+        schedule_row.addWidget(self.schedule_edit, 1)
+        right_layout.addLayout(schedule_row)
         right_layout.addLayout(buttons_row)
         right_layout.addWidget(self.log_output, 2)
 
@@ -149,11 +303,97 @@ class MainWindow(QMainWindow):
         root_layout.addWidget(splitter, 1)
 
         # Wire runner signals
-        self._runner.on_log.connect(self.append_log)
-        self._runner.on_started.connect(self.on_started)
-        self._runner.on_stopped.connect(self.on_stopped)
-        self._runner.on_error.connect(self.on_error)
-        self._runner.on_file_started.connect(self.on_file_started)
+        self._runner_signals.on_started.connect(self.on_started)
+        self._runner_signals.on_stopped.connect(self.on_stopped)
+        self._runner_signals.on_error.connect(self.on_error)
+        self._runner_signals.on_file_started.connect(self.on_file_started)
+        self._runner_signals.on_file_mode.connect(self.on_file_mode)
+        self._runner_signals.on_destination_status.connect(self.on_destination_status)
+        self._runner_signals.on_progress.connect(self.on_progress)
+        self._runner_signals.on_reconnect.connect(self.on_reconnect)
+        self._runner_signals.on_preview_frame.connect(self.on_preview_frame)
+        self._runner_signals.on_go_live.connect(self.on_go_live)
+        self._probe_finished.connect(self.on_probe_finished)
+        self._watch_added.connect(self.on_watch_added)
+        self._watch_removed.connect(self.on_watch_removed)
+        self._watcher.on_added.connect(self._watch_added.emit)
+        self._watcher.on_removed.connect(self._watch_removed.emit)
+        self._refresh_playlist_info()
+        self._update_watch_label()
+        if self._watcher.roots:
+            self._watcher.start()
+        self._metrics = self._start_metrics()
+        self._start_diagnostics()
+
+    def _start_metrics(self) -> Optional[MetricsServer]:
+        # Optional Prometheus endpoint (metrics_port in settings); scrapes are served off the GUI thread
+        if not self._settings.metrics_port:
+            return None
+        registry = MetricsRegistry()
+        registry.track("main", self._runner)
+        server = MetricsServer(registry, self._settings.metrics_host, self._settings.metrics_port)
+        try:
+            server.start()
+        except OSError as exc:
+            self.append_log(f"[app] Endpoint metrics tidak bisa dibuka di port {server.port}: {exc}\n")
+            return None
+        self.append_log(f"[app] Metrics: {server.address}\n")
+        return server
+
+    def _start_diagnostics(self) -> None:
+        # Ctrl+Shift+P starts a profile capture (a second press ends it early); with instrumentation
+        # on, a rate/slot-time/loop-lag summary goes to the log every instrument_report_interval_s
+        self._profile_finished.connect(self.on_profile_finished)
+        self._profile_shortcut = QShortcut(QKeySequence("Ctrl+Shift+P"), self)
+        self._profile_shortcut.activated.connect(self.on_profile_shortcut)
+        if self._instrumentation is not None:
+            self._lag_monitor = EventLoopLagMonitor(self._instrumentation, parent=self)
+            self._lag_monitor.start()
+            interval_s = max(1.0, self._settings.instrument_report_interval_s)
+            self._perf_timer = QTimer(self)
+            self._perf_timer.setInterval(int(interval_s * 1000))
+            self._perf_timer.timeout.connect(self._log_instrumentation)
+            self._perf_timer.start()
+            self.append_log(f"[perf] Instrumentasi aktif, ringkasan tiap {interval_s:g} detik\n")
+        request = profile_request_from_env()
+        if request is not None:
+            self._start_profile(*request)
+
+    @Slot()
+    def _log_instrumentation(self) -> None:
+        if self._instrumentation is not None:
+            self.append_log(self._instrumentation.report().describe() + "\n")
+
+    @Slot()
+    def on_profile_shortcut(self) -> None:
+        if self._profile is not None and self._profile.running:
+            self._stop_profile(self._profile)
+        else:
+            self._start_profile(self._settings.profile_duration_s, self._settings.profile_mode)
+
+    def _start_profile(self, duration_s: float, mode: str) -> None:
+        try:
+            capture = ProfileCapture(
+                self._settings.diagnostics_dir, duration_s, mode, instrumentation=self._instrumentation
+            )
+            capture.on_finished.connect(self._profile_finished.emit)
+            capture.start()
+        except (ValueError, OSError) as exc:
+            self.append_log(f"[perf] Profil tidak bisa dimulai: {exc}\n")
+            return
+        self._profile = capture
+        if mode == PROFILE_CPROFILE:
+            # cProfile only sees this (GUI) thread, and has to be stopped from it as well
+            QTimer.singleShot(int(capture.duration_s * 1000), lambda: self._stop_profile(capture))
+        self.append_log(f"[perf] Profil {mode} {capture.duration_s:g} detik dimulai (Ctrl+Shift+P menghentikan)\n")
+
+    def _stop_profile(self, capture: ProfileCapture) -> None:
+        if capture.running:
+            capture.stop()
+
+    @Slot(object)
+    def on_profile_finished(self, path) -> None:
+        self.append_log(f"[perf] Laporan profil: {path}\n")
 
     # Slots
     @Slot()
@@ -177,46 +417,157 @@ class MainWindow(QMainWindow):
             start_dir,
             "Video Files (*.mp4 *.mkv *.mov);;All Files (*)",
         )
-        for f in files:
-            if f and os.path.isfile(f):
-                self.playlist.addItem(f)
+        self.playlist_model.add_files([f for f in files if f and os.path.isfile(f)])
+        self._refresh_playlist_info()
 
     @Slot()
     def on_remove_selected(self) -> None:
-        for item in self.playlist.selectedItems():
-            row = self.playlist.row(item)
-            self.playlist.takeItem(row)
+        self.playlist_model.remove_rows(self._selected_rows())
+        self._refresh_playlist_info()
+
+    def _refresh_playlist_info(self) -> None:
+        if not self._media_cache.available:
+            return
+        if self._probe_thread is not None and self._probe_thread.is_alive():
+            # Re-run once the current probe finishes so the label reflects the latest list
+            self._probe_pending = True
+            return
+        files = self.playlist_model.files()
+        if not files:
+            self.playlist_info_label.setText("")
+            return
+        self.playlist_info_label.setText(f"Membaca info media ({len(files)} file)...")
+        self._probe_thread = threading.Thread(
+            target=self._probe_worker, args=(files,), name="playlist-probe", daemon=True
+        )
+        self._probe_thread.start()
+
+    def _probe_worker(self, files: List[str]) -> None:
+        self._probe_finished.emit(self._media_cache.probe_many(files))
+
+    @Slot(object)
+    @timed_slot
+    def on_probe_finished(self, infos: dict) -> None:
+        self._probe_thread = None
+        if self._probe_pending:
+            self._probe_pending = False
+            self._refresh_playlist_info()
+            return
+        self.playlist_model.set_infos(infos)
+        known, invalid = self.playlist_model.summary()
+        text = f"{self.playlist_model.rowCount()} file, total durasi {format_duration(total_duration(known))}"
+        if invalid:
+            text += f" ({invalid} tidak valid)"
+        self.playlist_info_label.setText(text)
 
     @Slot()
-    def on_move_up(self) -> None:
-        rows = sorted([self.playlist.row(i) for i in self.playlist.selectedItems()])
-        if not rows:
+    def on_watch_folder(self) -> None:
+        folder = QFileDialog.getExistingDirectory(self, "Pilih Folder yang Dipantau", os.path.expanduser("~"))
+        if not folder:
             return
-        for row in rows:
-            if row == 0:
-                continue
-            item = self.playlist.takeItem(row)
-            self.playlist.insertItem(row - 1, item)
-            item.setSelected(True)
+        self._watcher.add_root(folder)
+        self._update_watch_label()
+        self._watcher.start()
+        self._watcher.rescan_soon()
 
     @Slot()
-    def on_move_down(self) -> None:
-        rows = sorted([self.playlist.row(i) for i in self.playlist.selectedItems()], reverse=True)
+    def on_unwatch_folder(self) -> None:
+        roots = self._watcher.roots
+        if not roots:
+            return
+        folder, ok = QInputDialog.getItem(self, "Berhenti Memantau", "Folder:", roots, 0, False)
+        if not ok or not folder:
+            return
+        # Files already in the playlist stay; the folder just stops feeding it
+        self._watcher.remove_root(folder)
+        if not self._watcher.roots:
+            self._watcher.stop()
+        self._update_watch_label()
+
+    @Slot(object)
+    @timed_slot
+    def on_watch_added(self, files: List[str]) -> None:
+        known = set(self.playlist_model.files())
+        new = [f for f in files if f not in known]
+        if not new:
+            return
+        self.playlist_model.add_files(new)
+        if self._runner.extend_playlist(new):
+            self.append_log(f"[app] {len(new)} file baru dari folder pantauan masuk playlist\n")
+        self._refresh_playlist_info()
+
+    @Slot(object)
+    @timed_slot
+    def on_watch_removed(self, files: List[str]) -> None:
+        gone = set(files)
+        rows = [row for row, path in enumerate(self.playlist_model.files()) if path in gone]
+        if rows:
+            self.playlist_model.remove_rows(rows)
+            self._refresh_playlist_info()
+
+    def _update_watch_label(self) -> None:
+        roots = self._watcher.roots
+        self.watch_label.setText("Dipantau: " + ", ".join(roots) if roots else "")
+        self.unwatch_folder_button.setEnabled(bool(roots))
+
+    def _selected_rows(self) -> List[int]:
+        return [index.row() for index in self.playlist.selectionModel().selectedRows()]
+
+    def _move_selected(self, delta: int) -> None:
+        rows = self.playlist_model.move_rows(self._selected_rows(), delta)
         if not rows:
             return
-        for row in rows:
-            if row >= self.playlist.count() - 1:
-                continue
-            item = self.playlist.takeItem(row)
-            self.playlist.insertItem(row + 1, item)
-            item.setSelected(True)
+        self.playlist.selectionModel().select(
+            self.playlist_model.selection(rows), QItemSelectionModel.ClearAndSelect
+        )
+        current = rows[0] if delta < 0 else rows[-1]
+        index = self.playlist_model.index(current)
+        self.playlist.selectionModel().setCurrentIndex(index, QItemSelectionModel.NoUpdate)
+        self.playlist.scrollTo(index)
+
+    @Slot()
+    def on_move_up(self) -> None:
+        self._move_selected(-1)
+
+    @Slot()
+    def on_move_down(self) -> None:
+        self._move_selected(+1)
 
     @Slot()
     def on_start_clicked(self) -> None:
         # Prefer playlist if available
-        files = [self.playlist.item(i).text() for i in range(self.playlist.count())]
+        files = self.playlist_model.files()
         rtmp_url = self.rtmp_url_edit.text().strip()
+        destinations = [u.strip() for u in self.extra_urls_edit.toPlainText().splitlines() if u.strip()]
         loop = self.loop_checkbox.isChecked()
+        gapless = self.gapless_checkbox.isChecked()
+        passthrough = self.passthrough_checkbox.isChecked()
+        use_cache = self.cache_checkbox.isChecked()
+        precache = use_cache and self.precache_checkbox.isChecked()
+        adaptive = self.adaptive_checkbox.isChecked()
+        congestion = self.congestion_checkbox.isChecked()
+        self._runner.set_preview(
+            PreviewSettings(height=self._settings.preview_height, fps=self._settings.preview_fps)
+            if self.preview_checkbox.isChecked()
+            else None
+        )
+        self._clear_preview()
+        self._file_modes.clear()
+        self._destination_status.clear()
+        self.destinations_label.setText("")
+        invalid_destinations = [u for u in destinations if not is_valid_rtmp_url(u)]
+        if invalid_destinations:
+            QMessageBox.warning(
+                self, "Validasi Gagal", "URL tujuan tambahan tidak valid:\n" + "\n".join(invalid_destinations)
+            )
+            return
+        go_live_at: Optional[float] = None
+        if self.schedule_checkbox.isChecked():
+            go_live_at = self.schedule_edit.dateTime().toSecsSinceEpoch()
+            if go_live_at <= time.time():
+                QMessageBox.warning(self, "Validasi Gagal", "Jadwal mulai sudah lewat.")
+                return
+        self._scheduled_at = go_live_at
 
         if files:
             # Validate at least the first file exists
@@ -228,7 +579,19 @@ class MainWindow(QMainWindow):
                 return
             self.set_running_ui(True)
             self.append_log("[app] Starting FFmpeg (playlist)...\n")
-            self._runner.start_playlist(video_files=files, rtmp_url=rtmp_url, loop=loop)
+            self._runner.start_playlist(
+                video_files=files,
+                rtmp_url=rtmp_url,
+                loop=loop,
+                gapless=gapless,
+                passthrough=passthrough,
+                use_cache=use_cache,
+                precache=precache,
+                destinations=destinations,
+                adaptive=adaptive,
+                congestion=congestion,
+                go_live_at=go_live_at,
+            )
             return
 
         # Fallback single file
@@ -242,47 +605,157 @@ class MainWindow(QMainWindow):
 
         self.set_running_ui(True)
         self.append_log("[app] Starting FFmpeg...\n")
-        self._runner.start_stream(video_path=video_path, rtmp_url=rtmp_url)
+        if destinations or go_live_at is not None:
+            self._runner.start_playlist(
+                video_files=[video_path],
+                rtmp_url=rtmp_url,
+                loop=False,
+                destinations=destinations,
+                go_live_at=go_live_at,
+            )
+        else:
+            self._runner.start_stream(video_path=video_path, rtmp_url=rtmp_url)
 
     @Slot()
     def on_stop_clicked(self) -> None:
         self.append_log("[app] Stopping FFmpeg...\n")
         self._runner.stop_stream()
-        self.media_player.stop()
 
     @Slot()
+    @timed_slot
     def on_started(self) -> None:
+        if self._scheduled_at is not None:
+            when = QDateTime.fromSecsSinceEpoch(int(self._scheduled_at)).toString("HH:mm:ss")
+            self.status_label.setText(f"Standby: slate sampai {when}")
+            return
         self.status_label.setText("Streaming berjalan...")
 
+    @Slot(object)
+    @timed_slot
+    def on_go_live(self, report: GoLiveReport) -> None:
+        self._scheduled_at = None
+        self._update_streaming_status()
+
     @Slot(str)
+    @timed_slot
     def on_file_started(self, file_path: str) -> None:
-        base = os.path.basename(file_path)
-        self.status_label.setText(f"Streaming: {base}")
-        # Start preview of the local file, muted
-        self.media_player.setSource(QUrl.fromLocalFile(file_path))
-        self.media_player.play()
+        self._current_file = file_path
+        self._update_streaming_status()
+
+    @Slot(object)
+    @timed_slot
+    def on_preview_frame(self, data: bytes) -> None:
+        image = QImage.fromData(data, "JPG")
+        if image.isNull():
+            return
+        self._preview_image = image
+        self._show_preview()
+
+    def _show_preview(self) -> None:
+        if self._preview_image is None:
+            return
+        pixmap = QPixmap.fromImage(self._preview_image)
+        size = self.preview_label.size()
+        self.preview_label.setPixmap(pixmap.scaled(size, Qt.KeepAspectRatio, Qt.FastTransformation))
+
+    def _clear_preview(self) -> None:
+        self._preview_image = None
+        self.preview_label.clear()
+
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        self._show_preview()
+
+    @Slot(str, str)
+    @timed_slot
+    def on_file_mode(self, file_path: str, mode: str) -> None:
+        self._file_modes[file_path] = mode
+        if file_path == self._current_file:
+            self._update_streaming_status()
+
+    def _update_streaming_status(self) -> None:
+        # The first item starts its pre-roll while the slate is still on air
+        if not self._current_file or self._scheduled_at is not None:
+            return
+        text = f"Streaming: {os.path.basename(self._current_file)}"
+        mode = self._file_modes.get(self._current_file)
+        if mode:
+            labels = {MODE_COPY: "stream copy", MODE_CACHED: "cache"}
+            text += f" [{labels.get(mode, 'transcode')}]"
+        self.status_label.setText(text)
+
+    @Slot(str, str)
+    @timed_slot
+    def on_destination_status(self, url: str, status: str) -> None:
+        self._destination_status[url] = status
+        lines = [f"{self._short_url(u)}: {st}" for u, st in self._destination_status.items()]
+        self.destinations_label.setText("\n".join(lines))
+
+    @Slot(object)
+    @timed_slot
+    def on_progress(self, sample: ProgressSample) -> None:
+        parts = [f"FPS: {sample.fps:g}"]
+        if sample.bitrate_kbps is not None:
+            parts.append(f"Bitrate: {int(sample.bitrate_kbps)} kbps")
+        if sample.speed is not None:
+            parts.append(f"Speed: {sample.speed:.2f}x")
+        if sample.drop_frames or sample.dup_frames:
+            parts.append(f"Drop/Dup: {sample.drop_frames}/{sample.dup_frames}")
+        self.conn_label.setText(" | ".join(parts))
+
+    @Slot(object)
+    @timed_slot
+    def on_reconnect(self, event: ReconnectEvent) -> None:
+        label = "Restart (output macet)" if event.stalled else "Reconnect"
+        self.status_label.setText(
+            f"{label} #{event.total}: {os.path.basename(event.file_path)} "
+            f"dalam {event.delay_s:.0f} detik (percobaan {event.attempt})"
+        )
+
+    @staticmethod
+    def _short_url(url: str) -> str:
+        # Stream keys are secrets; only show scheme + host + app
+        parts = url.split("/")
+        return "/".join(parts[:4]) if len(parts) > 4 else url
 
     @Slot(int)
+    @timed_slot
     def on_stopped(self, exit_code: int) -> None:
         self.append_log(f"[app] FFmpeg exited with code {exit_code}\n")
         self.status_label.setText("Idle")
+        self._scheduled_at = None
+        self._current_file = None
         self.conn_label.setText("")
-        self.media_player.stop()
+        self._clear_preview()
         self.set_running_ui(False)
 
     @Slot(str)
+    @timed_slot
     def on_error(self, message: str) -> None:
         self.append_log(f"[error] {message}\n")
+        self._scheduled_at = None
         QMessageBox.critical(self, "Error", message)
-        self.media_player.stop()
+        self._clear_preview()
         self.set_running_ui(False)
 
     @Slot(str)
     def append_log(self, text: str) -> None:
+        # Keep ordering with runner output that has not been flushed yet
+        self._flush_runner_logs()
+        self._insert_log(text)
+
+    @Slot()
+    @timed_slot
+    def _flush_runner_logs(self) -> None:
+        lines = self._runner.log_buffer.drain()
+        if lines:
+            self._insert_log("\n".join(lines) + "\n")
+
+    @timed_slot
+    def _insert_log(self, text: str) -> None:
         self.log_output.moveCursor(QTextCursor.End)
         self.log_output.insertPlainText(text)
         self.log_output.moveCursor(QTextCursor.End)
-        self._maybe_update_metrics(text)
 
     def set_running_ui(self, running: bool) -> None:
         # Disable inputs during running
@@ -291,35 +764,19 @@ class MainWindow(QMainWindow):
         self.video_path_edit.setEnabled(not running)
         self.browse_button.setEnabled(not running)
         self.rtmp_url_edit.setEnabled(not running)
+        self.extra_urls_edit.setEnabled(not running)
         self.playlist.setEnabled(not running)
         self.add_videos_button.setEnabled(not running)
         self.remove_selected_button.setEnabled(not running)
         self.move_up_button.setEnabled(not running)
         self.move_down_button.setEnabled(not running)
         self.loop_checkbox.setEnabled(not running)
-
-    # Parse FFmpeg progress line for fps/bitrate/speed
-    def _maybe_update_metrics(self, line: str) -> None:
-        if "frame=" not in line or "bitrate=" not in line:
-            return
-        # Example: frame=  110 fps= 25 q=28.0 size=    1024kB time=00:00:04.40 bitrate= 1902.2kbits/s speed=1.01x
-        fps_match = re.search(r"fps=\s*([\d.]+)", line)
-        br_match = re.search(r"bitrate=\s*([\d.]+)\s*([kM])?bits/s", line)
-        sp_match = re.search(r"speed=\s*([\d.]+x)", line)
-        if not (fps_match or br_match or sp_match):
-            return
-        parts = []
-        if fps_match:
-            parts.append(f"FPS: {fps_match.group(1)}")
-        if br_match:
-            val = float(br_match.group(1))
-            unit = br_match.group(2) or ""
-            if unit == "M":
-                kbps = int(val * 1000)
-            else:
-                kbps = int(val)
-            parts.append(f"Bitrate: {kbps} kbps")
-        if sp_match:
-            parts.append(f"Speed: {sp_match.group(1)}")
-        if parts:
-            self.conn_label.setText(" | ".join(parts))
+        self.gapless_checkbox.setEnabled(not running)
+        self.passthrough_checkbox.setEnabled(not running)
+        self.adaptive_checkbox.setEnabled(not running)
+        self.congestion_checkbox.setEnabled(not running)
+        self.preview_checkbox.setEnabled(not running)
+        self.cache_checkbox.setEnabled(not running)
+        self.precache_checkbox.setEnabled(not running and self.cache_checkbox.isChecked())
+        self.schedule_checkbox.setEnabled(not running)
+        self.schedule_edit.setEnabled(not running and self.schedule_checkbox.isChecked())
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PySide6.QtCore import QAbstractListModel, QItemSelection, QModelIndex, QObject, Qt
+from PySide6.QtGui import QBrush, QColor
+
+from rtmp_client.core.media_cache import format_duration, is_decodable
+from rtmp_client.core.media_probe import MediaInfo
+from rtmp_client.core.playlist_store import PlaylistStore, row_runs
+
+
+class PlaylistModel(QAbstractListModel):
+    # List model over a PlaylistStore. Rows hold no per-item objects: text, colour and tooltip are
+    # derived in data() for the rows the view actually paints, so 10k+ files stay cheap. Batched
+    # edits go to the store in one pass and reach the view as a single insert/reset notification.
+
+    def __init__(self, store: Optional[PlaylistStore] = None, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.store = store if store is not None else PlaylistStore()
+        self._infos: Dict[str, Optional[MediaInfo]] = {}
+        self._invalid_brush = QBrush(QColor("red"))
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.store)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):  # type: ignore[override]
+        if not index.isValid() or not 0 <= index.row() < len(self.store):
+            return None
+        path = self.store[index.row()]
+        if role == Qt.DisplayRole:
+            return path
+        if path not in self._infos:
+            return None
+        info = self._infos[path]
+        if role == Qt.ForegroundRole:
+            return None if is_decodable(info) else self._invalid_brush
+        if role == Qt.ToolTipRole:
+            if not is_decodable(info):
+                return "File tidak bisa di-decode, akan dilewati saat streaming"
+            details = [format_duration(info.duration or 0)]  # type: ignore[union-attr]
+            if info.width and info.height:  # type: ignore[union-attr]
+                details.append(f"{info.width}x{info.height}")  # type: ignore[union-attr]
+            details.append("/".join(c for c in (info.video_codec, info.audio_codec) if c))  # type: ignore
+            return " | ".join(details)
+        return None
+
+    def files(self) -> List[str]:
+        return self.store.files()
+
+    def add_files(self, files: List[str]) -> None:
+        if not files:
+            return
+        first = len(self.store)
+        self.beginInsertRows(QModelIndex(), first, first + len(files) - 1)
+        self.store.insert(files)
+        self.endInsertRows()
+
+    def remove_rows(self, rows: Iterable[int]) -> None:
+        rows = list(rows)
+        if not rows:
+            return
+        self.beginResetModel()
+        self.store.remove(rows)
+        self.endResetModel()
+
+    def move_rows(self, rows: Iterable[int], delta: int) -> List[int]:
+        # Returns the rows the moved items ended up in, for re-selecting them
+        rows = list(rows)
+        if not rows:
+            return []
+        self.beginResetModel()
+        moved = self.store.move(rows, delta)
+        self.endResetModel()
+        return moved
+
+    def set_infos(self, infos: Dict[str, Optional[MediaInfo]]) -> None:
+        self._infos = dict(infos)
+        if len(self.store):
+            self.dataChanged.emit(
+                self.index(0), self.index(len(self.store) - 1), [Qt.ForegroundRole, Qt.ToolTipRole]
+            )
+
+    def summary(self) -> Tuple[List[MediaInfo], int]:
+        # (decodable infos, invalid count) over the current rows
+        known: List[MediaInfo] = []
+        invalid = 0
+        for path in self.store.files():
+            if path not in self._infos:
+                continue
+            info = self._infos[path]
+            if is_decodable(info):
+                known.append(info)  # type: ignore[arg-type]
+            else:
+                invalid += 1
+        return known, invalid
+
+    def selection(self, rows: Iterable[int]) -> QItemSelection:
+        # One range per contiguous run instead of one per row
+        selection = QItemSelection()
+        for first, last in row_runs(rows):
+            selection.select(self.index(first), self.index(last))
+        return selection
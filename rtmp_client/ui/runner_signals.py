@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from PySide6.QtCore import QObject, Signal
+
+from rtmp_client.core.ffmpeg_runner import FFMpegRunner
+
+
+class RunnerSignals(QObject):
+    # Thin Qt adapter: re-emits core runner events as signals so slots run on the GUI thread
+    on_started = Signal()
+    on_stopped = Signal(int)
+    on_error = Signal(str)
+    on_file_started = Signal(str)
+    on_file_mode = Signal(str, str)
+    on_destination_status = Signal(str, str)
+    on_progress = Signal(object)
+    on_reconnect = Signal(object)
+    on_preview_frame = Signal(object)
+    on_output_started = Signal(object)
+    on_go_live = Signal(object)
+
+    def __init__(self, runner: FFMpegRunner, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.runner = runner
+        for name in FFMpegRunner.EVENTS:
+            getattr(runner, name).connect(getattr(self, name).emit)
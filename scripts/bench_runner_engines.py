@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Compares the threaded runner with the asyncio engine at N simulated streams.
+# Each engine/N combination runs in its own worker process so RSS numbers are not shared.
+# POSIX only (the fake ffmpeg relies on a shebang and /proc or getrusage).
+
+ROOT = Path(__file__).resolve().parent.parent
+ENGINES = ("threaded", "asyncio")
+
+FAKE_FFMPEG = """#!{python}
+import os, signal, sys, time
+signal.signal(signal.SIGTERM, lambda *a: sys.exit(0))
+args = sys.argv[1:]
+# Answer the runner's capability probe (core/capabilities.py) and exit
+PROBES = {{
+    "-version": "ffmpeg version 6.1-bench\\nconfiguration: --enable-libx264\\n",
+    "-encoders": "Encoders:\\n ------\\n V....D libx264  H.264\\n A....D aac  AAC\\n",
+    "-muxers": "File formats:\\n ---\\n  E flv  FLV (Flash Video)\\n  E mpegts  MPEG-TS\\n",
+    "-protocols": "Supported file protocols:\\nInput:\\n  file\\n  pipe\\nOutput:\\n  file\\n  pipe\\n  rtmp\\n",
+}}
+for flag, text in PROBES.items():
+    if flag in args:
+        sys.stdout.write(text)
+        sys.exit(0)
+rate = float(os.environ.get("BENCH_LINES_PER_SEC", "50"))
+period = float(args[args.index("-stats_period") + 1]) if "-stats_period" in args else 1.0
+progress = None
+if "-progress" in args:
+    target = args[args.index("-progress") + 1]
+    if target == "pipe:1":
+        progress = sys.stdout
+    elif target.startswith("pipe:"):
+        progress = os.fdopen(int(target[5:]), "w")
+err = sys.stderr
+frame = 0
+start = time.monotonic()
+next_progress = start
+while True:
+    now = time.monotonic()
+    frame += 1
+    err.write(f"frame={{frame:6d}} fps=25 q=23.0 size={{frame * 12}}kB time={{now - start:.2f}} bitrate=2500.0kbits/s speed=1x\\r")
+    err.flush()
+    if progress is not None and now >= next_progress:
+        next_progress += period
+        progress.write(
+            f"frame={{frame}}\\nfps=25.00\\nbitrate=2500.0kbits/s\\ntotal_size={{frame * 12288}}\\n"
+            f"out_time_us={{int((now - start) * 1e6)}}\\ndup_frames=0\\ndrop_frames=0\\nspeed=1.00x\\nprogress=continue\\n"
+        )
+        progress.flush()
+    time.sleep(1.0 / rate)
+"""
+
+
+def write_fake_ffmpeg(directory: Path) -> Path:
+    path = directory / "ffmpeg"
+    path.write_text(FAKE_FFMPEG.format(python=sys.executable), encoding="utf-8")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return path
+
+
+def current_rss_kb() -> int:
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_worker(engine: str, streams: int, duration: float, ffmpeg: str, media: str) -> Dict[str, float]:
+    sys.path.insert(0, str(ROOT))
+    from rtmp_client.core.async_runner import AsyncFFMpegRunner
+    from rtmp_client.core.ffmpeg_runner import FFMpegRunner
+
+    cls = AsyncFFMpegRunner if engine == "asyncio" else FFMpegRunner
+    baseline_threads = threading.active_count()
+    baseline_rss = current_rss_kb()
+    runners = [cls(ffmpeg_path=ffmpeg) for _ in range(streams)]
+
+    for runner in runners:
+        runner.start_playlist(video_files=[media], rtmp_url="rtmp://127.0.0.1/bench/key", loop=True)
+    # Spawning N children is the same cost for both engines; measure the steady state only
+    warmup_deadline = time.monotonic() + 60.0
+    while time.monotonic() < warmup_deadline and not all(r.log_buffer.total_lines for r in runners):
+        time.sleep(0.05)
+    for runner in runners:
+        runner.log_buffer.drain()
+    lines_start = sum(runner.log_buffer.total_lines for runner in runners)
+    cpu_start = os.times()
+
+    peak_threads = 0
+    peak_rss = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        time.sleep(0.2)
+        # Same consumer pattern as the UI timer: drain every buffer in batches
+        for runner in runners:
+            runner.log_buffer.drain()
+        peak_threads = max(peak_threads, threading.active_count())
+        peak_rss = max(peak_rss, current_rss_kb())
+    cpu_end = os.times()
+
+    lines = sum(runner.log_buffer.total_lines for runner in runners) - lines_start
+    samples = sum(1 for runner in runners if runner.last_progress is not None)
+    for runner in runners:
+        runner.stop_stream()
+    for runner in runners:
+        runner.wait(10.0)
+
+    cpu = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    return {
+        "engine": engine,
+        "streams": streams,
+        "threads": peak_threads - baseline_threads,
+        "rss_mb": round((peak_rss - baseline_rss) / 1024, 1),
+        "lines": lines,
+        "cpu_s": round(cpu, 3),
+        "us_per_line": round(cpu / lines * 1e6, 2) if lines else 0.0,
+        "streams_with_progress": samples,
+    }
+
+
+def run_case(engine: str, streams: int, args: argparse.Namespace, ffmpeg: str, media: str) -> Dict[str, float]:
+    cmd = [
+        sys.executable,
+        str(Path(__file__).resolve()),
+        "--worker",
+        engine,
+        "--streams",
+        str(streams),
+        "--duration",
+        str(args.duration),
+        "--ffmpeg",
+        ffmpeg,
+        "--media",
+        media,
+    ]
+    env = dict(os.environ, BENCH_LINES_PER_SEC=str(args.lines_per_sec))
+    out = subprocess.run(cmd, env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def print_table(results: List[Dict[str, float]]) -> None:
+    header = f"{'engine':<9} {'streams':>7} {'threads':>7} {'rss_mb':>7} {'lines':>8} {'cpu_s':>7} {'us/line':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['engine']:<9} {r['streams']:>7} {r['threads']:>7} {r['rss_mb']:>7} "
+            f"{r['lines']:>8} {r['cpu_s']:>7} {r['us_per_line']:>8}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark threaded vs asyncio FFmpeg runner engines")
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per measurement")
+    parser.add_argument("--lines-per-sec", type=float, default=50.0, help="stderr lines per simulated stream")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--ffmpeg", help="Binary to run instead of the built-in fake ffmpeg")
+    parser.add_argument("--media", help=argparse.SUPPRESS)
+    parser.add_argument("--worker", choices=ENGINES, help=argparse.SUPPRESS)
+    parser.add_argument("--json", action="store_true", help="Print raw JSON results")
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.streams[0], args.duration, args.ffmpeg, args.media)))
+        return 0
+
+    with tempfile.TemporaryDirectory(prefix="bench-engines-") as tmp:
+        ffmpeg = args.ffmpeg or str(write_fake_ffmpeg(Path(tmp)))
+        media = Path(tmp) / "input.mp4"
+        media.write_bytes(b"")
+        results = [
+            run_case(engine, streams, args, ffmpeg, str(media)) for streams in args.streams for engine in args.engines
+        ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,605 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import queue
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+# End-to-end streaming benchmark without network access.
+# Synthetic inputs come from lavfi test sources; every stream plays into its own local sink on 127.0.0.1.
+# Sinks: "tcp" (in-process receiver, FLV over tcp://), "python" (the in-repo asyncio RTMP ingest,
+# core/ingest_server.py, which also reports ingest jitter and stalls) or "ffmpeg" (each connection
+# relayed to a freshly spawned `ffmpeg -listen 1` RTMP server).
+# Each engine/N combination runs in its own worker process; CPU/RSS sampling reads /proc (Linux).
+
+ROOT = Path(__file__).resolve().parent.parent
+ENGINES = ("threaded", "asyncio")
+SINKS = ("tcp", "python", "ffmpeg")
+RESULT_VERSION = 1
+
+# Bytes a client sends before any media: FLV file header + first PreviousTagSize / RTMP C0+C1+C2
+PREAMBLE_BYTES = {"tcp": 13, "ffmpeg": 1 + 1536 + 1536}
+
+# Metrics compared by --baseline (all "lower is better") and their table labels
+COMPARED = {
+    "start_latency_s": "start_s",
+    "item_first_packet_s": "first_pkt_s",
+    "item_gap_s": "gap_s",
+    "ffmpeg_cpu_pct": "ff_cpu%",
+    "ffmpeg_rss_mb": "ff_rss_mb",
+    "runner_cpu_pct": "py_cpu%",
+    "runner_rss_mb": "py_rss_mb",
+    "stop_latency_s": "stop_s",
+}
+
+
+class SinkConnection:
+    def __init__(self, accepted: float) -> None:
+        self.accepted = accepted
+        self.first_packet: Optional[float] = None  # first byte past the protocol preamble
+        self.last_byte: Optional[float] = None
+        self.closed: Optional[float] = None
+        self.bytes = 0
+
+
+class LocalSink:
+    # Accepts connections on an ephemeral port, timestamps them and discards the payload
+
+    def __init__(self, mode: str, ffmpeg: str) -> None:
+        self.mode = mode
+        self._ffmpeg = ffmpeg
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.port = self._server.getsockname()[1]
+        self.connections: List[SinkConnection] = []
+        self._lock = threading.Lock()
+        self._backends: List[subprocess.Popen] = []
+        # One listening backend is always ready, so its start-up is not charged to the next item
+        self._spare: "queue.Queue[Optional[socket.socket]]" = queue.Queue(maxsize=1)
+        self._closed = False
+        self._thread = threading.Thread(target=self._accept_loop, name=f"sink-{self.port}", daemon=True)
+        self._thread.start()
+        if mode == "ffmpeg":
+            threading.Thread(target=self._prepare_backends, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        if self.mode == "tcp":
+            return f"tcp://127.0.0.1:{self.port}"
+        return f"rtmp://127.0.0.1:{self.port}/live/bench"
+
+    def backend_pids(self) -> List[int]:
+        with self._lock:
+            return [proc.pid for proc in self._backends]
+
+    def snapshot(self) -> List[SinkConnection]:
+        with self._lock:
+            return list(self.connections)
+
+    def close(self) -> None:
+        self._closed = True
+        try:
+            self._server.close()
+        except OSError:
+            pass
+        try:
+            spare = self._spare.get_nowait()
+            if spare is not None:
+                spare.close()
+        except queue.Empty:
+            pass
+        with self._lock:
+            backends = list(self._backends)
+        for proc in backends:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+    def _accept_loop(self) -> None:
+        while not self._closed:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            conn = SinkConnection(time.monotonic())
+            with self._lock:
+                self.connections.append(conn)
+            threading.Thread(target=self._serve, args=(client, conn), daemon=True).start()
+
+    def _serve(self, client: socket.socket, conn: SinkConnection) -> None:
+        backend = None
+        if self.mode == "ffmpeg":
+            try:
+                backend = self._spare.get(timeout=10.0)
+            except queue.Empty:
+                pass
+        if backend is not None:
+            threading.Thread(target=_relay, args=(backend, client), daemon=True).start()
+        preamble = PREAMBLE_BYTES[self.mode]
+        try:
+            while True:
+                data = client.recv(65536)
+                if not data:
+                    break
+                now = time.monotonic()
+                conn.bytes += len(data)
+                conn.last_byte = now
+                if conn.first_packet is None and conn.bytes > preamble:
+                    conn.first_packet = now
+                if backend is not None:
+                    backend.sendall(data)
+        except OSError:
+            pass
+        conn.closed = time.monotonic()
+        for sock in (client, backend):
+            if sock is not None:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+
+    def _prepare_backends(self) -> None:
+        while not self._closed:
+            backend = self._open_backend()
+            while not self._closed:
+                try:
+                    self._spare.put(backend, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            else:
+                if backend is not None:
+                    backend.close()
+
+    def _open_backend(self) -> Optional[socket.socket]:
+        port = _free_port()
+        cmd = [
+            self._ffmpeg, "-hide_banner", "-loglevel", "error", "-listen", "1",
+            "-i", f"rtmp://127.0.0.1:{port}/live/bench", "-c", "copy", "-f", "null", "-",
+        ]
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with self._lock:
+            self._backends.append(proc)
+        if self._closed:
+            proc.kill()
+            return None
+        deadline = time.monotonic() + 5.0
+        while time.monotonic() < deadline and proc.poll() is None:
+            try:
+                return socket.create_connection(("127.0.0.1", port), timeout=1.0)
+            except OSError:
+                time.sleep(0.02)
+        return None
+
+
+class IngestSink:
+    # Same interface as LocalSink, backed by RtmpIngestServer; connections are its publish sessions
+
+    def __init__(self, engine) -> None:
+        from rtmp_client.core.ingest_server import RtmpIngestServer
+
+        self.server = RtmpIngestServer("127.0.0.1")
+        self.server.start_background(engine)
+        self.url = self.server.url("bench").replace("localhost", "127.0.0.1")
+
+    def backend_pids(self) -> List[int]:
+        return []
+
+    def snapshot(self) -> List[SinkConnection]:
+        conns = []
+        for session in list(self.server.sessions):
+            conn = SinkConnection(session.accepted)
+            conn.first_packet = session.first_media
+            conn.last_byte = session.last_media
+            conn.closed = session.ended
+            conn.bytes = session.bytes_in
+            conns.append(conn)
+        return conns
+
+    def close(self) -> None:
+        self.server.stop_background()
+
+
+def _relay(src: socket.socket, dst: socket.socket) -> None:
+    # Server-to-client half of the RTMP relay (handshake replies, acks)
+    try:
+        while True:
+            data = src.recv(65536)
+            if not data:
+                break
+            dst.sendall(data)
+    except OSError:
+        pass
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def generate_inputs(ffmpeg: str, directory: Path, count: int, duration: float, size: str, fps: int) -> List[str]:
+    # H.264 High / yuv420p / AAC 44.1k with a 2 s GOP: also eligible for --passthrough
+    files = []
+    for i in range(count):
+        path = directory / f"bench-{i}.mp4"
+        cmd = [
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}",
+            "-f", "lavfi", "-i", f"sine=frequency={440 + 110 * i}:sample_rate=44100",
+            "-t", f"{duration:g}", "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+            "-g", str(fps * 2), "-b:v", "2500k", "-c:a", "aac", "-b:a", "128k", str(path),
+        ]
+        subprocess.run(cmd, check=True)
+        files.append(str(path))
+    return files
+
+
+def evict_page_cache(path: str) -> None:
+    # Cold-start approximation without root: drop the (clean) cached pages of one file
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def _child_stats(exclude: Set[int]) -> Dict[int, tuple]:
+    # pid -> (cpu ticks, rss pages) for direct children of this process
+    me = os.getpid()
+    stats = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit() or int(entry) in exclude:
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r", encoding="ascii") as fh:
+                fields = fh.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == me:
+            stats[int(entry)] = (int(fields[11]) + int(fields[12]), int(fields[21]))
+    return stats
+
+
+def _self_rss_kb() -> int:
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def measure_steady_state(
+    window: float, streams: int, exclude: Callable[[], Set[int]]
+) -> Dict[str, Optional[float]]:
+    # Samples every child FFmpeg (minus the sink's own listeners) and this process over `window` seconds
+    if not os.path.isdir("/proc"):
+        return {"ffmpeg_cpu_pct": None, "ffmpeg_rss_mb": None, "runner_cpu_pct": None, "runner_rss_mb": None}
+    ticks = os.sysconf("SC_CLK_TCK")
+    page_kb = os.sysconf("SC_PAGE_SIZE") / 1024
+    first = _child_stats(exclude())
+    cpu_start = os.times()
+    started = time.monotonic()
+    rss_samples: List[float] = []
+    self_rss: List[int] = []
+    last = first
+    while time.monotonic() - started < window:
+        time.sleep(0.25)
+        last = _child_stats(exclude())
+        rss_samples.append(sum(rss for _, rss in last.values()) * page_kb)
+        self_rss.append(_self_rss_kb())
+    elapsed = time.monotonic() - started
+    cpu_end = os.times()
+    # Only processes alive for the whole window count (probes and relays come and go)
+    child_ticks = sum(last[pid][0] - first[pid][0] for pid in last if pid in first)
+    own_cpu = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    return {
+        "ffmpeg_cpu_pct": round(child_ticks / ticks / elapsed * 100 / streams, 1),
+        "ffmpeg_rss_mb": round(statistics.mean(rss_samples) / 1024 / streams, 1) if rss_samples else None,
+        "runner_cpu_pct": round(own_cpu / elapsed * 100, 1),
+        "runner_rss_mb": round(statistics.mean(self_rss) / 1024, 1) if self_rss else None,
+    }
+
+
+def _summary(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"mean": None, "p50": None, "max": None}
+    return {
+        "mean": round(statistics.mean(values), 4),
+        "p50": round(statistics.median(values), 4),
+        "max": round(max(values), 4),
+    }
+
+
+def run_worker(engine: str, streams: int, args: argparse.Namespace, files: List[str], tmp: Path) -> Dict:
+    sys.path.insert(0, str(ROOT))
+    from rtmp_client.core.async_runner import AsyncFFMpegRunner
+    from rtmp_client.core.capabilities import CapabilityCache
+    from rtmp_client.core.ffmpeg_runner import FFMpegRunner
+    from rtmp_client.core.lifecycle import STOP_STAGES
+    from rtmp_client.core.media_cache import MediaCache
+
+    cls = AsyncFFMpegRunner if engine == "asyncio" else FFMpegRunner
+    if args.cold:
+        for path in files:
+            evict_page_cache(path)
+    # Hermetic caches, warmed up front so start latency is spawn + connect, not first-time probing
+    capabilities = CapabilityCache(tmp / "capabilities.json")
+    capabilities.get(args.ffmpeg)
+    media_cache = MediaCache(tmp / "media-cache.json")
+    media_cache.probe_many(files)
+
+    if args.sink == "python":
+        from rtmp_client.core.async_runner import AsyncEngine
+
+        sink_engine = AsyncEngine()
+        sinks = [IngestSink(sink_engine) for _ in range(streams)]
+    else:
+        sinks = [LocalSink(args.sink, args.ffmpeg) for _ in range(streams)]
+    runners = [
+        cls(ffmpeg_path=args.ffmpeg, media_cache=media_cache, capabilities=capabilities, prefetch=not args.no_prefetch)
+        for _ in range(streams)
+    ]
+    spawned: List[List[float]] = [[] for _ in range(streams)]
+    for i, runner in enumerate(runners):
+        runner.on_file_mode.connect(lambda _path, _mode, i=i: spawned[i].append(time.monotonic()))
+
+    started = []
+    for runner, sink in zip(runners, sinks):
+        started.append(time.monotonic())
+        runner.start_playlist(video_files=files, rtmp_url=sink.url, loop=True, passthrough=args.passthrough)
+
+    # Steady state: a window inside the first item, after the encoders have settled
+    deadline = time.monotonic() + args.item_duration + 30.0
+    while time.monotonic() < deadline and not all(s.snapshot() and s.snapshot()[0].first_packet for s in sinks):
+        time.sleep(0.05)
+    window = max(0.5, args.item_duration * 0.5)
+    time.sleep(min(args.item_duration * 0.2, 2.0))
+    steady = measure_steady_state(window, streams, lambda: {p for s in sinks for p in s.backend_pids()})
+
+    # Every item once plus the loop wrap back to the first
+    wanted = len(files) + 1
+    deadline = time.monotonic() + wanted * (args.item_duration + 10.0)
+    while time.monotonic() < deadline and not all(len(s.snapshot()) >= wanted for s in sinks):
+        for runner in runners:
+            runner.log_buffer.drain()
+        time.sleep(0.1)
+    time.sleep(min(args.item_duration * 0.3, 2.0))
+
+    stop_latency = []
+    for runner in runners:
+        t0 = time.monotonic()
+        runner.stop_stream()
+        runner.wait(30.0)
+        stop_latency.append(time.monotonic() - t0)
+    ingest = None
+    if args.sink == "python":
+        reports = [session.report() for sink in sinks for session in sink.server.sessions if session.first_media]
+        ingest = {
+            "video_jitter_ms": _summary([r.video_jitter_ms for r in reports]),
+            "bitrate_kbps": _summary([r.bitrate_kbps for r in reports]),
+            "stalls": sum(r.stalls for r in reports),
+            "stall_s": round(sum(r.stall_s for r in reports), 3),
+        }
+    for sink in sinks:
+        sink.close()
+    if args.sink == "python":
+        sink_engine.close()
+
+    start_latency: List[float] = []
+    first_packet: List[float] = []
+    gaps: List[float] = []
+    items = 0
+    for i, sink in enumerate(sinks):
+        conns = [c for c in sink.snapshot() if c.first_packet is not None]
+        if conns:
+            start_latency.append(conns[0].first_packet - started[i])
+        for spawn, conn in zip(spawned[i], conns):
+            first_packet.append(conn.first_packet - spawn)
+        for prev, conn in zip(conns, conns[1:]):
+            if prev.last_byte is not None:
+                gaps.append(conn.first_packet - prev.last_byte)
+        items += len(conns)
+
+    result = {
+        "engine": engine,
+        "streams": streams,
+        "items_played": items,
+        "start_latency_s": _summary(start_latency),
+        "item_first_packet_s": _summary(first_packet),
+        "item_gap_s": _summary(gaps),
+        "stop_latency_s": _summary(stop_latency),
+        "reconnects": sum(r.reconnect_count for r in runners),
+        # How each stop ended: "quit" means FFmpeg closed the stream itself on "q"
+        "stop_stages": {
+            stage: sum(r.lifecycle_stats.stop_stages.get(stage, 0) for r in runners) for stage in STOP_STAGES
+        },
+        "ingest": ingest,
+    }
+    result.update(steady)
+    return result
+
+
+def measure_log_throughput(lines: int) -> Dict[str, float]:
+    # Pushes FFmpeg-style stats lines through FFMpegRunner._read_stream over a real pipe
+    sys.path.insert(0, str(ROOT))
+    from rtmp_client.core.ffmpeg_runner import FFMpegRunner
+
+    runner = FFMpegRunner(ffmpeg_path=sys.executable, log_max_lines=1000)
+    line = b"frame= 1234 fps= 30 q=23.0 size=   10240kB time=00:00:41.13 bitrate=2039.4kbits/s speed=1.00x\r"
+    chunk = line * 256
+    read_fd, write_fd = os.pipe()
+
+    def writer() -> None:
+        with os.fdopen(write_fd, "wb") as out:
+            for _ in range(lines // 256):
+                out.write(chunk)
+
+    thread = threading.Thread(target=writer, daemon=True)
+    started = time.perf_counter()
+    cpu_start = time.process_time()
+    thread.start()
+    with os.fdopen(read_fd, "rb", buffering=0) as stream:
+        runner._read_stream(stream)
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_start
+    thread.join()
+    total = runner.log_buffer.total_lines
+    return {
+        "lines": total,
+        "lines_per_s": round(total / elapsed),
+        "mb_per_s": round(total * len(line) / elapsed / 1e6, 1),
+        "us_per_line": round(cpu / total * 1e6, 3) if total else 0.0,
+    }
+
+
+def ffmpeg_version(ffmpeg: str) -> str:
+    try:
+        out = subprocess.run([ffmpeg, "-version"], stdout=subprocess.PIPE, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    first = out.splitlines()[0] if out else ""
+    return first.split()[2] if first.startswith("ffmpeg version") else first
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return out.stdout.strip()
+
+
+def run_case(engine: str, streams: int, args: argparse.Namespace, files: List[str], tmp: Path) -> Dict:
+    cmd = [
+        sys.executable, str(Path(__file__).resolve()), "--worker", engine, "--streams", str(streams),
+        "--ffmpeg", args.ffmpeg, "--sink", args.sink, "--item-duration", str(args.item_duration),
+        "--workdir", str(tmp), "--inputs", *files,
+    ]
+    for flag in ("passthrough", "cold", "no_prefetch"):
+        if getattr(args, flag):
+            cmd.append("--" + flag.replace("_", "-"))
+    out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _metric(case: Dict, name: str) -> Optional[float]:
+    value = case.get(name)
+    return value.get("mean") if isinstance(value, dict) else value
+
+
+def print_table(report: Dict, baseline: Optional[Dict]) -> None:
+    old_cases = {}
+    if baseline:
+        old_cases = {(c["engine"], c["streams"]): c for c in baseline.get("cases", [])}
+    log = report["log_throughput"]
+    print(f"_read_stream: {log['lines_per_s']} lines/s, {log['mb_per_s']} MB/s, {log['us_per_line']} us/line")
+    header = f"{'engine':<9} {'streams':>7} " + " ".join(f"{label:>16}" for label in COMPARED.values())
+    print(header)
+    print("-" * len(header))
+    for case in report["cases"]:
+        old = old_cases.get((case["engine"], case["streams"]))
+        cells = []
+        for name in COMPARED:
+            value = _metric(case, name)
+            text = "-" if value is None else f"{value:g}"
+            before = _metric(old, name) if old else None
+            if value is not None and before:
+                text += f" ({(value - before) / before * 100:+.0f}%)"
+            cells.append(f"{text:>16}")
+        print(f"{case['engine']:<9} {case['streams']:>7} " + " ".join(cells))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Streaming benchmark against a local sink (no network)")
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--sink", choices=SINKS, default="tcp", help="tcp: in-process receiver; ffmpeg: -listen RTMP")
+    parser.add_argument("--items", type=int, default=3, help="Playlist items (synthetic inputs)")
+    parser.add_argument("--item-duration", type=float, default=8.0, help="Seconds per item")
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--passthrough", action="store_true", help="Stream copy the (compatible) inputs")
+    parser.add_argument("--cold", action="store_true", help="Evict the inputs from the page cache before each case")
+    parser.add_argument("--no-prefetch", action="store_true", help="Disable next-item prefetch in the runner")
+    parser.add_argument("--log-lines", type=int, default=500000, help="Lines for the _read_stream measurement")
+    parser.add_argument("--ffmpeg", help="ffmpeg binary (default: vendor dir, then PATH)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Earlier JSON report; prints the change per metric")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a table")
+    parser.add_argument("--worker", choices=ENGINES, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--inputs", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.worker, args.streams[0], args, args.inputs, Path(args.workdir))
+        print(json.dumps(result))
+        return 0
+
+    if not args.ffmpeg:
+        sys.path.insert(0, str(ROOT))
+        from rtmp_client.core.ffmpeg_resolver import find_ffmpeg
+
+        args.ffmpeg = find_ffmpeg()
+    if not args.ffmpeg:
+        print("ffmpeg tidak ditemukan", file=sys.stderr)
+        return 2
+
+    with tempfile.TemporaryDirectory(prefix="bench-streaming-") as tmp:
+        files = generate_inputs(args.ffmpeg, Path(tmp), args.items, args.item_duration, args.size, args.fps)
+        cases = [
+            run_case(engine, streams, args, files, Path(tmp)) for streams in args.streams for engine in args.engines
+        ]
+    report = {
+        "version": RESULT_VERSION,
+        "meta": {
+            "revision": git_revision(),
+            "ffmpeg": ffmpeg_version(args.ffmpeg),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "sink": args.sink,
+            "items": args.items,
+            "item_duration_s": args.item_duration,
+            "size": args.size,
+            "fps": args.fps,
+            "passthrough": args.passthrough,
+            "cold": args.cold,
+            "prefetch": not args.no_prefetch,
+        },
+        "log_throughput": measure_log_throughput(args.log_lines),
+        "cases": cases,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    baseline = None
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(report, baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())